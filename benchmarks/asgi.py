@@ -0,0 +1,190 @@
+"""
+Katalog o'qishlarini yuqori parallellikda solishtiradi:
+gunicorn (WSGI, sinxron DRF viewlari) va uvicorn (ASGI, main/async_views.py).
+
+Har bir server alohida jarayonda bir xil vaqtinchalik baza bilan ishga tushiriladi,
+yuk esa asyncio ustidagi keep-alive HTTP/1.1 klient bilan beriladi:
+
+    pip install uvicorn
+    python -m benchmarks.asgi --products 20000 --concurrency 50 200 500 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+from benchmarks.common import percentile, setup_django, start_server, write_settings
+
+SERVERS = {
+    'wsgi': {
+        'command': 'gunicorn core.wsgi:application --workers {workers} --threads {threads} '
+                   '--worker-class gthread --bind 127.0.0.1:{port} --log-level warning',
+        'prefix': '/products/',
+    },
+    'asgi': {
+        'command': 'uvicorn core.asgi:application --workers {workers} --port {port} '
+                   '--log-level warning --no-access-log',
+        'prefix': '/async/products/',
+    },
+}
+
+WORDS = ['galaxy', 'iphone', 'pixel', 'redmi', 'phone', 'case', 'charger', 'laptop', 'tablet', 'watch']
+
+
+def seed(count):
+    from main.models import Brand, Product, User
+    from main.search import rebuild_index
+
+    seller, _ = User.objects.get_or_create(username='bench-seller', defaults={'email': 'seller@example.com'})
+    brands = [Brand.objects.get_or_create(name=name.title())[0] for name in WORDS[:5]]
+    rng = random.Random(1)
+    Product.objects.bulk_create(
+        (
+            Product(
+                user=seller,
+                brand=rng.choice(brands),
+                name=f'{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}',
+                description=' '.join(rng.choice(WORDS) for _ in range(8)),
+                ram=rng.choice(['4GB', '8GB', '16GB']),
+                price=Decimal(rng.randint(10, 3000)),
+                stock=rng.randint(0, 50),
+            )
+            for i in range(count)
+        ),
+        batch_size=2000,
+    )
+    rebuild_index()
+    return list(Product.objects.values_list('id', flat=True))
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip().lower()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get('connection') == 'close'
+
+
+async def client(port, paths, counter, latencies, errors):
+    reader = writer = None
+    while counter['left'] > 0:
+        counter['left'] -= 1
+        path = random.choice(paths)
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: keep-alive\r\n\r\n'.encode())
+            await writer.drain()
+            status, close = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors['count'] += 1
+            writer = None
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+        if status != 200:
+            errors['count'] += 1
+        if close:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, paths, concurrency, requests):
+    counter = {'left': requests}
+    latencies, errors = [], {'count': 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, paths, counter, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'concurrency': concurrency,
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'errors': errors['count'],
+    }
+
+
+def route_mix(prefix, product_ids, count=500):
+    rng = random.Random(2)
+    paths = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            paths.append(f'{prefix}?page_size=20')
+        elif kind < 0.8:
+            paths.append(f'{prefix}{rng.choice(product_ids)}/detail/')
+        else:
+            paths.append(f'{prefix}search/?q={rng.choice(WORDS)}')
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[50, 200, 500])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8, help="gunicorn gthread oqimlari (har worker uchun).")
+    parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument('--response-cache', action='store_true',
+                        help="Sinxron viewlarning javob keshini yoqilgan holda qoldirish.")
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    settings_dir = tempfile.mkdtemp(prefix='store-bench-settings-')
+    db_path = setup_django()
+    product_ids = seed(args.products)
+    # Async viewlarda javob keshi yo'q, shuning uchun standart holatda sinxron viewlarniki ham o'chiriladi.
+    write_settings(settings_dir, db_path, args.response_cache)
+
+    report = {
+        'products': args.products,
+        'requests': args.requests,
+        'workers': args.workers,
+        'response_cache': args.response_cache,
+        'servers': {},
+    }
+    for name in args.servers:
+        command = SERVERS[name]['command'].format(workers=args.workers, threads=args.threads, port='{port}')
+        process, port = start_server(command, settings_dir)
+        if process is None:
+            print(f"{name}: serverni ishga tushirib bo'lmadi ({SERVERS[name]['command'].split()[0]} o'rnatilganmi?)",
+                  file=sys.stderr)
+            continue
+        try:
+            paths = route_mix(SERVERS[name]['prefix'], product_ids)
+            asyncio.run(load(port, paths, 10, min(500, args.requests)))  # isitish
+            report['servers'][name] = [
+                asyncio.run(load(port, paths, concurrency, args.requests)) for concurrency in args.concurrency
+            ]
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+JWTAuthentication (har so'rovda User SELECT) va StatelessJWTAuthentication
+(jarayon ichidagi TTL kesh) ni sekundiga so'rovlar va so'rov boshiga SQL soni bo'yicha solishtiradi.
+
+    python -m benchmarks.auth --users 50 --requests 3000 --paths /orders/ /likes/ /products/my/
+"""
+import argparse
+import json
+import random
+
+from benchmarks.common import setup_django, Timer, percentile
+
+
+def run(client, tokens, paths, requests, seed):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    with CaptureQueriesContext(connection) as queries:
+        with Timer() as total:
+            for _ in range(requests):
+                token = rng.choice(tokens)
+                path = rng.choice(paths)
+                with Timer() as timer:
+                    response = client.get(path, HTTP_AUTHORIZATION=f'Bearer {token}')
+                latencies.append(timer.elapsed * 1000)
+                if response.status_code != 200:
+                    errors += 1
+    return {
+        'requests_per_second': round(requests / total.elapsed, 1),
+        'queries_per_request': round(len(queries) / requests, 2),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--paths', nargs='+', default=['/orders/', '/likes/', '/products/my/'])
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--db', default=None)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    from django.conf import settings
+    settings.ALLOWED_HOSTS = ['*']
+    settings.DEBUG = False
+    from django.test import Client
+    from rest_framework.views import APIView
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import AccessToken
+    from main.authentication import StatelessJWTAuthentication, user_cache
+    from main.models import User
+
+    users = [
+        User.objects.get_or_create(username=f'bench-auth-{i}', defaults={'email': f'auth{i}@example.com'})[0]
+        for i in range(args.users)
+    ]
+    tokens = [str(AccessToken.for_user(user)) for user in users]
+    client = Client()
+
+    report = {'users': args.users, 'requests': args.requests, 'paths': args.paths}
+    for name, auth_class in (('stateful', JWTAuthentication), ('stateless', StatelessJWTAuthentication)):
+        # Hech bir view authentication_classes ni o'zgartirmaydi, shuning uchun APIView da almashtirish yetarli.
+        APIView.authentication_classes = [auth_class]
+        user_cache().clear()
+        run(client, tokens, args.paths, min(200, args.requests), args.seed)  # isitish
+        report[name] = run(client, tokens, args.paths, args.requests, args.seed)
+    report['speedup'] = round(
+        report['stateless']['requests_per_second'] / report['stateful']['requests_per_second'], 2
+    )
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
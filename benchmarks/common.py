@@ -0,0 +1,115 @@
+"""
+Benchmarklar uchun umumiy yordamchilar.
+
+Har bir benchmark alohida vaqtinchalik SQLite bazasida ishlaydi, shuning uchun
+ishchi db.sqlite3 ga tegmaydi:
+
+    python -m benchmarks.search --sizes 10000 100000 1000000
+"""
+import logging
+import os
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+# Ko'p oqimli benchmarklarda SQLite yozuvchilari navbat kutishi uchun.
+CONCURRENT_SQLITE_OPTIONS = {'timeout': 60, 'transaction_mode': 'IMMEDIATE'}
+
+
+def setup_django(db_path=None, db_options=None):
+    """Django ni vaqtinchalik baza bilan sozlaydi va migratsiyalarni bajaradi."""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    from django.conf import settings
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='store-bench-'), 'bench.sqlite3')
+    settings.DATABASES['default']['NAME'] = db_path
+    if db_options:
+        settings.DATABASES['default'].setdefault('OPTIONS', {}).update(db_options)
+
+    import django
+    django.setup()
+    # 4xx javoblar benchmark natijasining bir qismi, ularni logga yozmaymiz.
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return db_path
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def write_settings(directory, db_path, response_cache=True, db_options=None, overrides=None):
+    """
+    Alohida jarayondagi serverlar shu bazani ishlatishi uchun core.settings ustidan
+    vaqtinchalik bench_settings.py. response_cache=False bo'lsa sinxron viewlarning
+    javob keshi o'chiriladi (max_entries=0).
+    """
+    lines = [
+        'from core.settings import *',
+        f'DATABASES["default"]["NAME"] = {db_path!r}',
+        f'DATABASES["default"].setdefault("OPTIONS", {{}}).update({dict({"timeout": 60}, **(db_options or {}))!r})',
+        # Har bir o'lchov yangi bazada: umumiy kesh ham shu o'lchovniki.
+        f'CACHES["default"]["LOCATION"] = {os.path.join(directory, "cache")!r}',
+        'DEBUG = False',
+        'ALLOWED_HOSTS = ["*"]',
+    ]
+    if not response_cache:
+        lines.append('STORE_RESPONSE_CACHE = {"BACKEND": "main.cache.LocMemLRUCache", "OPTIONS": {"max_entries": 0}}')
+    lines += [f'{name} = {value!r}' for name, value in (overrides or {}).items()]
+    with open(os.path.join(directory, 'bench_settings.py'), 'w') as fh:
+        fh.write('\n'.join(lines) + '\n')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(command, settings_dir):
+    """
+    command dagi {port} bo'sh port bilan almashtiriladi. Server port ochguncha kutiladi;
+    ishga tushmasa (yoki o'rnatilmagan bo'lsa) (None, port) qaytadi.
+    """
+    port = free_port()
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='bench_settings',
+               PYTHONPATH=os.pathsep.join([settings_dir, str(BASE_DIR), os.environ.get('PYTHONPATH', '')]))
+    try:
+        process = subprocess.Popen(shlex.split(command.format(port=port)), cwd=BASE_DIR, env=env)
+    except FileNotFoundError:
+        return None, port
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return None, port
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    return None, port
@@ -0,0 +1,646 @@
+"""
+Butun API bo'yicha yuklama benchmarki: core/urls.py dagi barcha yo'llar aralash
+o'qish/yozish ssenariylari bilan bir necha parallellik darajasida yuritiladi.
+
+Ssenariylar (og'irligi --mix bilan beriladi):
+- browse: ro'yxat (filtr, tartib, keyingi sahifa), detal, o'xshash mahsulotlar, qidiruv, rasmlar,
+  async viewlar;
+- like: like bosish/qaytarish, like holati va like ro'yxati;
+- checkout: mahsulotlarni ko'rish, bitta yoki savatcha buyurtma, buyurtmalar ro'yxati;
+- profile: profilni o'qish va tahrirlash;
+- routes: qolgan yo'llar -- ro'yxatdan o'tish, token, mahsulot/rasm/buyurtma CRUD,
+  eksport, analitika, metrics, admin va swagger.
+
+Ilova shu jarayonda django.test.Client orqali (--mode inprocess) yoki lokal gunicorn
+orqali (--mode gunicorn) yuritiladi. Natija URL nomi bo'yicha throughput va
+p50/p95/p99; --baseline berilsa oldingi natija bilan solishtiriladi va regressiya
+bo'lsa chiqish kodi 1 bo'ladi:
+
+    python -m benchmarks.runner --concurrency 1 8 32 --duration 20 --output base.json
+    python -m benchmarks.runner --mode gunicorn --workers 4 --baseline base.json
+
+Hisobotdagi operatsiyalar "METOD url-nomi" ko'rinishida (masalan "GET product-list",
+"POST like-toggle"); uncovered_routes -- hech bir ssenariy tegmagan yo'llar.
+"""
+import argparse
+import http.client
+import io
+import itertools
+import json
+import logging
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import timedelta
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.common import (
+    BASE_DIR, CONCURRENT_SQLITE_OPTIONS, percentile, setup_django, start_server, write_settings,
+)
+
+GUNICORN = ('gunicorn core.wsgi:application --workers {workers} --threads {threads} '
+            '--worker-class gthread --bind 127.0.0.1:{{port}} --log-level warning')
+
+DEFAULT_MIX = {'browse': 60, 'like': 15, 'checkout': 10, 'profile': 10, 'routes': 5}
+
+PASSWORD = 'bench-password'
+
+DEFAULT_EXPECT = {'GET': (200,), 'POST': (201,), 'PATCH': (200,), 'PUT': (200,), 'DELETE': (204,)}
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+class Call:
+    """Bitta HTTP so'rov; body JSON yoki (files bo'lsa) multipart ko'rinishida oldindan kodlanadi."""
+
+    def __init__(self, method, path, data=None, token=None, files=None, expect=None):
+        self.method = method
+        self.path = path
+        self.token = token
+        self.expect = expect or DEFAULT_EXPECT[method]
+        if files:
+            self.body, self.content_type = encode_multipart(data or {}, files)
+        elif data is not None:
+            self.body, self.content_type = json.dumps(data).encode(), 'application/json'
+        else:
+            self.body, self.content_type = b'', None
+
+
+class Result:
+    def __init__(self, status, body, ok):
+        self.status = status
+        self.body = body
+        self.ok = ok
+
+    def json(self):
+        return json.loads(self.body)
+
+
+def encode_multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode() + content + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def relative(url):
+    """Pagination javobidagi to'liq URL dan yo'l va so'rov qatori."""
+    parts = urlsplit(url)
+    return f'{parts.path}?{parts.query}' if parts.query else parts.path
+
+
+class InProcessTransport:
+    def __init__(self):
+        from django.test import Client
+
+        self.client = Client(raise_request_exception=False)
+
+    def send(self, call):
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {call.token}'} if call.token else {}
+        response = self.client.generic(call.method, call.path, call.body, content_type=call.content_type, **extra)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, body
+
+    def close(self):
+        from django.db import connections
+
+        connections.close_all()
+
+
+class HttpTransport:
+    """Har bir virtual foydalanuvchi uchun bitta keep-alive HTTP/1.1 ulanish."""
+
+    def __init__(self, port):
+        self.port = port
+        self.connection = None
+
+    def send(self, call):
+        headers = {}
+        if call.content_type:
+            headers['Content-Type'] = call.content_type
+        if call.token:
+            headers['Authorization'] = f'Bearer {call.token}'
+        for attempt in range(2):
+            reused = self.connection is not None
+            if not reused:
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+            try:
+                self.connection.request(call.method, call.path, body=call.body or None, headers=headers)
+                response = self.connection.getresponse()
+                body = response.read()
+            except (ConnectionError, http.client.RemoteDisconnected):
+                # Server bo'sh turgan keep-alive ulanishni yopgan bo'lishi mumkin: bir marta qayta ulanamiz.
+                self.close()
+                if not reused or attempt:
+                    raise
+                continue
+            if response.will_close:
+                self.close()
+            return response.status, body
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class Context:
+    """Barcha virtual foydalanuvchilar uchun umumiy, faqat o'qiladigan ma'lumotlar."""
+
+    def __init__(self, users, admin_token, product_ids, brand_ids, image, zipf):
+        self.users = users
+        self.admin_token = admin_token
+        self.product_ids = product_ids
+        self.brand_ids = brand_ids
+        self.image = image
+        self.zipf = zipf
+        self.sequence = itertools.count()
+
+
+class VirtualUser:
+    def __init__(self, context, index, seed):
+        from main.management.commands.seed_store import ZipfSampler
+
+        self.context = context
+        self.index = index
+        self.user_id, self.username, self.token = context.users[index % len(context.users)]
+        self.rng = random.Random(f'{seed}-{index}')
+        self.products = ZipfSampler(len(context.product_ids), context.zipf, self.rng)
+
+    def product(self):
+        """Mashhurlik bo'yicha Zipf taqsimotidagi mahsulot id si."""
+        return self.context.product_ids[self.products.index()]
+
+
+@scenario('browse')
+def browse(vu):
+    from main.management.commands.seed_store import COLORS, RAMS, WORDS
+
+    rng = vu.rng
+    params = rng.choice([
+        {},
+        {'ordering': '-like_count'},
+        {'ordering': 'price', 'is_available': 'true'},
+        {'brand': rng.choice(vu.context.brand_ids)},
+        {'ram': rng.choice(RAMS), 'color': rng.choice(COLORS)},
+        {'price_min': rng.randint(10, 500), 'price_max': rng.randint(500, 5000)},
+    ])
+    page = yield Call('GET', f'/products/?{urlencode(params)}' if params else '/products/')
+    if page.ok and rng.random() < 0.3:
+        next_url = page.json().get('next')
+        if next_url:
+            yield Call('GET', relative(next_url))
+    for _ in range(rng.randint(1, 3)):
+        product_id = vu.product()
+        yield Call('GET', f'/products/{product_id}/detail/')
+        if rng.random() < 0.5:
+            yield Call('GET', f'/products/{product_id}/related/')
+    if rng.random() < 0.3:
+        yield Call('GET', f'/products/search/?{urlencode({"q": rng.choice(WORDS)})}')
+    if rng.random() < 0.1:
+        yield Call('GET', '/product-images/')
+    if rng.random() < 0.1:
+        yield Call('GET', '/async/products/')
+        yield Call('GET', f'/async/products/{vu.product()}/detail/')
+
+
+@scenario('like')
+def like(vu):
+    # Aniq holat: STORE_LIKE_BUFFER yoqilganda bufer orqali o'tadi.
+    liked = vu.rng.random() < 0.7
+    yield Call('POST', '/likes/toggle/', {'product_id': vu.product(), 'liked': liked}, vu.token, expect=(200,))
+    if vu.rng.random() < 0.3:
+        ids = ','.join(str(vu.product()) for _ in range(20))
+        yield Call('GET', f'/likes/status/?ids={ids}', token=vu.token)
+    if vu.rng.random() < 0.3:
+        yield Call('GET', '/likes/', token=vu.token)
+
+
+@scenario('checkout')
+def checkout(vu):
+    rng = vu.rng
+    product_ids = [vu.product() for _ in range(rng.choice((1, 1, 2, 3)))]
+    for product_id in product_ids:
+        yield Call('GET', f'/products/{product_id}/detail/')
+    if len(product_ids) == 1:
+        yield Call('POST', '/orders/create/', {'product': product_ids[0], 'quantity': 1}, vu.token)
+    else:
+        items = [{'product': product_id, 'quantity': rng.randint(1, 2)} for product_id in product_ids]
+        yield Call('POST', '/orders/bulk/', {'items': items}, vu.token)
+    yield Call('GET', '/orders/', token=vu.token)
+
+
+@scenario('profile')
+def profile(vu):
+    yield Call('GET', '/profile/', token=vu.token)
+    data = {'bio': f'bench bio {vu.rng.random():.6f}', 'first_name': vu.rng.choice(['Ali', 'Vali', 'Soli'])}
+    yield Call('PATCH', '/profile/', data, vu.token)
+
+
+@scenario('routes')
+def routes(vu):
+    """Boshqa ssenariylarga kirmagan yo'llar; har bir sessiya ularning hammasidan bir martadan o'tadi."""
+    from main.management.commands.seed_store import COLORS, RAMS, WORDS
+
+    context, rng, token = vu.context, vu.rng, vu.token
+    number = next(context.sequence)
+    yield Call('POST', '/register/', {
+        'username': f'bench-new-{number}', 'email': f'bench-new-{number}@example.com', 'password': PASSWORD,
+    })
+    pair = yield Call('POST', '/token/', {'username': vu.username, 'password': PASSWORD}, expect=(200,))
+    if pair.ok:
+        yield Call('POST', '/token/refresh/', {'refresh': pair.json()['refresh']}, expect=(200,))
+
+    yield Call('GET', '/products/my/', token=token)
+    created = yield Call('POST', '/products/create/', {
+        'name': f'{rng.choice(WORDS).title()} bench {number}',
+        'brand': rng.choice(context.brand_ids),
+        'description': ' '.join(rng.choice(WORDS) for _ in range(8)),
+        'price': '199.99',
+        'stock': 100,
+        'is_available': True,
+        'ram': rng.choice(RAMS),
+        'color': rng.choice(COLORS),
+    }, token)
+    if created.ok:
+        product_id = created.json()['id']
+        yield Call('PATCH', f'/products/{product_id}/update/', {'price': '189.99'}, token)
+        image = yield Call('POST', '/product-images/', {'product': product_id}, token,
+                           files={'image': ('bench.png', context.image, 'image/png')})
+        if image.ok:
+            image_id = image.json()['id']
+            yield Call('GET', f'/product-images/{image_id}/')
+            yield Call('PATCH', f'/product-images/{image_id}/', {'product': product_id}, token)
+            yield Call('DELETE', f'/product-images/{image_id}/', token=token)
+        yield Call('DELETE', f'/products/{product_id}/delete/', token=token)
+
+    order = yield Call('POST', '/orders/create/', {'product': vu.product(), 'quantity': 1}, token)
+    if order.ok:
+        order_id = order.json()['id']
+        yield Call('GET', f'/orders/{order_id}/detail/', token=token)
+        yield Call('PATCH', f'/orders/{order_id}/update/', {'status': 'cancelled'}, token)
+        yield Call('DELETE', f'/orders/{order_id}/delete/', token=token)
+
+    yield Call('GET', '/products/export/?export_format=ndjson', token=token)
+    yield Call('GET', '/orders/export/', token=token)
+    yield Call('GET', '/analytics/sales/?group_by=day', token=token)
+    yield Call('GET', '/metrics/', token=context.admin_token)
+    yield Call('GET', f'/async/products/search/?{urlencode({"q": rng.choice(WORDS)})}')
+    # Admin sessiya autentifikatsiyasini ishlatadi: anonim so'rov login sahifasiga yo'naltiriladi.
+    yield Call('GET', '/admin/', expect=(302,))
+    yield Call('GET', '/')
+
+
+def route_key(method, path):
+    """So'rov qaysi URL naqshiga tushgani: ("METOD url-nomi", core/urls.py dagi naqsh)."""
+    from django.urls import Resolver404, resolve
+
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return f'{method} unmatched', None
+    if match.namespace == 'admin':
+        return f'{method} admin', 'admin/'
+    return f'{method} {match.url_name or match.route}', match.route
+
+
+def all_routes():
+    """core/urls.py dagi barcha naqshlar; admin bitta yo'l deb olinadi."""
+    from django.urls import URLPattern, URLResolver, get_resolver
+
+    routes = set()
+
+    def walk(patterns, prefix):
+        for pattern in patterns:
+            route = URLResolver._join_route(prefix, str(pattern.pattern))
+            if isinstance(pattern, URLResolver):
+                if pattern.namespace == 'admin':
+                    routes.add(route)
+                else:
+                    walk(pattern.url_patterns, route)
+            elif isinstance(pattern, URLPattern):
+                # DefaultRouter ning .json kabi format qo'shimchalari va api-root
+                # (swagger UI bilan bir xil '' yo'li, unga hech qachon yetib bo'lmaydi).
+                if 'format' in pattern.pattern.regex.groupindex or pattern.name == 'api-root':
+                    continue
+                routes.add(route)
+
+    walk(get_resolver().url_patterns, '')
+    return routes
+
+
+class Recorder:
+    """Bitta virtual foydalanuvchi o'lchovlari; oxirida umumiy hisobotga qo'shiladi."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.statuses = defaultdict(Counter)
+        self.routes = set()
+        self.keys = {}
+
+    def add(self, scenario_name, call, status, ok, elapsed):
+        path = call.path.split('?', 1)[0]
+        key = self.keys.get((call.method, path))
+        if key is None:
+            key = self.keys[call.method, path] = route_key(call.method, path)
+        name, route = key
+        self.routes.add(route)
+        self.latencies[(scenario_name, name)].append(elapsed * 1000)
+        self.statuses[name][status] += 1
+        if not ok:
+            self.errors[(scenario_name, name)] += 1
+
+
+def run_user(vu, transport, deadline, mix, recorder):
+    names, weights = zip(*mix.items())
+    try:
+        while time.perf_counter() < deadline:
+            scenario_name = vu.rng.choices(names, weights)[0]
+            session = SCENARIOS[scenario_name](vu)
+            result = None
+            while True:
+                try:
+                    call = session.send(result)
+                except StopIteration:
+                    break
+                started = time.perf_counter()
+                try:
+                    status, body = transport.send(call)
+                except (OSError, http.client.HTTPException):
+                    status, body = 0, b''
+                elapsed = time.perf_counter() - started
+                ok = status in call.expect
+                recorder.add(scenario_name, call, status, ok, elapsed)
+                result = Result(status, body, ok)
+    finally:
+        transport.close()
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+def run_level(context, make_transport, concurrency, duration, mix, seed):
+    recorders = [Recorder() for _ in range(concurrency)]
+    users = [VirtualUser(context, index, seed) for index in range(concurrency)]
+    started = time.perf_counter()
+    deadline = started + duration
+    threads = [
+        threading.Thread(target=run_user, args=(vu, make_transport(), deadline, mix, recorder))
+        for vu, recorder in zip(users, recorders)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    operations, scenarios = defaultdict(list), defaultdict(list)
+    operation_errors, scenario_errors = Counter(), Counter()
+    statuses, routes, every = defaultdict(Counter), set(), []
+    for recorder in recorders:
+        for (scenario_name, name), values in recorder.latencies.items():
+            operations[name] += values
+            scenarios[scenario_name] += values
+            every += values
+        for (scenario_name, name), count in recorder.errors.items():
+            operation_errors[name] += count
+            scenario_errors[scenario_name] += count
+        for name, counter in recorder.statuses.items():
+            statuses[name].update(counter)
+        routes |= recorder.routes
+
+    report = {
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'total': summarize(every, sum(operation_errors.values()), elapsed),
+        'scenarios': {
+            name: summarize(values, scenario_errors[name], elapsed) for name, values in sorted(scenarios.items())
+        },
+        'operations': {},
+    }
+    for name, values in sorted(operations.items()):
+        report['operations'][name] = summarize(values, operation_errors[name], elapsed)
+        report['operations'][name]['statuses'] = {str(code): count for code, count in sorted(statuses[name].items())}
+    return report, routes
+
+
+def compare(report, baseline, threshold, min_requests, min_delta_ms):
+    """
+    Bir xil parallellikdagi har bir URL nomi uchun p95 oshishi yoki throughput
+    tushishi threshold dan katta bo'lsa regressiya. Kam namunali yoki millisekund
+    ulushidagi farqlar shovqin deb hisoblanadi.
+    """
+    regressions = []
+    previous = {run['concurrency']: run for run in baseline.get('runs', [])}
+    for run in report['runs']:
+        base_run = previous.get(run['concurrency'])
+        if base_run is None:
+            continue
+        for name, current in run['operations'].items():
+            base = base_run['operations'].get(name)
+            if base is None or min(base['requests'], current['requests']) < min_requests:
+                continue
+            if (current['p95_ms'] > base['p95_ms'] * (1 + threshold)
+                    and current['p95_ms'] - base['p95_ms'] >= min_delta_ms):
+                regressions.append({
+                    'concurrency': run['concurrency'], 'operation': name, 'metric': 'p95_ms',
+                    'baseline': base['p95_ms'], 'current': current['p95_ms'],
+                })
+            if current['requests_per_second'] < base['requests_per_second'] * (1 - threshold):
+                regressions.append({
+                    'concurrency': run['concurrency'], 'operation': name, 'metric': 'requests_per_second',
+                    'baseline': base['requests_per_second'], 'current': current['requests_per_second'],
+                })
+    return regressions
+
+
+def parse_mix(values):
+    mix = {}
+    for value in values:
+        name, _, weight = value.partition('=')
+        if name not in SCENARIOS:
+            raise SystemExit(f"Noma'lum ssenariy: {name} (bor: {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def seed(args):
+    """seed_store bilan katalog, so'ng benchmark foydalanuvchilari uchun tokenlar."""
+    from django.core.management import call_command
+    from PIL import Image
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from main.cache import bump_catalog
+    from main.models import Brand, Product, User
+    from main.recommendations import refresh_related_products
+
+    call_command(
+        'seed_store', users=args.users, products=args.products, likes=args.likes, orders=args.orders,
+        seed=args.seed, prefix='bench', password=PASSWORD, stdout=io.StringIO(),
+    )
+    # Ombor yuklama davomida tugamasligi uchun: aks holda buyurtmalar vaqt o'tishi bilan 400 qaytaradi.
+    Product.objects.update(stock=10 ** 9)
+    refresh_related_products(full=True)
+    bump_catalog()
+
+    def token(user):
+        access = AccessToken.for_user(user)
+        access.set_exp(lifetime=timedelta(days=1))
+        return str(access)
+
+    users = [
+        (user.pk, user.username, token(user))
+        for user in User.objects.filter(username__startswith='bench-').order_by('id')
+    ]
+    admin = User.objects.create_user('bench-admin', 'bench-admin@example.com', PASSWORD, is_staff=True)
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 30, 30)).save(buffer, 'PNG')
+    return Context(
+        users=users,
+        admin_token=token(admin),
+        product_ids=list(Product.objects.order_by('id').values_list('id', flat=True)),
+        brand_ids=list(Brand.objects.order_by('id').values_list('id', flat=True)),
+        image=buffer.getvalue(),
+        zipf=args.zipf,
+    )
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['inprocess', 'gunicorn'], default='inprocess')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--duration', type=float, default=20, help="Har bir parallellik darajasi uchun soniya.")
+    parser.add_argument('--warmup', type=float, default=3, help="O'lchovsiz isitish, soniya.")
+    parser.add_argument('--mix', nargs='+', default=[f'{name}={weight}' for name, weight in DEFAULT_MIX.items()],
+                        help="ssenariy=og'irlik, masalan: browse=70 like=30")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--likes', type=int, default=20000)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--zipf', type=float, default=1.1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8, help="gunicorn gthread oqimlari (har worker uchun).")
+    parser.add_argument('--no-response-cache', action='store_true',
+                        help="Katalog viewlarining javob keshini o'chirish.")
+    parser.add_argument('--like-buffer', action='store_true',
+                        help="Like bosishlarini kechiktirib yozish (STORE_LIKE_BUFFER).")
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--baseline', default=None, help="Solishtirish uchun oldingi --output fayli.")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Ruxsat etilgan nisbiy yomonlashuv (0.2 = 20%%).")
+    parser.add_argument('--min-requests', type=int, default=30)
+    parser.add_argument('--min-delta-ms', type=float, default=1.0)
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    media_root = tempfile.mkdtemp(prefix='store-bench-media-')
+    db_path = setup_django(db_options=CONCURRENT_SQLITE_OPTIONS)
+    from django.conf import settings
+
+    settings.DEBUG = False
+    # Sekin so'rovlar hisobotning o'zida ko'rinadi, har birini logga yozish shart emas.
+    logging.getLogger('main.instrumentation').setLevel(logging.ERROR)
+    settings.MEDIA_ROOT = media_root
+    if args.no_response_cache:
+        settings.STORE_RESPONSE_CACHE = {'BACKEND': 'main.cache.LocMemLRUCache', 'OPTIONS': {'max_entries': 0}}
+    overrides = {'MEDIA_ROOT': media_root}
+    if args.like_buffer:
+        settings.STORE_LIKE_BUFFER = overrides['STORE_LIKE_BUFFER'] = {**settings.STORE_LIKE_BUFFER, 'ENABLED': True}
+    context = seed(args)
+
+    process = None
+    if args.mode == 'gunicorn':
+        settings_dir = tempfile.mkdtemp(prefix='store-bench-settings-')
+        write_settings(settings_dir, db_path, not args.no_response_cache, CONCURRENT_SQLITE_OPTIONS, overrides)
+        process, port = start_server(GUNICORN.format(workers=args.workers, threads=args.threads), settings_dir)
+        if process is None:
+            raise SystemExit("gunicorn ni ishga tushirib bo'lmadi (o'rnatilganmi?)")
+
+        def make_transport():
+            return HttpTransport(port)
+    else:
+        make_transport = InProcessTransport
+
+    report = {
+        'commit': git_commit(),
+        'mode': args.mode,
+        'mix': mix,
+        'like_buffer': args.like_buffer,
+        'duration': args.duration,
+        'data': {'users': args.users, 'products': args.products, 'likes': args.likes, 'orders': args.orders},
+        'runs': [],
+    }
+    covered = set()
+    try:
+        if args.warmup:
+            run_level(context, make_transport, max(args.concurrency), args.warmup, mix, args.seed)
+        for concurrency in args.concurrency:
+            run, routes = run_level(context, make_transport, concurrency, args.duration, mix, args.seed)
+            report['runs'].append(run)
+            covered |= routes
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+    report['uncovered_routes'] = sorted(all_routes() - covered)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        report['baseline_commit'] = baseline.get('commit')
+        regressions = compare(report, baseline, args.threshold, args.min_requests, args.min_delta_ms)
+        report['regressions'] = regressions
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+    for item in regressions:
+        print(f"REGRESSION c={item['concurrency']} {item['operation']} {item['metric']}: "
+              f"{item['baseline']} -> {item['current']}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+FTS indeksli qidiruv va icontains skanini katalog hajmi o'sishi bilan solishtiradi.
+
+    python -m benchmarks.search --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import random
+
+from benchmarks.common import setup_django, Timer
+
+WORDS = (
+    'phone tablet laptop watch camera speaker router monitor keyboard mouse charger cable '
+    'galaxy pixel iphone redmi note pro max ultra lite mini plus air neo edge fold flip'
+).split()
+COLORS = ['black', 'white', 'blue', 'red', 'green', 'silver', 'gold']
+
+
+def seed(target, rng, batch_size=10000):
+    from django.db import transaction
+    from main.models import User, Brand, Product
+
+    seller, _ = User.objects.get_or_create(username='bench-seller', defaults={'email': 'bench@example.com'})
+    brands = [Brand.objects.get_or_create(name=f'Brand {i}')[0] for i in range(50)]
+    existing = Product.objects.count()
+    while existing < target:
+        size = min(batch_size, target - existing)
+        with transaction.atomic():
+            Product.objects.bulk_create(
+                Product(
+                    user=seller,
+                    brand=rng.choice(brands),
+                    name=' '.join(rng.sample(WORDS, 3)) + f' {existing + i}',
+                    description=' '.join(rng.choices(WORDS, k=20)),
+                    color=rng.choice(COLORS),
+                    price=rng.randint(10, 2000),
+                    stock=rng.randint(0, 100),
+                )
+                for i in range(size)
+            )
+        existing += size
+
+
+def measure(function, queries):
+    with Timer() as timer:
+        for query in queries:
+            function(query)
+    return timer.elapsed / len(queries) * 1000
+
+
+def icontains_scan(query, limit=20):
+    from django.db.models import Q
+    from main.models import Product
+    queryset = Product.objects.all()
+    for token in query.split():
+        queryset = queryset.filter(
+            Q(name__icontains=token) | Q(description__icontains=token) | Q(brand__name__icontains=token)
+        )
+    return list(queryset.order_by().values_list('id', flat=True)[:limit])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', default=None)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    from main.search import rebuild_index, search_product_ids
+
+    rng = random.Random(args.seed)
+    results = []
+    for size in sorted(args.sizes):
+        seed(size, rng)
+        rebuild_index()
+        # Aniq model qidiruvi: bitta keng tarqalgan so'z va kam uchraydigan model raqami.
+        queries = [f'{rng.choice(WORDS)} {rng.randrange(size)}' for _ in range(args.queries)]
+        row = {
+            'products': size,
+            'fts_ms': round(measure(search_product_ids, queries), 3),
+            'icontains_ms': round(measure(icontains_scan, queries), 3),
+        }
+        results.append(row)
+        print(f"{size:>10} mahsulot: fts {row['fts_ms']:>9.3f} ms  icontains {row['icontains_ms']:>9.3f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
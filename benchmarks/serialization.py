@@ -0,0 +1,109 @@
+"""
+Ro'yxat serializatsiyasi: ModelSerializer + JSONRenderer va values() rejasi
+(main/fastpath.py) + FastJSONRenderer. Ikkala yo'l natijasi baytma-bayt
+solishtiriladi, so'ng sekundiga qatorlar soni o'lchanadi:
+
+    python -m benchmarks.serialization --rows 100 1000 10000 --repeat 5
+"""
+import argparse
+import json
+import random
+from decimal import Decimal
+
+from benchmarks.common import setup_django, Timer
+
+
+def seed(count):
+    from main.models import Brand, Like, OrderProduct, Product, User
+
+    rng = random.Random(1)
+    user = User.objects.create_user('bench-seller', 'bench-seller@example.com', 'secret123')
+    brands = [
+        Brand.objects.create(name=name, description=f'{name} brendi', logo_variants={'source': 'x.png'})
+        for name in ('Samsung', 'Apple', 'Xiaomi', 'Google')
+    ]
+    products = Product.objects.bulk_create(
+        Product(
+            user=user,
+            brand=rng.choice(brands + [None]),
+            name=f'Mahsulot {i}',
+            description=' '.join(rng.choice(['tez', 'yengil', 'kuchli', 'arzon']) for _ in range(20)),
+            ram=rng.choice(['4GB', '8GB', '16GB']),
+            color=rng.choice(['black', 'white']),
+            price=Decimal(rng.randint(1000, 900000)) / 100,
+            stock=rng.randint(0, 100),
+        )
+        for i in range(count)
+    )
+    Like.objects.bulk_create(Like(user=user, product=product) for product in products)
+    OrderProduct.objects.bulk_create(
+        OrderProduct(user=user, product=product, quantity=1, total_price=product.price) for product in products
+    )
+
+
+def measure(repeat, func):
+    best = None
+    for _ in range(repeat):
+        with Timer() as timer:
+            result = func()
+        best = timer.elapsed if best is None else min(best, timer.elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from main.fastpath import build_plan
+    from main.models import Like, OrderProduct, Product
+    from main.renderers import FastJSONRenderer
+    from main.serializer import LikeSafeSerializer, OrderProductSafeSerializer, ProductSafeSerializer
+
+    seed(max(args.rows))
+    request = Request(APIRequestFactory().get('/'))
+    cases = {
+        'products': (ProductSafeSerializer, Product.objects.select_related('user', 'brand').order_by('-id')),
+        'likes': (LikeSafeSerializer, Like.objects.select_related('product__user', 'product__brand').order_by('-id')),
+        'orders': (OrderProductSafeSerializer, OrderProduct.objects.select_related('product').order_by('-id')),
+    }
+
+    report = {'results': []}
+    for name, (serializer_class, queryset) in cases.items():
+        for rows in args.rows:
+            page = queryset[:rows]
+            plan = build_plan(serializer_class(context={'request': request}), queryset)
+
+            def serializer_path():
+                data = serializer_class(list(page), many=True, context={'request': request}).data
+                return JSONRenderer().render(data)
+
+            def values_path():
+                return FastJSONRenderer().render(plan.render(page.values(*plan.columns)))
+
+            slow, slow_bytes = measure(args.repeat, serializer_path)
+            fast, fast_bytes = measure(args.repeat, values_path)
+            report['results'].append({
+                'list': name,
+                'rows': rows,
+                'identical': slow_bytes == fast_bytes,
+                'serializer_rows_per_second': round(rows / slow),
+                'values_rows_per_second': round(rows / fast),
+                'speedup': round(slow / fast, 2),
+            })
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Bitta "issiq" mahsulotga ko'p oqimdan buyurtma berib, ortiqcha sotuv yo'qligini
+va sekundiga buyurtmalar sonini o'lchaydi.
+
+    python -m benchmarks.stock --threads 16 --stock 2000 --orders-per-thread 200
+"""
+import argparse
+import json
+import threading
+from decimal import Decimal
+
+from benchmarks.common import setup_django, Timer, CONCURRENT_SQLITE_OPTIONS
+
+
+def worker(user, product_id, orders, quantity, results, lock):
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user)
+    created = rejected = errors = 0
+    for _ in range(orders):
+        response = client.post('/orders/create/', {'product': product_id, 'quantity': quantity})
+        if response.status_code == 201:
+            created += 1
+        elif response.status_code == 400:
+            rejected += 1
+        else:
+            errors += 1
+    connection.close()
+    with lock:
+        results['created'] += created
+        results['rejected'] += rejected
+        results['errors'] += errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--orders-per-thread', type=int, default=200)
+    parser.add_argument('--stock', type=int, default=2000)
+    parser.add_argument('--quantity', type=int, default=1)
+    parser.add_argument('--db', default=None)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    setup_django(args.db, CONCURRENT_SQLITE_OPTIONS)
+    from django.conf import settings
+    settings.ALLOWED_HOSTS = ['*']
+    from main.models import User, Product, OrderProduct
+
+    seller, _ = User.objects.get_or_create(username='bench-seller', defaults={'email': 'seller@example.com'})
+    product = Product.objects.create(user=seller, name='Hot product', price=Decimal('10.00'), stock=args.stock)
+    buyers = [
+        User.objects.get_or_create(username=f'bench-buyer-{i}', defaults={'email': f'buyer{i}@example.com'})[0]
+        for i in range(args.threads)
+    ]
+
+    results = {'created': 0, 'rejected': 0, 'errors': 0}
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=worker, args=(buyer, product.id, args.orders_per_thread, args.quantity, results, lock))
+        for buyer in buyers
+    ]
+    with Timer() as timer:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    product.refresh_from_db()
+    ordered = sum(OrderProduct.objects.filter(product=product).values_list('quantity', flat=True))
+    report = {
+        'threads': args.threads,
+        'attempts': args.threads * args.orders_per_thread,
+        'created': results['created'],
+        'rejected': results['rejected'],
+        'errors': results['errors'],
+        'initial_stock': args.stock,
+        'final_stock': product.stock,
+        'oversold': max(0, ordered - args.stock),
+        'consistent': ordered + product.stock == args.stock,
+        'seconds': round(timer.elapsed, 3),
+        'orders_per_second': round(results['created'] / timer.elapsed, 1),
+        'attempts_per_second': round(args.threads * args.orders_per_thread / timer.elapsed, 1),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,7 @@ from rest_framework.routers import DefaultRouter
 from django.contrib import admin
 from django.urls import path
 from main.views import *
+from main import async_views
 
 router = DefaultRouter()
 router.register(r'product-images', ProductImageViewSet, basename='productimage')
@@ -37,21 +38,35 @@ urlpatterns += [
     path('profile/', ProfileAPIView.as_view(), name='profile'),
 
     path('products/', ProductListAPIView.as_view(), name='product-list'),
+    path('products/search/', ProductSearchAPIView.as_view(), name='product-search'),
+    path('products/export/', ProductExportAPIView.as_view(), name='product-export'),
     path('products/my/', MyProductListAPIView.as_view(), name='product-my'),
     path('products/create/', ProductCreateAPIView.as_view(), name='product-create'),
     path('products/<int:pk>/detail/', ProductRetrieveAPIView.as_view(), name='product-detail'),
+    path('products/<int:pk>/related/', RelatedProductListAPIView.as_view(), name='product-related'),
     path('products/<int:pk>/update/', ProductUpdateAPIView.as_view(), name='product-update'),
     path('products/<int:pk>/delete/', ProductDeleteAPIView.as_view(), name='product-delete'),
 
+    # ASGI server ostida ishlashga mo'ljallangan async o'qish viewlari
+    path('async/products/', async_views.product_list, name='async-product-list'),
+    path('async/products/search/', async_views.product_search, name='async-product-search'),
+    path('async/products/<int:pk>/detail/', async_views.product_detail, name='async-product-detail'),
+
     path('likes/', LikeListAPIView.as_view(), name='like-list'),
     path('likes/toggle/', LikeToggleAPIView.as_view(), name='like-toggle'),
+    path('likes/status/', LikeStatusAPIView.as_view(), name='like-status'),
 
     path('orders/', OrderProductListAPIView.as_view(), name='order-list'),
     path('orders/create/', OrderProductCreateAPIView.as_view(), name='order-create'),
+    path('orders/export/', OrderExportAPIView.as_view(), name='order-export'),
+    path('orders/bulk/', OrderProductBulkCreateAPIView.as_view(), name='order-bulk-create'),
     path('orders/<int:pk>/detail/', OrderProductRetrieveAPIView.as_view(), name='order-detail'),
     path('orders/<int:pk>/update/', OrderProductUpdateAPIView.as_view(), name='order-update'),
     path('orders/<int:pk>/delete/', OrderProductDeleteAPIView.as_view(), name='order-delete'),
 
+    path('analytics/sales/', SalesAnalyticsAPIView.as_view(), name='sales-analytics'),
+    path('metrics/', MetricsAPIView.as_view(), name='metrics'),
+
 ]
 
 urlpatterns += router.urls
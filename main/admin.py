@@ -7,7 +7,12 @@ from .models import (
     Product,
     ProductImage,
     Like,
-    OrderProduct
+    OrderProduct,
+    Job,
+    SalesRollup,
+    RelatedProduct,
+    RecommendationRun,
+    ImportCheckpoint
 )
 
 
@@ -49,10 +54,11 @@ class ProductImageInline(admin.TabularInline):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'brand', 'price', 'stock', 'is_available', 'created_at')
+    list_display = ('id', 'name', 'brand', 'price', 'stock', 'is_available', 'like_count', 'created_at')
     list_filter = ('brand', 'is_available', 'created_at')
     search_fields = ('name', 'brand__name')
     ordering = ('-created_at',)
+    readonly_fields = ('like_count',)
     inlines = [ProductImageInline]
 
 
@@ -71,3 +77,40 @@ class OrderProductAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'product__name')
     ordering = ('-created_at',)
     readonly_fields = ('total_price', 'created_at')
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'attempts', 'max_attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task',)
+    ordering = ('-id',)
+    readonly_fields = ('locked_at', 'locked_by', 'last_error', 'created_at', 'finished_at')
+
+
+@admin.register(SalesRollup)
+class SalesRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'dimension', 'key_id', 'status', 'orders', 'units', 'revenue')
+    list_filter = ('dimension', 'status')
+    date_hierarchy = 'day'
+    ordering = ('-day', 'dimension', 'key_id')
+
+
+@admin.register(RelatedProduct)
+class RelatedProductAdmin(admin.ModelAdmin):
+    list_display = ('product', 'rank', 'related', 'score')
+    raw_id_fields = ('product', 'related')
+    ordering = ('product', 'rank')
+
+
+@admin.register(RecommendationRun)
+class RecommendationRunAdmin(admin.ModelAdmin):
+    list_display = ('id', 'full', 'products', 'last_like_id', 'last_order_id', 'created_at')
+    list_filter = ('full',)
+    ordering = ('-id',)
+
+
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('source', 'line', 'updated_at')
+    search_fields = ('source',)
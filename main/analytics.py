@@ -0,0 +1,204 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .dates import parse_day
+from .models import Brand, OrderProduct, Product, SalesRollup, User
+
+GROUP_BY_CHOICES = ('day', 'product', 'brand', 'seller')
+# Bitta INSERT dagi qatorlar: o'zgaruvchilar soni SQLite chegarasidan oshmasligi uchun.
+UPSERT_BATCH = 500
+CHUNK_SIZE = 5000
+
+ROLLUP_COLUMNS = ('dimension', 'key_id', 'day', 'status', 'orders', 'units', 'revenue')
+
+
+class AnalyticsError(ValueError):
+    pass
+
+
+def _day(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def add_order(deltas, day, status, product_id, brand_id, seller_id, quantity, total_price, sign=1):
+    """Bitta buyurtmaning to'rtta yig'indi qatoriga ulushini deltas ga qo'shadi."""
+    keys = [
+        (SalesRollup.TOTAL, 0),
+        (SalesRollup.PRODUCT, product_id),
+        (SalesRollup.SELLER, seller_id),
+    ]
+    if brand_id is not None:
+        keys.append((SalesRollup.BRAND, brand_id))
+    for dimension, key_id in keys:
+        delta = deltas[(dimension, key_id, day, status)]
+        delta[0] += sign
+        delta[1] += sign * quantity
+        delta[2] += sign * Decimal(total_price)
+
+
+def new_deltas():
+    return defaultdict(lambda: [0, 0, Decimal('0')])
+
+
+def apply_deltas(deltas):
+    """
+    INSERT ... ON CONFLICT DO UPDATE bilan hisoblagichlarni oshiradi.
+    O'qish-yozish poygasi yo'q: qo'shish bazaning o'zida bajariladi.
+    """
+    adapt_day = connection.ops.adapt_datefield_value
+    rows = [
+        (dimension, key_id, adapt_day(day), status, *value)
+        for (dimension, key_id, day, status), value in deltas.items()
+        if any(value)
+    ]
+    if not rows:
+        return
+    table = connection.ops.quote_name(SalesRollup._meta.db_table)
+    columns = ', '.join(ROLLUP_COLUMNS)
+    counters = ', '.join(f'{name} = {table}.{name} + EXCLUDED.{name}' for name in ('orders', 'units', 'revenue'))
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH):
+            batch = rows[start:start + UPSERT_BATCH]
+            values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES {values} "
+                f"ON CONFLICT (dimension, key_id, day, status) DO UPDATE SET {counters}",
+                [value for row in batch for value in row],
+            )
+
+
+def stamp_order(order):
+    """Buyurtmaga hozirgi brend va sotuvchini yozadi; saqlashdan oldin chaqiriladi."""
+    order.rollup_brand_id = order.product.brand_id
+    order.rollup_seller_id = order.product.user_id
+
+
+def stamp_missing_orders():
+    """Brend/sotuvchisi yozilmagan buyurtmalar (masalan seed_store dagi bulk_create) uchun."""
+    product = Product.objects.filter(pk=OuterRef('product_id'))
+    return OrderProduct.objects.filter(rollup_seller_id__isnull=True).update(
+        rollup_brand_id=Subquery(product.values('brand_id')[:1]),
+        rollup_seller_id=Subquery(product.values('user_id')[:1]),
+    )
+
+
+def _add_instance(deltas, order, sign):
+    if order.rollup_seller_id is None:
+        # Belgilanmagan buyurtma (signalsiz bulk_create) yig'indilarga hali kirmagan; rebuild_rollups qo'shadi.
+        return
+    add_order(
+        deltas, _day(order.created_at), order.status, order.product_id, order.rollup_brand_id,
+        order.rollup_seller_id, order.quantity, order.total_price, sign,
+    )
+
+
+def record_orders(orders, sign=1):
+    """
+    Buyurtmalarni (yoki sign=-1 da ularning ulushini olib tashlab) yig'indilarga yozadi.
+    Brend va sotuvchi buyurtmaning o'zidan (stamp_order) olinadi, mahsulotdan emas.
+    """
+    deltas = new_deltas()
+    for order in orders:
+        _add_instance(deltas, order, sign)
+    apply_deltas(deltas)
+
+
+def move_order(old, new):
+    """
+    Status, miqdor yoki mahsulot o'zgarganda eski ulushni olib, yangisini qo'shadi.
+    old -- bazadagi avvalgi qator: ayirish aynan oshirilgan qatorlardan bo'ladi.
+    """
+    deltas = new_deltas()
+    _add_instance(deltas, old, -1)
+    _add_instance(deltas, new, 1)
+    apply_deltas(deltas)
+
+
+def rebuild_rollups(chunk_size=CHUNK_SIZE):
+    """
+    Yig'indilarni buyurtmalardan qaytadan hisoblaydi. Buyurtmalar id bo'yicha
+    bo'laklab o'qiladi, shuning uchun xotira sarfi bo'lak hajmiga bog'liq.
+    Butun jarayon bitta tranzaksiyada: o'qiyotganlar yarim natijani ko'rmaydi.
+    """
+    orders = (
+        OrderProduct.objects.order_by('id')
+        .values_list('id', 'created_at', 'status', 'product_id', 'rollup_brand_id', 'rollup_seller_id',
+                     'quantity', 'total_price')
+    )
+    processed = 0
+    with transaction.atomic():
+        stamp_missing_orders()
+        SalesRollup.objects.all().delete()
+        last_id = 0
+        while True:
+            chunk = list(orders.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            deltas = new_deltas()
+            for order_id, created_at, status, product_id, brand_id, seller_id, quantity, total_price in chunk:
+                add_order(deltas, _day(created_at), status, product_id, brand_id, seller_id, quantity, total_price)
+            apply_deltas(deltas)
+            last_id = chunk[-1][0]
+            processed += len(chunk)
+    return processed
+
+
+def _names(group_by, ids):
+    if group_by == 'product':
+        return dict(Product.objects.filter(id__in=ids).order_by().values_list('id', 'name'))
+    if group_by == 'brand':
+        return dict(Brand.objects.filter(id__in=ids).order_by().values_list('id', 'name'))
+    return dict(User.objects.filter(id__in=ids).order_by().values_list('id', 'username'))
+
+
+def sales_summary(group_by='day', date_from=None, date_to=None, status=None, seller=None, limit=50):
+    """
+    Faqat yig'indi jadvalidan o'qiydi, buyurtmalar jadvaliga tegmaydi.
+    seller berilsa faqat shu sotuvchining qatorlari (group_by: day yoki seller).
+    """
+    if group_by not in GROUP_BY_CHOICES:
+        raise AnalyticsError(f"group_by {', '.join(GROUP_BY_CHOICES)} dan biri bo'lishi kerak.")
+    if status and status not in {choice[0] for choice in OrderProduct.STATUS_CHOICES}:
+        raise AnalyticsError("Noto'g'ri status qiymati.")
+
+    if seller is not None:
+        queryset = SalesRollup.objects.filter(dimension=SalesRollup.SELLER, key_id=seller.id)
+    elif group_by == 'day':
+        queryset = SalesRollup.objects.filter(dimension=SalesRollup.TOTAL)
+    else:
+        queryset = SalesRollup.objects.filter(dimension=group_by)
+
+    day_from, day_to = parse_day(date_from, AnalyticsError), parse_day(date_to, AnalyticsError)
+    if day_from:
+        queryset = queryset.filter(day__gte=day_from)
+    if day_to:
+        queryset = queryset.filter(day__lte=day_to)
+    if status:
+        queryset = queryset.filter(status=status)
+
+    group_field = 'day' if group_by == 'day' else 'key_id'
+    rows = list(
+        queryset.values(group_field, 'status')
+        .annotate(total_orders=Sum('orders'), total_units=Sum('units'), total_revenue=Sum('revenue'))
+        .order_by('-day' if group_by == 'day' else '-total_revenue', group_field, 'status')[:limit]
+    )
+
+    names = {} if group_by == 'day' else _names(group_by, {row['key_id'] for row in rows})
+    results = []
+    for row in rows:
+        item = {'day': row['day'].isoformat()} if group_by == 'day' else {
+            'id': row['key_id'],
+            'name': names.get(row['key_id']),
+        }
+        item.update({
+            'status': row['status'],
+            'orders': row['total_orders'],
+            'units': row['total_units'],
+            'revenue': str(Decimal(row['total_revenue'] or 0).quantize(Decimal('0.01'))),
+        })
+        results.append(item)
+    return results
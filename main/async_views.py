@@ -0,0 +1,150 @@
+"""
+Katalogni o'qish uchun async (ASGI) viewlar: ro'yxat, detal va qidiruv.
+
+DRF viewlari sinxron, shuning uchun bu yerda oddiy Django async viewlari ishlatiladi.
+Ma'lumotlar Django async ORM (aiterator, aget) orqali o'qiladi, javob esa o'sha
+ProductSafeSerializer bilan tayyorlanadi -- select_related tufayli serializatsiya
+bazaga murojaat qilmaydi. Sinxron viewlardan farqlari:
+- ro'yxatda faqat (created_at, id) bo'yicha tartib va oldinga yuruvchi keyset cursor;
+- javob keshi va ETag qo'llanmaydi.
+?fields= / ?expand= sinxron viewlardagidek ishlaydi (main/fieldsets.py).
+O'qishlar sinxron katalog viewlari kabi replikaga yuboriladi (main/routers.py).
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.utils.urls import replace_query_param
+
+from .fieldsets import FieldsetError, apply_fieldset, parse_fieldset, restrict_queryset
+from .filters import ProductFilter, facet_rows, summarize_facets
+from .models import Product
+from .pagination import CursorError, decode_position, encode_position, keyset_filter, position_of
+from .routers import use_replica
+from .search import search_product_ids
+from .serializer import ProductSafeSerializer
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+ORDERING = ('-created_at', '-id')
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# DRF JSONRenderer bilan bir xil chiqish: ixcham ajratgichlar, UTF-8.
+JSON_DUMPS_PARAMS = {'separators': (',', ':'), 'ensure_ascii': False}
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, safe=False, json_dumps_params=JSON_DUMPS_PARAMS)
+
+
+def _int_param(request, name, default, maximum):
+    try:
+        value = int(request.GET.get(name, default))
+    except ValueError:
+        value = default
+    return max(1, min(value, maximum))
+
+
+def product_serializer(request, fieldset, *args, **kwargs):
+    serializer = ProductSafeSerializer(*args, context={'request': request}, **kwargs)
+    if fieldset is not None:
+        apply_fieldset(getattr(serializer, 'child', serializer), fieldset)
+    return serializer
+
+
+def product_queryset(request, fieldset):
+    """select_related('user', 'brand') yoki ?fields= bo'yicha toraytirilgan queryset."""
+    queryset = Product.objects.select_related('user', 'brand')
+    if fieldset is None:
+        return queryset
+    return restrict_queryset(queryset, product_serializer(request, fieldset), [field.lstrip('-') for field in ORDERING])
+
+
+def fieldset_error(exc):
+    return json_response({exc.param: [str(exc)]}, status=400)
+
+
+@require_GET
+@use_replica
+async def product_list(request):
+    try:
+        fieldset = parse_fieldset(request.GET.get('fields'), request.GET.get('expand'))
+        queryset = product_queryset(request, fieldset)
+    except FieldsetError as exc:
+        return fieldset_error(exc)
+    filterset = ProductFilter(request.GET, queryset=queryset)
+    if not filterset.is_valid():
+        errors = {
+            field: [error['message'] for error in field_errors]
+            for field, field_errors in filterset.errors.get_json_data().items()
+        }
+        return json_response(errors, status=400)
+    queryset = filterset.qs.order_by(*ORDERING)
+
+    page = queryset
+    cursor = request.GET.get('cursor')
+    if cursor:
+        # Keyset cursor sinxron ro'yxat bilan umumiy (main/pagination.py); bu yerda faqat oldinga.
+        try:
+            position, reverse = decode_position(cursor, Product, ORDERING)
+            if reverse:
+                raise CursorError("Orqaga yuruvchi cursor qo'llab-quvvatlanmaydi.")
+        except CursorError:
+            return json_response({'detail': 'Invalid cursor'}, status=404)
+        page = page.filter(keyset_filter(ORDERING, position))
+
+    page_size = _int_param(request, 'page_size', PAGE_SIZE, MAX_PAGE_SIZE)
+    products = [product async for product in page[:page_size + 1].aiterator()]
+    next_url = None
+    if len(products) > page_size:
+        products = products[:page_size]
+        next_url = replace_query_param(
+            request.build_absolute_uri(), 'cursor', encode_position(position_of(products[-1], ORDERING)),
+        )
+
+    facets = summarize_facets([row async for row in facet_rows(queryset).aiterator()])
+    return json_response({
+        'next': next_url,
+        'previous': None,
+        'results': product_serializer(request, fieldset, products, many=True).data,
+        'facets': facets,
+    })
+
+
+@require_GET
+@use_replica
+async def product_detail(request, pk):
+    try:
+        fieldset = parse_fieldset(request.GET.get('fields'), request.GET.get('expand'))
+        queryset = product_queryset(request, fieldset)
+    except FieldsetError as exc:
+        return fieldset_error(exc)
+    try:
+        product = await queryset.aget(pk=pk)
+    except Product.DoesNotExist:
+        return json_response({'detail': 'No Product matches the given query.'}, status=404)
+    return json_response(product_serializer(request, fieldset, product).data)
+
+
+@require_GET
+@use_replica
+async def product_search(request):
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return json_response({'q': "Qidiruv so'zi kiritilishi kerak."}, status=400)
+
+    try:
+        fieldset = parse_fieldset(request.GET.get('fields'), request.GET.get('expand'))
+        queryset = product_queryset(request, fieldset)
+    except FieldsetError as exc:
+        return fieldset_error(exc)
+
+    limit = _int_param(request, 'limit', SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT)
+    # FTS so'rovi xom SQL, uning async API si yo'q.
+    ids = await sync_to_async(search_product_ids)(query, limit=limit)
+    products = {
+        product.id: product
+        async for product in queryset.filter(id__in=ids).aiterator()
+    }
+    ranked = [products[pk] for pk in ids if pk in products]
+    return json_response(product_serializer(request, fieldset, ranked, many=True).data)
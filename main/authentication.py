@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+DEFAULTS = {
+    'USER_CACHE_TTL': 30,
+    'USER_CACHE_SIZE': 10000,
+}
+
+# request.user uchun yetarli maydonlar: id, ruxsatlar va is_active.
+USER_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def auth_setting(name):
+    return getattr(settings, 'STORE_AUTH', {}).get(name, DEFAULTS[name])
+
+
+class UserStateCache:
+    """
+    Jarayon ichidagi TTL li LRU kesh: user_id -> USER_FIELDS qiymatlari.
+    Kalit satrga keltiriladi: tokendagi user_id satr, signaldagi pk esa butun son.
+    Bloklash yoki huquqni olib tashlash boshqa jarayonlarda ko'pi bilan ttl soniyada kuchga kiradi.
+    """
+
+    def __init__(self, ttl=30, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, record = entry
+            if expires <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return record
+
+    def set(self, user_id, record):
+        user_id = str(user_id)
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, record)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_user_cache = None
+_user_cache_lock = threading.Lock()
+
+
+def user_cache():
+    global _user_cache
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                _user_cache = UserStateCache(auth_setting('USER_CACHE_TTL'), auth_setting('USER_CACHE_SIZE'))
+    return _user_cache
+
+
+def load_user_record(user_id):
+    record = user_cache().get(user_id)
+    if record is None:
+        # Doim asosiy bazadan: replika orqada qolsa yangi ro'yxatdan o'tgan yoki bloklangan
+        # foydalanuvchi noto'g'ri holatda keshlanib qolardi.
+        values = (
+            User.objects.using(DEFAULT_DB_ALIAS).filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values_list(*USER_FIELDS).first()
+        )
+        if values is None:
+            return None
+        record = dict(zip(USER_FIELDS, values))
+        user_cache().set(user_id, record)
+    return record
+
+
+def lightweight_user(record):
+    """
+    Bazaga murojaat qilmasdan yasalgan User: filter(user=...) va FK uchun yetarli.
+    email, parol va boshqa maydonlar bo'sh, shuning uchun bu obyekt save() qilinmasligi kerak;
+    to'liq foydalanuvchi kerak bo'lsa User.objects.get(pk=request.user.pk) ishlatiladi.
+    """
+    user = User(**record)
+    user._state.adding = False
+    user._state.db = DEFAULT_DB_ALIAS
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication o'rnini bosadi: har so'rovda User jadvalidan o'qimaydi.
+    Token imzosi va muddati odatdagidek tekshiriladi, foydalanuvchi holati esa
+    UserStateCache dan olinadi (STORE_AUTH['USER_CACHE_TTL'] soniya).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        record = load_user_record(user_id)
+        if record is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not record['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return lightweight_user(record)
@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+from .routers import reading_replica
+
+CATALOG_VERSION = 'catalog'
+RELATED_VERSION = 'related'
+
+
+def product_version(product_id):
+    return f'product:{product_id}'
+
+
+def liked_version(user_id):
+    return f'liked:{user_id}'
+
+
+class BaseResponseCache:
+    """
+    Javoblar keshi uchun interfeys. Kalitlar versiya hisoblagichlarini o'z ichiga
+    oladi, shuning uchun hisoblagich oshirilsa eski yozuvlar boshqa hech qachon o'qilmaydi.
+    Yozuvlar timeout soniyadan keyin eskiradi (None -- muddatsiz).
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, timeout=None):
+        """timeout berilmasa backendning o'z timeout i ishlatiladi."""
+        raise NotImplementedError
+
+    def get_version(self, name):
+        raise NotImplementedError
+
+    def bump_version(self, name):
+        raise NotImplementedError
+
+    def clear(self):
+        """Faqat shu backendning javob yozuvlarini o'chiradi; umumiy keshdagi boshqa ma'lumotlar qoladi."""
+        raise NotImplementedError
+
+
+def _initial_version():
+    # Hisoblagich keshdan chiqib ketsa (eviction, qayta ishga tushirish) yangisi avvalgi barcha
+    # qiymatlardan katta bo'ladi: eski versiyali yozuv kalitlari qaytib kelmaydi.
+    return time.time_ns()
+
+
+class DjangoCacheBackend(BaseResponseCache):
+    """
+    Django CACHES dagi umumiy kesh (masalan Redis, Memcached) ustidagi backend.
+    clear() keshni tozalamaydi, javob kalitlari avlodini (generation) oshiradi.
+    """
+
+    def __init__(self, alias='default', prefix='store-response', timeout=300):
+        self.cache = caches[alias]
+        self.prefix = prefix
+        self.timeout = timeout
+
+    def _key(self, *parts):
+        return ':'.join((self.prefix,) + tuple(str(part) for part in parts))
+
+    def _entry_key(self, key):
+        return self._key('entry', self.get_version('generation'), key)
+
+    def get(self, key):
+        return self.cache.get(self._entry_key(key))
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(self._entry_key(key), value, timeout=timeout if timeout is not None else self.timeout)
+
+    def get_version(self, name):
+        key = self._key('version', name)
+        version = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, _initial_version(), timeout=None)
+            version = self.cache.get(key, 0)
+        return version
+
+    def bump_version(self, name):
+        key = self._key('version', name)
+        self.cache.add(key, _initial_version(), timeout=None)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, _initial_version(), timeout=None)
+
+    def clear(self):
+        self.bump_version('generation')
+
+
+class LocMemLRUCache(BaseResponseCache):
+    """
+    Javoblar jarayon ichidagi LRU da (timeout soniya yashaydi), versiya hisoblagichlari
+    esa Django CACHES dagi umumiy keshda (version_alias) saqlanadi: bir worker yoki
+    manage.py buyrug'idagi o'zgarish boshqa workerlarning eski yozuvlarini ham eskirtiradi.
+    CACHES[version_alias] barcha jarayonlarga umumiy bo'lishi shart (main/checks.py).
+    """
+
+    def __init__(self, max_entries=1000, version_alias='default', prefix='store-response', timeout=300):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._versions = DjangoCacheBackend(version_alias, prefix)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = timeout if timeout is not None else self.timeout
+        expires = time.monotonic() + timeout if timeout is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, name):
+        return self._versions.get_version(name)
+
+    def bump_version(self, name):
+        self._versions.bump_version(name)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Replikadan o'qilgan javob shuncha soniya keshlanadi: replika orqada qolsa yozuvdan oldingi
+# holat yangi versiya kaliti ostida uzoq qolmaydi.
+REPLICA_TIMEOUT = 5
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def replica_timeout():
+    return getattr(settings, 'STORE_RESPONSE_CACHE', {}).get('REPLICA_TIMEOUT', REPLICA_TIMEOUT)
+
+
+def response_cache():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = getattr(settings, 'STORE_RESPONSE_CACHE', {})
+                backend_class = import_string(config.get('BACKEND', 'main.cache.LocMemLRUCache'))
+                _backend = backend_class(**config.get('OPTIONS', {}))
+    return _backend
+
+
+def bump_product(product_id):
+    cache = response_cache()
+    cache.bump_version(product_version(product_id))
+    cache.bump_version(CATALOG_VERSION)
+
+
+def bump_catalog():
+    response_cache().bump_version(CATALOG_VERSION)
+
+
+def bump_related():
+    response_cache().bump_version(RELATED_VERSION)
+
+
+def bump_liked(user_id):
+    response_cache().bump_version(liked_version(user_id))
+
+
+class VersionedCacheMixin:
+    """
+    Anonim GET javoblarini path, query va versiya hisoblagichlari bo'yicha keshlaydi.
+    Detal viewlar uchun mahsulot versiyasi, ro'yxatlar uchun katalog versiyasi ishlatiladi.
+    """
+    cache_lookup_url_kwarg = None
+
+    def get_cache_versions(self, cache, **kwargs):
+        versions = [cache.get_version(RELATED_VERSION)]
+        if self.cache_lookup_url_kwarg:
+            versions.append(cache.get_version(product_version(kwargs[self.cache_lookup_url_kwarg])))
+        else:
+            versions.append(cache.get_version(CATALOG_VERSION))
+        return versions
+
+    def get_cache_key(self, request, cache, **kwargs):
+        query = urlencode(sorted(request.GET.lists()), doseq=True)
+        versions = '.'.join(str(version) for version in self.get_cache_versions(cache, **kwargs))
+        accept = request.META.get('HTTP_ACCEPT', '')
+        return f'{request.path}?{query}|{accept}|v{versions}'
+
+    def is_cacheable(self, request):
+        return request.method == 'GET' and 'HTTP_AUTHORIZATION' not in request.META
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        cache = response_cache()
+        key = self.get_cache_key(request, cache, **kwargs)
+        cached = cache.get(key)
+        if cached is not None:
+            content, headers = cached
+            if 'ETag' in headers:
+                from .conditional import not_modified_response
+                not_modified = not_modified_response(request, headers['ETag'], headers.get('Last-Modified'))
+                if not_modified is not None:
+                    not_modified['ETag'] = headers['ETag']
+                    return not_modified
+            response = HttpResponse(content, headers=headers)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.render()
+            cache.set(key, (response.content, dict(response.headers)),
+                      timeout=replica_timeout() if reading_replica() else None)
+            response['X-Cache'] = 'MISS'
+        return response
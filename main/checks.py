@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Faqat shu jarayon ichida ko'rinadigan kesh backendlari.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def _local_alias(alias):
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', LOCAL_CACHE_BACKENDS[0])
+    return backend in LOCAL_CACHE_BACKENDS
+
+
+@register()
+def shared_response_cache(app_configs, **kwargs):
+    """Javoblar keshi versiyalari boshqa workerlar va manage.py buyruqlari bilan umumiy bo'lishi kerak."""
+    options = getattr(settings, 'STORE_RESPONSE_CACHE', {}).get('OPTIONS', {})
+    alias = options.get('version_alias', options.get('alias', 'default'))
+    if not _local_alias(alias):
+        return []
+    return [Error(
+        f"CACHES['{alias}'] jarayon ichidagi kesh: boshqa workerlar va manage.py buyruqlaridagi "
+        f"o'zgarishlar javoblar keshini eskirtirmaydi.",
+        hint="CACHES ga Redis, Memcached yoki fayl keshini sozlang (CACHE_BACKEND / CACHE_LOCATION).",
+        id='main.E001',
+    )]
+
+
+@register()
+def shared_like_buffer(app_configs, **kwargs):
+    """Buferlangan like holatlari barcha workerlarga ko'rinishi kerak (read-your-writes)."""
+    options = getattr(settings, 'STORE_LIKE_BUFFER', {})
+    alias = options.get('CACHE_ALIAS', 'default')
+    if not options.get('ENABLED') or not _local_alias(alias):
+        return []
+    return [Error(
+        f"STORE_LIKE_BUFFER CACHES['{alias}'] jarayon ichidagi kesh: boshqa workerga tushgan so'rov "
+        f"buferlangan like larni ko'rmaydi va yozmaydi.",
+        hint="CACHES ga Redis, Memcached yoki fayl keshini sozlang (CACHE_BACKEND / CACHE_LOCATION).",
+        id='main.E002',
+    )]
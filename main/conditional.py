@@ -0,0 +1,104 @@
+import hashlib
+from calendar import timegm
+from urllib.parse import urlencode
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .cache import RELATED_VERSION, liked_version, response_cache
+
+
+def _stamp(value):
+    return int(value.timestamp() * 1_000_000) if value else 0
+
+
+def _digest(*parts):
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:32]
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """If-None-Match / If-Modified-Since mos kelsa 304 javobni, aks holda None qaytaradi."""
+    if isinstance(last_modified, str):
+        timestamp = parse_http_date_safe(last_modified)
+    else:
+        timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag, last_modified=None):
+    if response.status_code == 200:
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(timegm(last_modified.utctimetuple()))
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Kuchli ETag va Last-Modified bilan shartli GET. 304 holatida hech narsa serializatsiya qilinmaydi.
+
+    - detal: `conditional_fields` (id va updated_at) qiymatlari, bitta qator o'qiladi
+    - ro'yxat, `conditional_versions` berilgan bo'lsa: shu versiya hisoblagichlari -- bazaga
+      murojaat yo'q (katalog ro'yxati uchun: har bir mahsulot yozuvi CATALOG_VERSION ni oshiradi).
+      Hisoblagichlar barcha workerlar va manage.py buyruqlari uchun umumiy keshda
+      (STORE_RESPONSE_CACHE version_alias, main/checks.py), shuning uchun boshqa jarayondagi
+      yozuv ham ETag ni o'zgartiradi
+    - boshqa ro'yxatlar (foydalanuvchining buyurtmalari): filtrlangan queryset bo'yicha
+      Max(updated_at) va Count(id); ular user indeksi bilan faqat o'z qatorlarini o'qiydi
+    ETag ga query string (?fields=, ?expand=, filtrlar) ham kiradi.
+    Brend yoki foydalanuvchi nomi o'zgarishi RELATED_VERSION hisoblagichi orqali hisobga olinadi.
+    Javob foydalanuvchiga bog'liq bo'lishi mumkin (masalan is_liked), shuning uchun ETag ga uning id si
+    va like versiyasi (kechiktirilgan like lar updated_at ni darhol o'zgartirmaydi) ham kiradi.
+    """
+    conditional_fields = ('updated_at',)
+    conditional_versions = None
+
+    def get_conditional_queryset(self):
+        return self.filter_queryset(self.get_queryset()).order_by()
+
+    def get_validators(self, request, *args, **kwargs):
+        cache = response_cache()
+        related = cache.get_version(RELATED_VERSION)
+        renderer = getattr(request, 'accepted_renderer', None)
+        fmt = getattr(renderer, 'format', '')
+        queryset = self.get_conditional_queryset()
+        user = ''
+        if request.user.is_authenticated:
+            user = f'{request.user.pk}.{cache.get_version(liked_version(request.user.pk))}'
+        query = urlencode(sorted(request.GET.lists()), doseq=True)
+
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        if lookup in kwargs:
+            values = queryset.filter(**{self.lookup_field: kwargs[lookup]}).values_list(*self.conditional_fields).first()
+            if values is None:
+                return None
+            last_modified = max((value for value in values if value), default=None)
+            parts = [str(kwargs[lookup])] + [str(_stamp(value)) for value in values] + [str(related), fmt, str(user)]
+            if query:
+                parts.append(_digest(query)[:12])
+            return quote_etag('-'.join(parts)), last_modified
+
+        if self.conditional_versions is not None:
+            versions = [cache.get_version(name) for name in self.conditional_versions]
+            return quote_etag(_digest(request.path, query, *versions, related, fmt, user)), None
+
+        aggregates = {f'max_{index}': Max(field) for index, field in enumerate(self.conditional_fields)}
+        result = queryset.aggregate(count=Count('id'), **aggregates)
+        stamps = [result[f'max_{index}'] for index in range(len(self.conditional_fields))]
+        last_modified = max((value for value in stamps if value), default=None)
+        etag = _digest(
+            request.path, query, result['count'], *[_stamp(value) for value in stamps], related, fmt, user,
+        )
+        return quote_etag(etag), last_modified
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators(request, *args, **kwargs)
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+        etag, last_modified = validators
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+        return set_validators(super().get(request, *args, **kwargs), etag, last_modified)
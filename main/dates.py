@@ -0,0 +1,39 @@
+"""?date_from= / ?date_to= (YYYY-MM-DD) parametrlari."""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def parse_day(value, error=ValueError):
+    """YYYY-MM-DD ni date ga aylantiradi; bo'sh qiymat -- None, noto'g'risi -- error."""
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value) if isinstance(value, str) else value
+    except ValueError:
+        # Formati to'g'ri, lekin bunday sana yo'q (2024-02-30, 2024-13-01).
+        parsed = None
+    if parsed is None:
+        raise error(f"Sana YYYY-MM-DD formatda bo'lishi kerak: {value}")
+    return parsed
+
+
+def start_of_day(day):
+    """Joriy vaqt zonasidagi kun boshi."""
+    value = datetime.combine(day, time.min)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+def filter_days(queryset, date_from=None, date_to=None, field='created_at', error=ValueError):
+    """
+    field ni [date_from kuni boshi, date_to dan keyingi kun boshi) oralig'ida filtrlaydi.
+    Ustunning o'zi solishtiriladi (field__date emas), shuning uchun indeks ishlatiladi.
+    """
+    day_from, day_to = parse_day(date_from, error), parse_day(date_to, error)
+    if day_from:
+        queryset = queryset.filter(**{f'{field}__gte': start_of_day(day_from)})
+    if day_to:
+        queryset = queryset.filter(**{f'{field}__lt': start_of_day(day_to + timedelta(days=1))})
+    return queryset
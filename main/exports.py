@@ -0,0 +1,94 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .dates import filter_days
+from .models import OrderProduct, Product
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+CHUNK_SIZE = 2000
+
+# (ustun nomi, ORM yo'li) -- nomlar JOIN orqali SQL da olinadi, Python da obyekt yaratilmaydi.
+ORDER_COLUMNS = [
+    ('id', 'id'),
+    ('created_at', 'created_at'),
+    ('status', 'status'),
+    ('quantity', 'quantity'),
+    ('total_price', 'total_price'),
+    ('product_id', 'product_id'),
+    ('product_name', 'product__name'),
+    ('brand_name', 'product__brand__name'),
+    ('buyer', 'user__username'),
+    ('seller', 'product__user__username'),
+]
+
+PRODUCT_COLUMNS = [
+    ('id', 'id'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+    ('name', 'name'),
+    ('brand_name', 'brand__name'),
+    ('seller', 'user__username'),
+    ('ram', 'ram'),
+    ('color', 'color'),
+    ('price', 'price'),
+    ('stock', 'stock'),
+    ('is_available', 'is_available'),
+    ('like_count', 'like_count'),
+]
+
+
+class ExportError(ValueError):
+    pass
+
+
+def order_export_queryset(user=None, date_from=None, date_to=None, status=None):
+    """user berilsa faqat uning xaridlari va uning mahsulotlariga tushgan buyurtmalar."""
+    queryset = OrderProduct.objects.all()
+    if user is not None:
+        queryset = queryset.filter(Q(user=user) | Q(product__user=user))
+    if status:
+        valid = {choice[0] for choice in OrderProduct.STATUS_CHOICES}
+        if status not in valid:
+            raise ExportError("Noto'g'ri status qiymati.")
+        queryset = queryset.filter(status=status)
+    queryset = filter_days(queryset, date_from, date_to, error=ExportError)
+    return queryset.order_by('id').values_list(*[path for _, path in ORDER_COLUMNS])
+
+
+def product_export_queryset(user=None, date_from=None, date_to=None):
+    queryset = Product.objects.all()
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    queryset = filter_days(queryset, date_from, date_to, error=ExportError)
+    return queryset.order_by('id').values_list(*[path for _, path in PRODUCT_COLUMNS])
+
+
+class Echo:
+    """csv.writer uchun: yozilgan qatorni bufer o'rniga qaytaradi."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, columns, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield writer.writerow(row)
+
+
+def iter_ndjson(rows, columns, chunk_size=CHUNK_SIZE):
+    names = [name for name, _ in columns]
+    encoder = DjangoJSONEncoder()
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+
+def stream_rows(rows, columns, export_format, chunk_size=CHUNK_SIZE):
+    if export_format == 'csv':
+        return iter_csv(rows, columns, chunk_size)
+    if export_format == 'ndjson':
+        return iter_ndjson(rows, columns, chunk_size)
+    raise ExportError(f"Format {', '.join(EXPORT_FORMATS)} dan biri bo'lishi kerak.")
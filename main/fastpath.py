@@ -0,0 +1,179 @@
+"""
+Ro'yxat viewlari uchun values() asosidagi tezkor serializatsiya.
+
+ModelSerializer har bir qator uchun model obyekti va har bir maydon uchun
+get_attribute/to_representation zanjirini quradi. Bu yerda serializer maydonlaridan
+bir marta reja tuziladi: qaysi values() ustunlari kerak va har bir ustun qaysi
+DRF maydonining to_representation i bilan o'giriladi. Natija serializer bilan
+bir xil (shu jumladan ?fields= / ?expand= tanlovi), lekin modellar yaratilmaydi.
+
+Reja faqat model ustunlari, annotatsiyalar, ichki serializerlar, PK ga yig'ilgan
+bog'lanishlar va `values_sources` da e'lon qilingan SerializerMethodField lar
+uchun quriladi; boshqa hollarda view oddiy serializer yo'liga qaytadi.
+"""
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import FileField
+from django.db.models.fields.files import FieldFile
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .fieldsets import SparseFieldsMixin
+from .instrumentation import measure_serialization
+
+
+class Unsupported(Exception):
+    pass
+
+
+def _plain(column, convert):
+    def get(row):
+        value = row[column]
+        return None if value is None else convert(value)
+    return get
+
+
+def _identity(column):
+    def get(row):
+        return row[column]
+    return get
+
+
+def _datetime(column, field):
+    """
+    DateTimeField.to_representation bilan bir xil, lekin joriy vaqt zonasi har qator
+    uchun emas, reja tuzilganda bir marta aniqlanadi.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or tz is None:
+        return _plain(column, field.to_representation)
+
+    def get(row):
+        value = row[column]
+        if not value:
+            return None
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return get
+
+
+def _file(column, field, model_field):
+    def get(row):
+        value = row[column]
+        return None if value is None else field.to_representation(FieldFile(None, model_field, value))
+    return get
+
+
+def _method(columns, field):
+    def get(row):
+        return field.to_representation(SimpleNamespace(**{name: row[column] for name, column in columns}))
+    return get
+
+
+def _nested(column, getters):
+    def get(row):
+        if row[column] is None:
+            return None
+        return {key: getter(row) for key, getter in getters}
+    return get
+
+
+def _compile(serializer, model, annotations, prefix, columns):
+    getters = []
+    sources = getattr(serializer, 'values_sources', {})
+    for key, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            if key not in sources:
+                raise Unsupported(key)
+            pairs = [(name, prefix + name) for name in sources[key]]
+            columns.update(column for _, column in pairs)
+            getters.append((key, _method(pairs, field)))
+            continue
+        if len(field.source_attrs) != 1:
+            raise Unsupported(key)
+        name = field.source_attrs[0]
+        column = prefix + name
+        if not prefix and name in annotations:
+            columns.add(column)
+            getters.append((key, _plain(column, field.to_representation)))
+            continue
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise Unsupported(key)
+        if not model_field.concrete:
+            raise Unsupported(key)
+        columns.add(column)
+
+        if isinstance(field, serializers.ListSerializer):
+            raise Unsupported(key)
+        if isinstance(field, serializers.BaseSerializer):
+            nested = _compile(field, model_field.related_model, (), f'{column}__', columns)
+            getters.append((key, _nested(column, nested)))
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                raise Unsupported(key)
+            # values() FK uchun id ni beradi, PKOnlyObject.pk bilan bir xil.
+            getters.append((key, _identity(column)))
+        elif isinstance(field, serializers.RelatedField) or model_field.is_relation:
+            raise Unsupported(key)
+        elif isinstance(model_field, FileField):
+            getters.append((key, _file(column, field, model_field)))
+        elif type(field) is serializers.DateTimeField:
+            getters.append((key, _datetime(column, field)))
+        else:
+            getters.append((key, _plain(column, field.to_representation)))
+    return getters
+
+
+class ValuesPlan:
+    def __init__(self, getters, columns):
+        self.getters = getters
+        self.columns = columns
+
+    def render(self, rows):
+        getters = self.getters
+        return [{key: getter(row) for key, getter in getters} for row in rows]
+
+
+def build_plan(serializer, queryset):
+    """Bog'langan serializer (child) uchun reja yoki qo'llab-quvvatlanmasa None."""
+    columns = set()
+    try:
+        getters = _compile(serializer, queryset.model, set(queryset.query.annotations), '', columns)
+    except Unsupported:
+        return None
+    return ValuesPlan(getters, columns)
+
+
+class FastListMixin(SparseFieldsMixin):
+    """
+    ListAPIView uchun: sahifa values() qatorlaridan to'g'ridan-to'g'ri dict larga
+    o'giriladi. Cursor pagination dict qatorlar bilan ham ishlaydi, tartib ustunlari
+    get_required_fields() orqali qo'shiladi. Javob ko'rinishi serializer yo'li bilan bir xil.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        plan = build_plan(getattr(serializer, 'child', serializer), queryset)
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = queryset.values(*(plan.columns | self.get_required_fields()))
+        page = self.paginate_queryset(rows)
+        if page is None:
+            rows = list(rows)
+            with measure_serialization():
+                data = plan.render(rows)
+            return Response(data)
+        with measure_serialization():
+            data = plan.render(page)
+        return self.get_paginated_response(data)
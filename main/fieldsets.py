@@ -0,0 +1,188 @@
+"""
+?fields= va ?expand= bo'yicha tor javoblar (sparse fieldsets).
+
+- fields=id,name,price -- faqat shu maydonlar; brand.name kabi nuqtali yo'l ichki
+  obyektdan maydon tanlaydi va uni avtomatik kengaytiradi;
+- expand=brand,product.user -- ichki obyektlar to'liq ko'rinishda.
+Parametrlardan biri berilsa, kengaytirilmagan bog'lanishlar faqat id sifatida qaytadi.
+Hech biri berilmasa javob avvalgidek to'liq.
+
+Tanlov serializer maydonlarini ham, querysetni ham belgilaydi: faqat kerakli
+ustunlar (only()) va faqat kerakli JOIN lar (select_related) o'qiladi.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+
+
+class FieldsetError(ValueError):
+    def __init__(self, param, message):
+        super().__init__(message)
+        self.param = param
+
+
+class Fieldset:
+    """Bitta serializer darajasidagi tanlov: fields (None -- hammasi) va kengaytirilgan bog'lanishlar."""
+
+    def __init__(self):
+        self.fields = None
+        self.expand = {}
+
+    def add(self, name):
+        if self.fields is None:
+            self.fields = []
+        if name not in self.fields:
+            self.fields.append(name)
+
+    def child(self, name):
+        return self.expand.setdefault(name, Fieldset())
+
+
+def _paths(value):
+    return [path.strip() for path in (value or '').split(',') if path.strip()]
+
+
+def parse_fieldset(fields=None, expand=None):
+    """So'rov parametrlaridan Fieldset daraxti; ikkalasi ham bo'sh bo'lsa None."""
+    fields, expand = _paths(fields), _paths(expand)
+    if not fields and not expand:
+        return None
+    root = Fieldset()
+    for path in expand:
+        node = root
+        for part in path.split('.'):
+            node = node.child(part)
+    for path in fields:
+        *parents, leaf = path.split('.')
+        node = root
+        for part in parents:
+            node.add(part)
+            node = node.child(part)
+        node.add(leaf)
+    return root
+
+
+def _nested(field):
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.BaseSerializer):
+        return field
+    return None
+
+
+def _collapsed(name, field):
+    kwargs = {'many': isinstance(field, serializers.ListSerializer)}
+    if field.source != name:
+        kwargs['source'] = field.source
+    return serializers.PrimaryKeyRelatedField(read_only=True, **kwargs)
+
+
+def apply_fieldset(serializer, fieldset, prefix=''):
+    """
+    serializer.fields ni joyida toraytiradi: tanlanmagan maydonlar olib tashlanadi,
+    kengaytirilmagan ichki serializerlar PrimaryKeyRelatedField ga almashtiriladi.
+    """
+    fields = serializer.fields
+    if fieldset.fields is not None:
+        unknown = [name for name in fieldset.fields if name not in fields]
+        if unknown:
+            raise FieldsetError('fields', f"Noma'lum maydon: {', '.join(prefix + name for name in unknown)}")
+    not_nested = [name for name in fieldset.expand if _nested(fields.get(name)) is None]
+    if not_nested:
+        raise FieldsetError('expand', f"Kengaytirib bo'lmaydi: {', '.join(prefix + name for name in not_nested)}")
+
+    for name in list(fields):
+        if fieldset.fields is not None and name not in fieldset.fields:
+            fields.pop(name)
+            continue
+        nested = _nested(fields[name])
+        if nested is None:
+            continue
+        if name in fieldset.expand:
+            apply_fieldset(nested, fieldset.expand[name], f'{prefix}{name}.')
+        else:
+            fields[name] = _collapsed(name, fields[name])
+    return serializer
+
+
+def _collect(serializer, model, prefix, columns, joins):
+    sources = getattr(serializer, 'values_sources', {})
+    for key, field in serializer.fields.items():
+        if key in sources:
+            # Metod maydoni o'qiydigan ustunlar serializerda e'lon qilingan (main/fastpath.py).
+            columns.update(prefix + name for name in sources[key])
+            continue
+        name = field.field_name if field.source == '*' else field.source_attrs[0]
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Xususiyat yoki metod: qaysi ustunlarni o'qishini bilmaymiz, model to'liq yuklanadi.
+            columns.update(prefix + f.name for f in model._meta.concrete_fields)
+            continue
+        if not model_field.concrete:
+            continue
+        columns.add(prefix + name)
+        nested = _nested(field)
+        if nested is not None and model_field.is_relation:
+            joins.append(prefix + name)
+            _collect(nested, model_field.related_model, f'{prefix}{name}__', columns, joins)
+
+
+def restrict_queryset(queryset, serializer, required=()):
+    """Toraytirilgan serializer uchun only() va faqat kerakli select_related."""
+    columns, joins = set(required), []
+    _collect(serializer, queryset.model, '', columns, joins)
+    queryset = queryset.select_related(None)
+    if joins:
+        # Argumentsiz select_related() barcha FK larni qo'shib yuborardi.
+        queryset = queryset.select_related(*joins)
+    return queryset.only(*columns)
+
+
+class SparseFieldsMixin:
+    """
+    Ro'yxat va detal viewlari uchun ?fields= / ?expand=. Tanlov get_serializer()
+    va filter_queryset() orqali qo'llanadi, shuning uchun get_queryset() ni
+    o'zgartirgan viewlarda ham ishlaydi.
+    """
+
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            params = self.request.query_params
+            self._fieldset = parse_fieldset(params.get('fields'), params.get('expand'))
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            try:
+                apply_fieldset(_nested(serializer), fieldset)
+            except FieldsetError as exc:
+                raise ValidationError({exc.param: [str(exc)]})
+        return serializer
+
+    def get_required_fields(self):
+        """Tanlovdan qat'i nazar o'qiladigan ustunlar: cursor pagination shu qiymatlardan quriladi."""
+        required = set()
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        required.update(name.lstrip('-') for name in ordering)
+        # Keyset cursor tartibni doim id bilan yakunlaydi (main/pagination.py).
+        required.add('id')
+        backends = [backend for backend in self.filter_backends if issubclass(backend, OrderingFilter)]
+        if backends:
+            if isinstance(getattr(self, 'ordering_fields', None), (list, tuple)):
+                required.update(self.ordering_fields)
+            # StableOrderingFilter ?ordering= ga qo'shadigan maydonlar ham cursor ga kiradi.
+            tiebreaker = getattr(self, 'ordering_tiebreaker', getattr(backends[0], 'default_tiebreaker', ()))
+            required.update(name.lstrip('-') for name in tiebreaker)
+        return {name for name in required if '__' not in name}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_fieldset() is None:
+            return queryset
+        return restrict_queryset(queryset, _nested(self.get_serializer()), self.get_required_fields())
@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+import django_filters
+from django.db.models import Case, Count, IntegerField, Value, When
+from rest_framework.filters import OrderingFilter
+
+from .models import Product
+
+PRICE_BUCKETS = [
+    Decimal('0'),
+    Decimal('100'),
+    Decimal('300'),
+    Decimal('500'),
+    Decimal('1000'),
+    Decimal('2000'),
+]
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    pass
+
+
+class ProductFilter(django_filters.FilterSet):
+    brand = NumberInFilter(field_name='brand_id', lookup_expr='in')
+    ram = CharInFilter(field_name='ram', lookup_expr='in')
+    color = CharInFilter(field_name='color', lookup_expr='in')
+    is_available = django_filters.BooleanFilter(field_name='is_available')
+    price_min = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    price_max = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+
+    class Meta:
+        model = Product
+        fields = ['brand', 'ram', 'color', 'is_available', 'price_min', 'price_max']
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    ?ordering= ga view.ordering_tiebreaker maydonlarini qo'shadi. Teng qiymatlar
+    (masalan bir xil like_count) aniq tartibda keladi; keyset cursor (main/pagination.py)
+    shu ustunlarning hammasini saqlaydi, shuning uchun sahifalar chegarasida takror
+    yoki tushib qolgan qatorlar bo'lmaydi.
+    """
+    default_tiebreaker = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or [])
+        fields = {field.lstrip('-') for field in ordering}
+        for field in getattr(view, 'ordering_tiebreaker', self.default_tiebreaker):
+            if field.lstrip('-') not in fields:
+                ordering.append(field)
+                fields.add(field.lstrip('-'))
+        return ordering
+
+
+def price_bucket_expression():
+    whens = [
+        When(price__lt=upper, then=Value(index))
+        for index, upper in enumerate(PRICE_BUCKETS[1:])
+    ]
+    return Case(*whens, default=Value(len(PRICE_BUCKETS) - 1), output_field=IntegerField())
+
+
+def facet_rows(queryset):
+    return (
+        queryset.order_by()
+        .annotate(price_bucket=price_bucket_expression())
+        .values('brand_id', 'brand__name', 'ram', 'color', 'price_bucket')
+        .annotate(count=Count('id'))
+    )
+
+
+def product_facets(queryset):
+    """
+    Brend, RAM, rang va narx oralig'i bo'yicha sonlarni bitta GROUP BY so'rovida hisoblaydi.
+    Har bir kombinatsiya bir marta qaytadi va Python tomonida yig'iladi.
+    """
+    return summarize_facets(facet_rows(queryset))
+
+
+def summarize_facets(rows):
+    brands, rams, colors, prices = {}, {}, {}, {}
+    for row in rows:
+        count = row['count']
+        if row['brand_id'] is not None:
+            brand = brands.setdefault(row['brand_id'], {'id': row['brand_id'], 'name': row['brand__name'], 'count': 0})
+            brand['count'] += count
+        if row['ram']:
+            rams[row['ram']] = rams.get(row['ram'], 0) + count
+        if row['color']:
+            colors[row['color']] = colors.get(row['color'], 0) + count
+        prices[row['price_bucket']] = prices.get(row['price_bucket'], 0) + count
+
+    price_facets = []
+    for index, lower in enumerate(PRICE_BUCKETS):
+        upper = PRICE_BUCKETS[index + 1] if index + 1 < len(PRICE_BUCKETS) else None
+        price_facets.append({
+            'min': str(lower),
+            'max': str(upper) if upper is not None else None,
+            'count': prices.get(index, 0),
+        })
+
+    return {
+        'brand': sorted(brands.values(), key=lambda item: (-item['count'], item['name'])),
+        'ram': [{'value': value, 'count': count} for value, count in sorted(rams.items(), key=lambda item: (-item[1], item[0]))],
+        'color': [{'value': value, 'count': count} for value, count in sorted(colors.items(), key=lambda item: (-item[1], item[0]))],
+        'price': price_facets,
+    }
@@ -0,0 +1,176 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# nom: eng katta tomon (px)
+VARIANT_SIZES = {
+    'thumb': 200,
+    'medium': 600,
+}
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'avif': ('AVIF', {'quality': 60}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def _supported_formats():
+    from PIL import features
+    formats = []
+    for ext, (pil_format, _) in VARIANT_FORMATS.items():
+        if pil_format == 'JPEG' or features.check(pil_format.lower()):
+            formats.append(ext)
+    return formats
+
+
+def render_variants(data):
+    """
+    Pillow bilan thumbnail va WebP/AVIF/JPEG variantlarini yaratadi.
+    Django ga va fayl tizimiga bog'liq emas (baytlar kiradi, baytlar chiqadi), shuning uchun
+    alohida jarayonda ishlaydi. Natija: {o'lcham: {format: bayt}}.
+    """
+    from PIL import Image, ImageOps
+
+    formats = _supported_formats()
+    result = {}
+    with Image.open(io.BytesIO(data)) as original:
+        original = ImageOps.exif_transpose(original)
+        has_alpha = original.mode in ('RGBA', 'LA') or 'transparency' in original.info
+        for size_name, size in VARIANT_SIZES.items():
+            image = original.copy()
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            result[size_name] = {}
+            for ext in formats:
+                pil_format, options = VARIANT_FORMATS[ext]
+                frame = image
+                if pil_format == 'JPEG' or not has_alpha:
+                    frame = image.convert('RGB')
+                output = io.BytesIO()
+                frame.save(output, pil_format, **options)
+                result[size_name][ext] = output.getvalue()
+    return result
+
+
+def variant_job(name):
+    """Storage dagi fayldan render_variants argumentlarini tayyorlaydi (S3 kabi storage larda ham)."""
+    with default_storage.open(name, 'rb') as source:
+        return (source.read(),)
+
+
+def variant_name(name, size_name, ext):
+    """
+    Variant nomi asl faylning to'liq nomidan olinadi: photo.jpg va photo.png, yoki
+    turli papkalardagi bir xil nomlar bir-birining variantini ustidan yozmaydi.
+    """
+    directory, filename = os.path.split(name)
+    return f'{directory}/variants/{filename}/{size_name}.{ext}' if directory else f'variants/{filename}/{size_name}.{ext}'
+
+
+def store_variants(name, files):
+    """render_variants natijasini storage ga yozadi va modelda saqlanadigan ko'rinishni qaytaradi."""
+    variants = {'source': name}
+    for size_name, formats in files.items():
+        variants[size_name] = {}
+        for ext, data in formats.items():
+            target = variant_name(name, size_name, ext)
+            # Qayta yaratishda (--force) eski fayl almashtiriladi, yonida nusxa qolmaydi.
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            variants[size_name][ext] = default_storage.save(target, ContentFile(data))
+    return variants
+
+
+def delete_variants(variants):
+    for size_name, formats in variants.items():
+        if size_name != 'source':
+            for saved in formats.values():
+                default_storage.delete(saved)
+
+
+def needs_variants(field_file, variants):
+    return bool(field_file) and (variants or {}).get('source') != field_file.name
+
+
+def variant_urls(variants, request=None):
+    urls = {}
+    for size_name, formats in (variants or {}).items():
+        if size_name == 'source':
+            continue
+        urls[size_name] = {}
+        for ext, name in formats.items():
+            url = default_storage.url(name)
+            urls[size_name][ext] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    So'rov workerini bloklamaslik uchun umumiy ProcessPoolExecutor.
+    STORE_IMAGE_VARIANTS['WORKERS'] = 0 bo'lsa None (sinxron rejim).
+    """
+    global _executor
+    workers = getattr(settings, 'STORE_IMAGE_VARIANTS', {}).get('WORKERS', 2)
+    if not workers:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=workers)
+    return _executor
+
+
+def save_variants(model, pk, field_name, variants_field, name, files, on_saved=None):
+    """Natijani faqat rasm shu orada almashtirilmagan bo'lsa yozadi, aks holda fayllar o'chiriladi."""
+    variants = store_variants(name, files)
+    updated = model.objects.filter(pk=pk, **{field_name: name}).update(**{variants_field: variants})
+    if not updated:
+        delete_variants(variants)
+    elif on_saved is not None:
+        on_saved()
+    return bool(updated)
+
+
+def _rendered(future, model, pk, field_name, variants_field, name, on_saved):
+    try:
+        files = future.result()
+    except Exception:
+        logger.exception("Rasm variantlarini yaratib bo'lmadi: %s", name)
+        return
+    try:
+        save_variants(model, pk, field_name, variants_field, name, files, on_saved)
+    except Exception:
+        logger.exception("Rasm variantlarini saqlab bo'lmadi: %s", name)
+    finally:
+        # Callback executor oqimida ishlaydi, uning ulanishini ochiq qoldirmaymiz.
+        connections.close_all()
+
+
+def schedule_variants(instance, field_name, variants_field, on_saved=None):
+    """Tranzaksiya yakunlangach variantlarni fon jarayonida yaratadi va natijani saqlaydi."""
+    model = type(instance)
+    pk = instance.pk
+    name = getattr(instance, field_name).name
+
+    def submit():
+        executor = get_executor()
+        if executor is None:
+            save_variants(model, pk, field_name, variants_field, name, render_variants(*variant_job(name)), on_saved)
+            return
+        future = executor.submit(render_variants, *variant_job(name))
+        future.add_done_callback(
+            lambda done: _rendered(done, model, pk, field_name, variants_field, name, on_saved)
+        )
+
+    transaction.on_commit(submit)
@@ -0,0 +1,262 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_QUERY_MS': 100,
+    'WINDOW': 1024,
+    'LOG_LEVEL': 'INFO',
+}
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def metrics_setting(name):
+    return getattr(settings, 'STORE_METRICS', {}).get(name, DEFAULTS[name])
+
+
+def log_level():
+    return logging.getLevelName(metrics_setting('LOG_LEVEL'))
+
+
+# Joriy so'rov o'lchovlari; so'rovdan tashqarida None.
+_current = contextvars.ContextVar('store_request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializer_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+
+@contextmanager
+def measure_serialization():
+    """
+    Ichidagi vaqt Server-Timing dagi `serialize` ga qo'shiladi. Ichma-ich chaqiruvlar
+    (ichki serializerlar) faqat eng tashqisida hisoblanadi.
+    """
+    metrics = _current.get()
+    if metrics is None or metrics.serializer_depth:
+        yield
+        return
+    metrics.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - started
+        metrics.serializer_depth -= 1
+
+
+class TimedSerializerMixin:
+    """
+    Javob serializerlari uchun: to_representation vaqti o'lchanadi. many=True da har bir
+    qator child orqali o'tadi, shuning uchun queryset ni o'qish (SQL) serializatsiyaga kirmaydi.
+    """
+
+    def to_representation(self, instance):
+        with measure_serialization():
+            return super().to_representation(instance)
+
+
+class ViewStats:
+    """Bitta URL nomi uchun: oxirgi WINDOW ta davomiylik va umumiy yig'indilar."""
+
+    def __init__(self, window):
+        self.durations = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.db_total = 0.0
+        self.queries = 0
+
+    def add(self, duration, db_time, queries):
+        self.durations.append(duration)
+        self.count += 1
+        self.total += duration
+        self.db_total += db_time
+        self.queries += queries
+
+    def quantiles(self):
+        ordered = sorted(self.durations)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class MetricsRegistry:
+    """Jarayon ichidagi statistika; har bir worker o'z /metrics/ javobini beradi."""
+
+    def __init__(self):
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view_name, duration, db_time, queries):
+        with self._lock:
+            stats = self._views.get(view_name)
+            if stats is None:
+                stats = self._views[view_name] = ViewStats(metrics_setting('WINDOW'))
+            stats.add(duration, db_time, queries)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: (stats.quantiles(), stats.count, stats.total, stats.db_total, stats.queries)
+                for name, stats in self._views.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus():
+    """Prometheus text formati (0.0.4)."""
+    snapshot = sorted(registry.snapshot().items())
+    lines = [
+        '# HELP store_request_duration_seconds Request duration by URL name.',
+        '# TYPE store_request_duration_seconds summary',
+    ]
+    for name, (quantiles, count, total, _, _) in snapshot:
+        view = _label(name)
+        for quantile, value in quantiles.items():
+            lines.append(f'store_request_duration_seconds{{view="{view}",quantile="{quantile}"}} {value:.6f}')
+        lines.append(f'store_request_duration_seconds_sum{{view="{view}"}} {total:.6f}')
+        lines.append(f'store_request_duration_seconds_count{{view="{view}"}} {count}')
+    lines += [
+        '# HELP store_request_db_seconds_total Time spent in SQL by URL name.',
+        '# TYPE store_request_db_seconds_total counter',
+    ]
+    for name, (_, _, _, db_total, _) in snapshot:
+        lines.append(f'store_request_db_seconds_total{{view="{_label(name)}"}} {db_total:.6f}')
+    lines += [
+        '# HELP store_request_queries_total SQL queries by URL name.',
+        '# TYPE store_request_queries_total counter',
+    ]
+    for name, (_, _, _, _, queries) in snapshot:
+        lines.append(f'store_request_queries_total{{view="{_label(name)}"}} {queries}')
+    return '\n'.join(lines) + '\n'
+
+
+class QueryRecorder:
+    """connection.execute_wrapper uchun: sonini, vaqtini hisoblaydi va sekin so'rovlarni yozadi."""
+
+    def __init__(self, metrics, alias, path):
+        self.metrics = metrics
+        self.alias = alias
+        self.path = path
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.queries += 1
+            self.metrics.db_time += elapsed
+            if elapsed * 1000 >= metrics_setting('SLOW_QUERY_MS'):
+                logger.log(log_level(), 'slow_query %s', json.dumps({
+                    'path': self.path,
+                    'database': self.alias,
+                    'duration_ms': round(elapsed * 1000, 2),
+                    'sql': sql[:1000],
+                }))
+
+
+class RequestMetricsMiddleware:
+    """
+    Har bir so'rov uchun SQL soni, DB vaqti, serializer vaqti va umumiy vaqtni o'lchaydi.
+    Natija Server-Timing sarlavhasiga yoziladi, sekin so'rovlar JSON ko'rinishida logga
+    (LOG_LEVEL darajasida) tushadi, URL nomi bo'yicha statistika esa /metrics/ uchun yig'iladi.
+    Sinxron va async zanjirda ham ishlaydi: ASGI da async viewlar oqimga o'tkazilmaydi.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics, token, started = self.start()
+        try:
+            with self.recording(metrics, request):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics, token, started = self.start()
+        try:
+            # Ulanishlar oqimga bog'liq: async ORM so'rovlari thread_sensitive oqimda bajariladi,
+            # shuning uchun wrapperlar ham o'sha oqimdagi ulanishlarga o'rnatiladi.
+            recording = await sync_to_async(self.recording)(metrics, request)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(recording.close)()
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    def start(self):
+        metrics = RequestMetrics()
+        return metrics, _current.set(metrics), time.perf_counter()
+
+    def recording(self, metrics, request):
+        stack = ExitStack()
+        for alias in connections:
+            recorder = QueryRecorder(metrics, alias, request.path)
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        return stack
+
+    def finish(self, request, response, metrics, started):
+        total = time.perf_counter() - started
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+            f'serialize;dur={metrics.serializer_time * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else None) or 'unmatched'
+        registry.observe(view_name, total, metrics.db_time, metrics.queries)
+
+        if total * 1000 >= metrics_setting('SLOW_REQUEST_MS'):
+            logger.log(log_level(), 'slow_request %s', json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': view_name,
+                'status': response.status_code,
+                'duration_ms': round(total * 1000, 2),
+                'db_ms': round(metrics.db_time * 1000, 2),
+                'serializer_ms': round(metrics.serializer_time * 1000, 2),
+                'queries': metrics.queries,
+            }))
+        return response
@@ -0,0 +1,188 @@
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 5,
+    'BACKOFF_MAX': 3600,
+    'LOCK_TIMEOUT': 600,
+    'KEEP_DONE_DAYS': 7,
+}
+
+
+def job_setting(name):
+    return getattr(settings, 'STORE_JOBS', {}).get(name, DEFAULTS[name])
+
+
+def task_path(task):
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def enqueue(task, *args, run_at=None, max_attempts=None, **kwargs):
+    """
+    Vazifani navbatga qo'yadi. task -- funksiya yoki uning to'liq import yo'li.
+    Argumentlar JSON ga aylanadigan bo'lishi kerak. Joriy tranzaksiya ichida
+    chaqirilsa, vazifa faqat tranzaksiya commit bo'lganda ko'rinadi.
+    """
+    return Job.objects.create(
+        task=task_path(task),
+        args=list(args),
+        kwargs=kwargs,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or job_setting('MAX_ATTEMPTS'),
+    )
+
+
+def backoff_delay(attempts):
+    delay = min(job_setting('BACKOFF_MAX'), job_setting('BACKOFF_BASE') * 2 ** max(attempts - 1, 0))
+    return timedelta(seconds=delay * random.uniform(1.0, 1.1))
+
+
+def claim_jobs(worker_id, limit=1):
+    """
+    Tayyor vazifalarni shu worker uchun band qiladi.
+    PostgreSQL da SELECT ... FOR UPDATE SKIP LOCKED, SQLite da esa shartli
+    UPDATE ... WHERE status = 'queued' ishlatiladi: ikkala holatda ham bitta
+    vazifani ikki worker ololmaydi.
+    """
+    now = timezone.now()
+    ready = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+    claim = {'status': Job.RUNNING, 'locked_at': now, 'locked_by': worker_id, 'attempts': F('attempts') + 1}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(ready.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Job.objects.filter(id__in=ids).update(**claim)
+    else:
+        ids = []
+        for job_id in ready.values_list('id', flat=True)[:limit * 4]:
+            if Job.objects.filter(id=job_id, status=Job.QUEUED).update(**claim):
+                ids.append(job_id)
+                if len(ids) >= limit:
+                    break
+
+    return list(Job.objects.filter(id__in=ids).order_by('run_at', 'id'))
+
+
+def run_job(job, worker_id):
+    """Vazifani bajaradi; xato bo'lsa backoff bilan qayta navbatga qo'yadi yoki failed qiladi."""
+    mine = Job.objects.filter(id=job.id, locked_by=worker_id, status=Job.RUNNING)
+    try:
+        func = import_string(job.task)
+        func(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            logger.error("Job #%s %s failed after %s attempts", job.id, job.task, job.attempts)
+            mine.update(status=Job.FAILED, finished_at=now, last_error=error, locked_by='')
+        else:
+            logger.warning("Job #%s %s failed, retrying (attempt %s)", job.id, job.task, job.attempts)
+            mine.update(status=Job.QUEUED, run_at=now + backoff_delay(job.attempts), last_error=error, locked_by='')
+        return False
+    mine.update(status=Job.DONE, finished_at=timezone.now(), locked_by='')
+    return True
+
+
+def requeue_stale_jobs():
+    """Worker o'lib qolganda RUNNING holatda qolib ketgan vazifalarni qaytaradi."""
+    now = timezone.now()
+    return Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=now - timedelta(seconds=job_setting('LOCK_TIMEOUT')),
+    ).update(status=Job.QUEUED, locked_by='', run_at=now)
+
+
+def purge_finished_jobs():
+    cutoff = timezone.now() - timedelta(days=job_setting('KEEP_DONE_DAYS'))
+    return Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()[0]
+
+
+def run_pending(worker_id='inline', limit=100):
+    """Hozir tayyor vazifalarni joriy oqimda bajaradi (testlar va cron uchun)."""
+    processed = 0
+    while processed < limit:
+        jobs = claim_jobs(worker_id, limit=1)
+        if not jobs:
+            break
+        run_job(jobs[0], worker_id)
+        processed += 1
+    return processed
+
+
+class Worker:
+    """
+    `concurrency` ta oqimda navbatni o'qiydi. Har bir oqim o'z DB ulanishiga ega.
+    stop() chaqirilgach joriy vazifalar tugashini kutib to'xtaydi.
+    """
+
+    def __init__(self, concurrency=1, poll_interval=1.0, maintenance_interval=60.0, burst=False):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.maintenance_interval = maintenance_interval
+        self.burst = burst
+        self.stop_event = threading.Event()
+        self.prefix = f'{socket.gethostname()}:{os.getpid()}'
+
+    def stop(self):
+        self.stop_event.set()
+
+    def loop(self, index):
+        worker_id = f'{self.prefix}:{index}'
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                try:
+                    jobs = claim_jobs(worker_id, limit=1)
+                except Exception:
+                    logger.exception("Navbatdan vazifa olib bo'lmadi")
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                if not jobs:
+                    if self.burst:
+                        return
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                run_job(jobs[0], worker_id)
+        finally:
+            connection.close()
+
+    def maintain(self):
+        requeue_stale_jobs()
+        purge_finished_jobs()
+        close_old_connections()
+
+    def run(self):
+        self.maintain()
+        threads = [
+            threading.Thread(target=self.loop, args=(index,), name=f'job-worker-{index}', daemon=True)
+            for index in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        last_maintenance = time.monotonic()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+            if time.monotonic() - last_maintenance >= self.maintenance_interval:
+                self.maintain()
+                last_maintenance = time.monotonic()
+        connection.close()
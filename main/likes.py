@@ -0,0 +1,381 @@
+import atexit
+import logging
+import operator
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from functools import reduce
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import bump_liked, bump_product, bump_related
+from .models import Product, Like, User
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'FLUSH_INTERVAL': 1.0,
+    'BATCH_SIZE': 1000,
+    'MAX_PENDING': 50000,
+    'MAX_FAILURES': 3,
+    'CACHE_ALIAS': 'default',
+}
+# close() fon oqimining joriy partiyasini shuncha soniya kutadi.
+SHUTDOWN_TIMEOUT = 10
+# Foydalanuvchi holati qulfi: jarayon qulab qolsa LOCK_TIMEOUT dan keyin bo'shaydi,
+# olishga LOCK_WAIT soniya urinib ko'riladi.
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 5
+LOCK_POLL = 0.01
+
+
+def like_buffer_setting(name):
+    return getattr(settings, 'STORE_LIKE_BUFFER', {}).get(name, DEFAULTS[name])
+
+
+def like_count_subquery():
+    """Mahsulotning Like jadvalidagi haqiqiy soni: UPDATE ... SET like_count = (SELECT COUNT(*) ...)."""
+    counts = (
+        Like.objects.filter(product=OuterRef('pk'))
+        .order_by()
+        .values('product')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def rebuild_like_counts(batch_size=10000):
+    """
+    Product.like_count ni Like jadvalidan id oraliqlari bo'yicha qayta hisoblaydi.
+    Har bir oraliq bitta UPDATE ... SET like_count = (SELECT COUNT(*) ...) so'rovi.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        ids = list(Product.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            updated += Product.objects.filter(id__gte=ids[0], id__lte=ids[-1]).update(
+                like_count=like_count_subquery()
+            )
+        last_id = ids[-1]
+    bump_related()
+    return updated
+
+
+class LikedIds:
+    """
+    Bitta so'rov davomida foydalanuvchi qaysi mahsulotlarni yoqtirgani.
+    prime() sahifadagi id lar uchun bitta `product_id IN (...)` so'rovini bajaradi;
+    oldindan so'ralmagan id uchun foydalanuvchining barcha like lari bir marta o'qiladi.
+    Javob foydalanuvchining o'z yozuviga bog'liq, shuning uchun replika emas, asosiy baza o'qiladi.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        buffer = like_buffer()
+        # Hali bazaga yozilmagan bosishlar bazadagi holatdan ustun.
+        self.known = buffer.state(user_id) if buffer is not None else {}
+        self.everything = None
+
+    def queryset(self):
+        return Like.objects.db_manager(DEFAULT_DB_ALIAS).filter(user_id=self.user_id)
+
+    def prime(self, items):
+        ids = {item['id'] if isinstance(item, dict) else item.pk for item in items}
+        missing = [pk for pk in ids if pk not in self.known]
+        if not missing or self.everything is not None:
+            return
+        liked = set(self.queryset().filter(product_id__in=missing).values_list('product_id', flat=True))
+        self.known.update((pk, pk in liked) for pk in missing)
+
+    def __contains__(self, product_id):
+        if product_id in self.known:
+            return self.known[product_id]
+        if self.everything is None:
+            self.everything = set(self.queryset().values_list('product_id', flat=True))
+        return product_id in self.everything
+
+    def status(self, product_ids):
+        self.prime({'id': pk} for pk in product_ids)
+        return {str(pk): pk in self for pk in product_ids}
+
+
+def apply_likes(changes):
+    """
+    {(user_id, product_id): liked} holatlarini bazaga yozadi: yangi like lar bitta bulk_create,
+    olib tashlanganlari bitta DELETE. Allaqachon shu holatdagi juftliklar, o'chirilgan mahsulot
+    va foydalanuvchilar o'tkazib yuboriladi. O'zgargan mahsulotlarning like_count i Like
+    jadvalidan qayta sanaladi: bir xil juftlikni parallel yozayotgan ikki jarayon hisoblagichni
+    ikki marta oshirmaydi.
+    """
+    if not changes:
+        return
+    users = {user_id for user_id, _ in changes}
+    products = {product_id for _, product_id in changes}
+    with transaction.atomic():
+        existing = set(
+            Like.objects.filter(user_id__in=users, product_id__in=products).values_list('user_id', 'product_id')
+        )
+        alive_users = set(User.objects.filter(id__in=users).values_list('id', flat=True))
+        alive_products = set(Product.objects.filter(id__in=products).values_list('id', flat=True))
+        created = [
+            key for key, liked in changes.items()
+            if liked and key not in existing and key[0] in alive_users and key[1] in alive_products
+        ]
+        removed = [key for key, liked in changes.items() if not liked and key in existing]
+
+        if created:
+            Like.objects.bulk_create(
+                [Like(user_id=user_id, product_id=product_id) for user_id, product_id in created],
+                ignore_conflicts=True,
+            )
+        if removed:
+            by_user = defaultdict(list)
+            for user_id, product_id in removed:
+                by_user[user_id].append(product_id)
+            Like.objects.filter(reduce(operator.or_, (
+                Q(user_id=user_id, product_id__in=product_ids) for user_id, product_ids in by_user.items()
+            ))).delete()
+
+        touched = sorted({product_id for _, product_id in created + removed})
+        if touched:
+            Product.objects.filter(id__in=touched).update(like_count=like_count_subquery(), updated_at=timezone.now())
+            transaction.on_commit(lambda: [bump_product(product_id) for product_id in touched])
+
+
+class LikeBuffer:
+    """
+    Like holatlari uchun write-behind bufer (STORE_LIKE_BUFFER).
+    set() aniq holatni (yoqtirildi / olib tashlandi) umumiy keshga (CACHE_ALIAS) foydalanuvchi
+    bo'yicha yozib darhol qaytadi, fon oqimi esa har FLUSH_INTERVAL soniyada shu jarayonda
+    bosgan foydalanuvchilarning holatlarini apply_likes() bilan partiyalab yozadi.
+    Kutilayotgan holatlar barcha workerlarga ko'rinadi: is_liked ularni o'qiydi, flush(user_id)
+    esa istalgan workerdan yozadi, shuning uchun o'z yozuvini ko'rish workerlar orasida ham saqlanadi.
+    Bufer almashtirishni (toggle) emas, natijaviy holatni saqlaydi; bitta foydalanuvchining holati
+    kesh qulfi (cache.add) ostida o'zgartiriladi va yoziladi, shuning uchun parallel bosishlar
+    yo'qolmaydi va oxirgi bosish qoladi.
+
+    Sinxron yo'lga qaytish: shu jarayonda MAX_PENDING dan ko'p holat yig'ilsa, fon oqimi to'xtab
+    qolsa yoki ketma-ket MAX_FAILURES marta yozib bo'lmasa holat so'rov ichida yoziladi (avval
+    shu foydalanuvchining kutilayotganlari).
+    Jarayon odatdagidek tugaganda (atexit, jumladan SIGTERM dan keyingi sys.exit) qolgani yoziladi.
+    Jarayon SIGKILL, OOM yoki qulash bilan o'lsa holatlar keshda qoladi va foydalanuvchining
+    keyingi bosishi, /likes/ yoki almashtirish so'rovida yoziladi.
+    """
+    prefix = 'like-buffer'
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or like_buffer_setting('CACHE_ALIAS')]
+        self.lock = threading.Lock()
+        # Shu jarayon fon oqimi yozishi kerak bo'lgan foydalanuvchilar.
+        self.dirty = set()
+        self.size = 0
+        self.failures = 0
+        self.thread = None
+        self.stop_event = threading.Event()
+        # FLUSH_INTERVAL = None bo'lsa ham (fon oqimisiz) qolgani chiqishda yoziladi.
+        atexit.register(self.close)
+
+    def key(self, kind, user_id):
+        return f'{self.prefix}:{kind}:{user_id}'
+
+    @contextmanager
+    def locked(self, user_id):
+        """Foydalanuvchi holatining umumiy qulfi; LOCK_WAIT soniyada olinmasa False beradi."""
+        key = self.key('lock', user_id)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + LOCK_WAIT
+        acquired = self.cache.add(key, token, LOCK_TIMEOUT)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL)
+            acquired = self.cache.add(key, token, LOCK_TIMEOUT)
+        if not acquired:
+            logger.warning("Like bufer qulfi olinmadi: foydalanuvchi %s", user_id)
+        try:
+            yield acquired
+        finally:
+            if acquired and self.cache.get(key) == token:
+                self.cache.delete(key)
+
+    def state(self, user_id):
+        """Foydalanuvchining hali bazaga yozilmagan holatlari: {product_id: liked}."""
+        return dict(self.cache.get(self.key('state', user_id)) or {})
+
+    def accepting(self):
+        if self.stop_event.is_set() or self.failures >= like_buffer_setting('MAX_FAILURES'):
+            return False
+        return self.thread is None or self.thread.is_alive()
+
+    def set(self, user_id, product_id, liked):
+        """Holatni qo'llaydi (True -- yoqtirilgan) va uni qaytaradi."""
+        key = self.key('state', user_id)
+        with self.locked(user_id) as acquired:
+            state = self.state(user_id) if acquired else {}
+            with self.lock:
+                buffered = acquired and self.accepting() and (
+                    product_id in state or self.size < like_buffer_setting('MAX_PENDING')
+                )
+                if buffered:
+                    self.size += product_id not in state
+                    self.dirty.add(user_id)
+            state[product_id] = liked
+            if buffered:
+                self.cache.set(key, state, None)
+            else:
+                # Tartib saqlanishi uchun shu foydalanuvchining kutilayotgan holatlari ham birga yoziladi.
+                apply_likes({(user_id, item): value for item, value in state.items()})
+                if acquired:
+                    self.cache.delete(key)
+                self.failures = 0
+
+        if buffered:
+            bump_liked(user_id)
+            self.start()
+        return liked
+
+    def flush(self, user_id=None):
+        """
+        Kutilayotgan holatlarni yozadi: user_id berilsa shu foydalanuvchinikini (qaysi workerda
+        bosilganidan qat'i nazar), aks holda shu jarayonda bosgan foydalanuvchilarnikini.
+        Qulflar id tartibida olinadi, shuning uchun parallel flushlar bir-birini kutib qolmaydi.
+        """
+        if user_id is not None:
+            user_ids = [user_id]
+        else:
+            with self.lock:
+                user_ids, self.dirty, self.size = sorted(self.dirty), set(), 0
+
+        batch_size = like_buffer_setting('BATCH_SIZE')
+        written = 0
+        while user_ids:
+            with ExitStack() as stack:
+                changes, users = {}, []
+                while user_ids and len(changes) < batch_size:
+                    item_user = user_ids.pop(0)
+                    if not stack.enter_context(self.locked(item_user)):
+                        continue
+                    state = self.state(item_user)
+                    if state:
+                        users.append(item_user)
+                        changes.update(((item_user, product_id), liked) for product_id, liked in state.items())
+                if not changes:
+                    continue
+                try:
+                    apply_likes(changes)
+                except Exception:
+                    with self.lock:
+                        self.failures += 1
+                        # Holatlar keshda qoladi; keyingi urinishda qayta yoziladi.
+                        self.dirty.update(users, user_ids)
+                    raise
+                self.cache.delete_many([self.key('state', item_user) for item_user in users])
+                self.failures = 0
+                written += len(changes)
+        return written
+
+    def start(self):
+        interval = like_buffer_setting('FLUSH_INTERVAL')
+        if interval is None or self.thread is not None:
+            return
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, args=(interval,), name='like-buffer', daemon=True)
+                self.thread.start()
+
+    def run(self, interval):
+        try:
+            while not self.stop_event.wait(interval):
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("Like buferini bazaga yozib bo'lmadi")
+                finally:
+                    close_old_connections()
+        finally:
+            connection.close()
+
+    def close(self):
+        """Yangi holatlar qabul qilinmaydi, fon oqimi tugashi kutiladi va qolgani sinxron yoziladi."""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(SHUTDOWN_TIMEOUT)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Like buferining qolgan yozuvlari keshda qoldi")
+
+    def clear(self):
+        """Shu jarayon yozgan kutilayotgan holatlarni tashlab yuboradi (testlar uchun)."""
+        with self.lock:
+            self.cache.delete_many([self.key('state', user_id) for user_id in self.dirty])
+            self.dirty, self.size, self.failures = set(), 0, 0
+            self.stop_event.clear()
+
+
+_like_buffer = None
+_like_buffer_lock = threading.Lock()
+
+
+def like_buffer():
+    """STORE_LIKE_BUFFER['ENABLED'] bo'lsa jarayon uchun yagona LikeBuffer, aks holda None."""
+    global _like_buffer
+    if not like_buffer_setting('ENABLED'):
+        return None
+    if _like_buffer is None:
+        with _like_buffer_lock:
+            if _like_buffer is None:
+                _like_buffer = LikeBuffer()
+    return _like_buffer
+
+
+def flush_user_likes(user_id):
+    """Foydalanuvchi o'z like ro'yxatini o'qishidan oldin uning kutilayotgan bosishlari (istalgan workerdagi) yoziladi."""
+    buffer = like_buffer()
+    if buffer is not None:
+        buffer.flush(user_id)
+
+
+class LikedFlagMixin:
+    """
+    Autentifikatsiyadan o'tgan foydalanuvchi uchun mahsulot javoblariga is_liked qo'shadi.
+    Sahifa (yoki detal obyekti) bitta so'rov bilan oldindan tekshiriladi; anonim javoblar o'zgarmaydi.
+    """
+
+    @property
+    def liked_ids(self):
+        if not hasattr(self, '_liked_ids'):
+            user = self.request.user
+            self._liked_ids = LikedIds(user.pk) if user.is_authenticated else None
+        return self._liked_ids
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.liked_ids is not None:
+            context['liked_ids'] = self.liked_ids
+        return context
+
+    def prime_liked(self, items):
+        if self.liked_ids is not None:
+            self.liked_ids.prime(items)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            self.prime_liked(page)
+        return page
+
+    def get_object(self):
+        obj = super().get_object()
+        self.prime_liked([obj])
+        return obj
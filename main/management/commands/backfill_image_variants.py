@@ -0,0 +1,52 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from main.cache import bump_product, bump_related
+from main.images import needs_variants, render_variants, save_variants, variant_job
+from main.models import Brand, ProductImage
+
+
+class Command(BaseCommand):
+    help = "Mavjud mahsulot rasmlari va brend logolari uchun thumbnail/WebP variantlarini yaratadi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--force', action='store_true', help="Variantlari bor rasmlarni ham qayta yaratish.")
+
+    def handle(self, *args, **options):
+        targets = [
+            (ProductImage.objects.exclude(image=''), 'image', 'variants'),
+            (Brand.objects.exclude(logo='').exclude(logo__isnull=True), 'logo', 'logo_variants'),
+        ]
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            for queryset, field_name, variants_field in targets:
+                done = failed = 0
+                last_id = 0
+                while True:
+                    rows = list(queryset.filter(id__gt=last_id).order_by('id')[:options['batch_size']])
+                    if not rows:
+                        break
+                    last_id = rows[-1].id
+                    futures = {}
+                    for row in rows:
+                        field_file = getattr(row, field_name)
+                        if options['force'] or needs_variants(field_file, getattr(row, variants_field)):
+                            futures[executor.submit(render_variants, *variant_job(field_file.name))] = row
+                    for future in as_completed(futures):
+                        row = futures[future]
+                        name = getattr(row, field_name).name
+                        try:
+                            files = future.result()
+                        except Exception as exc:
+                            failed += 1
+                            self.stderr.write(f"{name}: {exc}")
+                            continue
+                        if save_variants(type(row), row.pk, field_name, variants_field, name, files):
+                            done += 1
+                            if isinstance(row, ProductImage):
+                                bump_product(row.product_id)
+                self.stdout.write(f"{queryset.model.__name__}: {done} ta tayyor, {failed} ta xato.")
+        bump_related()
+        self.stdout.write(self.style.SUCCESS("Tayyor."))
@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.exports import (
+    EXPORT_FORMATS, ExportError, ORDER_COLUMNS, PRODUCT_COLUMNS,
+    order_export_queryset, product_export_queryset, stream_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Buyurtmalar yoki mahsulotlarni CSV/NDJSON ko'rinishida oqim bilan eksport qiladi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['orders', 'products'])
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--output', default='-', help="Fayl yo'li, '-' bo'lsa stdout.")
+        parser.add_argument('--date-from', default=None)
+        parser.add_argument('--date-to', default=None)
+        parser.add_argument('--status', default=None, help="Faqat buyurtmalar uchun.")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            if options['kind'] == 'orders':
+                rows = order_export_queryset(
+                    date_from=options['date_from'], date_to=options['date_to'], status=options['status'],
+                )
+                columns = ORDER_COLUMNS
+            else:
+                rows = product_export_queryset(date_from=options['date_from'], date_to=options['date_to'])
+                columns = PRODUCT_COLUMNS
+            stream = stream_rows(rows, columns, options['format'], options['chunk_size'])
+        except ExportError as exc:
+            raise CommandError(str(exc))
+
+        output = sys.stdout if options['output'] == '-' else open(options['output'], 'w', newline='', encoding='utf-8')
+        try:
+            for chunk in stream:
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,196 @@
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework import serializers
+
+from main.cache import bump_catalog
+from main.models import Brand, ImportCheckpoint, Product, User
+from main.search import index_products
+from main.serializer import ProductSerializer
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'ha'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', "yo'q"}
+
+
+class RowError(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mahsulotlarni CSV yoki NDJSON fayldan oqim bilan import qiladi. "
+        "Har bir partiya bulk_create bilan yoziladi va checkpoint bilan bitta tranzaksiyada saqlanadi, "
+        "qayta ishga tushirilsa to'xtagan joydan davom etadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV yoki NDJSON fayl, '-' bo'lsa stdin.")
+        parser.add_argument('--user', required=True, help="Mahsulotlar egasi (username).")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default=None)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--checkpoint', default=None,
+                            help="Checkpoint kaliti (standart: faylning to'liq yo'li). "
+                                 "stdin uchun berilmasa checkpoint saqlanmaydi.")
+        parser.add_argument('--no-resume', action='store_true', help="Checkpointni e'tiborsiz qoldirish.")
+        parser.add_argument('--strict', action='store_true', help="Birinchi xato qatorda to'xtash.")
+
+    def handle(self, *args, **options):
+        try:
+            self.owner = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Foydalanuvchi topilmadi: {options['user']}")
+
+        path = options['path']
+        fmt = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        self.checkpoint = options['checkpoint'] or (None if path == '-' else os.path.abspath(path))
+        start_after = 0 if options['no_resume'] else self.read_checkpoint()
+        batch_size = options['batch_size']
+
+        self.validator = ProductSerializer()
+        self.brand_ids = dict(Brand.objects.values_list('name', 'id'))
+
+        imported = skipped = 0
+        batch = []
+        last_line = start_after
+        started = time.perf_counter()
+
+        with self.open_input(path) as stream:
+            for line_no, row in self.read_rows(stream, fmt):
+                if line_no <= start_after:
+                    continue
+                try:
+                    batch.append(self.build_product(row))
+                except RowError as exc:
+                    if options['strict']:
+                        raise CommandError(f"{line_no}-qator: {exc}")
+                    self.stderr.write(f"{line_no}-qator o'tkazib yuborildi: {exc}")
+                    skipped += 1
+                last_line = line_no
+
+                if len(batch) >= batch_size:
+                    imported += self.flush(batch, last_line)
+                    batch = []
+                    self.report(imported, started)
+
+            imported += self.flush(batch, last_line)
+
+        bump_catalog()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{imported} ta mahsulot import qilindi, {skipped} ta qator o'tkazib yuborildi, "
+            f"{elapsed:.1f} s ({imported / elapsed if elapsed else 0:.0f} qator/s)."
+        ))
+
+    def open_input(self, path):
+        if path == '-':
+            return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        return open(path, encoding='utf-8', newline='')
+
+    def read_rows(self, stream, fmt):
+        if fmt == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_no, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                row = {'__error__': f"JSON xato: {exc}"}
+            if not isinstance(row, dict):
+                row = {'__error__': "Qator JSON obyekt bo'lishi kerak."}
+            yield line_no, row
+
+    def build_product(self, row):
+        if '__error__' in row:
+            raise RowError(row['__error__'])
+
+        name = self.bounded(row.get('name'), Product, 'name')
+        if not name:
+            raise RowError("name bo'sh.")
+
+        price = self.validated('price', row.get('price', ''))
+        stock = self.validated('stock', row.get('stock') or 0)
+
+        return Product(
+            user=self.owner,
+            brand_id=self.resolve_brand(self.bounded(row.get('brand'), Brand, 'name', 'brand')),
+            name=name,
+            description=row.get('description') or None,
+            ram=self.bounded(row.get('ram'), Product, 'ram') or None,
+            color=self.bounded(row.get('color'), Product, 'color') or None,
+            price=price,
+            stock=stock,
+            is_available=self.parse_bool(row.get('is_available', True)),
+        )
+
+    def validated(self, name, value):
+        """
+        ProductSerializer maydoni (max_digits/decimal_places, butun son chegarasi, Infinity/NaN)
+        va validate_<name> orqali o'tgan qiymat; xato bo'lsa qator xatosi.
+        """
+        try:
+            value = self.validator.fields[name].run_validation(value)
+            return getattr(self.validator, f'validate_{name}')(value)
+        except serializers.ValidationError as exc:
+            details = exc.detail if isinstance(exc.detail, list) else [exc.detail]
+            raise RowError(f"{name}: {' '.join(str(detail) for detail in details)}")
+
+    def bounded(self, value, model, field_name, label=None):
+        """Satr qiymati; modeldagi max_length dan uzun bo'lsa qator xatosi."""
+        value = '' if value is None else str(value).strip()
+        max_length = model._meta.get_field(field_name).max_length
+        if max_length is not None and len(value) > max_length:
+            raise RowError(f"{label or field_name} {max_length} belgidan uzun.")
+        return value
+
+    def resolve_brand(self, name):
+        if not name:
+            return None
+        brand_id = self.brand_ids.get(name)
+        if brand_id is None:
+            brand, _ = Brand.objects.get_or_create(name=name)
+            brand_id = self.brand_ids[name] = brand.id
+        return brand_id
+
+    def parse_bool(self, value):
+        if isinstance(value, bool):
+            return value
+        value = str(value).strip().lower()
+        if value in TRUE_VALUES or value == '':
+            return True
+        if value in FALSE_VALUES:
+            return False
+        raise RowError(f"is_available noto'g'ri qiymat: {value}")
+
+    def flush(self, batch, last_line):
+        # Partiya va checkpoint birga yoziladi: yiqilishdan keyin qatorlar takrorlanmaydi.
+        with transaction.atomic():
+            created = Product.objects.bulk_create(batch) if batch else []
+            # bulk_create signallarni chaqirmaydi, qidiruv indeksini shu yerning o'zida yangilaymiz.
+            index_products(product.id for product in created)
+            self.write_checkpoint(last_line)
+        return len(created)
+
+    def read_checkpoint(self):
+        if not self.checkpoint:
+            return 0
+        line = ImportCheckpoint.objects.filter(source=self.checkpoint).values_list('line', flat=True).first()
+        return line or 0
+
+    def write_checkpoint(self, line_no):
+        if self.checkpoint:
+            ImportCheckpoint.objects.update_or_create(source=self.checkpoint, defaults={'line': line_no})
+
+    def report(self, imported, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{imported} ta yozildi ({imported / elapsed if elapsed else 0:.0f} qator/s)")
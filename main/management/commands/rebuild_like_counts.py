@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main.likes import rebuild_like_counts
+
+
+class Command(BaseCommand):
+    help = "Product.like_count hisoblagichlarini Like jadvalidan qayta hisoblaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        total = rebuild_like_counts(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{total} ta mahsulot yangilandi."))
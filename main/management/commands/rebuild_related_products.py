@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from main.recommendations import CHUNK_SIZE, refresh_related_products
+
+
+class Command(BaseCommand):
+    help = (
+        "Like va buyurtmalardan mahsulot qo'shnilarini (/products/<pk>/related/) hisoblaydi. "
+        "Odatda faqat yangi like yoki buyurtma olgan mahsulotlar qayta hisoblanadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Barcha mahsulotlarni qayta hisoblash.")
+        parser.add_argument('--top-k', type=int, default=None)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        total = refresh_related_products(
+            full=options['full'], top_k=options['top_k'], chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{total} ta mahsulot qo'shnilari yangilandi."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main.analytics import CHUNK_SIZE, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "SalesRollup yig'indilarini buyurtmalardan bo'laklab qayta hisoblaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        total = rebuild_rollups(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"{total} ta buyurtma qayta hisoblandi."))
@@ -0,0 +1,28 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from main.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = "Ma'lumotlar bazasidagi vazifalar navbatini bajaruvchi worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--maintenance-interval', type=float, default=60.0)
+        parser.add_argument('--burst', action='store_true', help="Navbat bo'shagach chiqib ketish.")
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+            maintenance_interval=options['maintenance_interval'],
+            burst=options['burst'],
+        )
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: worker.stop())
+        self.stdout.write(f"Worker ishga tushdi ({options['concurrency']} oqim).")
+        worker.run()
+        self.stdout.write(self.style.SUCCESS("Worker to'xtadi."))
@@ -0,0 +1,210 @@
+import math
+import random
+import time
+from array import array
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from main.analytics import rebuild_rollups
+from main.cache import bump_catalog
+from main.likes import rebuild_like_counts
+from main.models import Brand, Like, OrderProduct, Product, User
+from main.search import rebuild_index
+
+RAMS = ['4GB', '6GB', '8GB', '12GB', '16GB', '32GB']
+COLORS = ['black', 'white', 'silver', 'blue', 'red', 'green', 'gold']
+WORDS = [
+    'phone', 'laptop', 'tablet', 'watch', 'earbuds', 'camera', 'monitor', 'keyboard', 'mouse', 'speaker',
+    'pro', 'max', 'mini', 'ultra', 'lite', 'plus', 'air', 'neo', 'edge', 'prime',
+]
+# status: ulush
+ORDER_STATUSES = [('pending', 0.2), ('confirmed', 0.15), ('shipped', 0.15), ('delivered', 0.4), ('cancelled', 0.1)]
+
+
+class ZipfSampler:
+    """
+    1..n oraliqda Zipf(s) ga yaqin taqsimot: uzluksiz chegaralangan Pareto ning teskari
+    CDF i orqali, shuning uchun xotira va vaqt n ga bog'liq emas (O(1)).
+    Rang indeksga qadam bilan aralashtiriladi, aks holda eng mashhurlar doim eng birinchi id lar bo'lardi.
+    """
+
+    def __init__(self, n, s, rng):
+        self.n = n
+        self.s = s
+        self.rng = rng
+        self.stride = self._coprime_stride(n)
+        if s != 1:
+            self.top = n ** (1 - s) - 1
+
+    @staticmethod
+    def _coprime_stride(n):
+        stride = int(n * 0.618) | 1
+        while math.gcd(stride, n) != 1:
+            stride += 2
+        return stride
+
+    def rank(self):
+        u = self.rng.random()
+        if self.s == 1:
+            value = self.n ** u
+        else:
+            value = (self.top * u + 1) ** (1 / (1 - self.s))
+        return min(self.n, max(1, int(value)))
+
+    def index(self):
+        return (self.rank() - 1) * self.stride % self.n
+
+
+class Command(BaseCommand):
+    help = (
+        "Yuklama testlari uchun sun'iy ma'lumotlar: foydalanuvchilar, mahsulotlar, like va buyurtmalar. "
+        "Natija --seed bo'yicha deterministik; like va buyurtmalar mahsulotlar bo'yicha Zipf taqsimotida."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--products', type=int, default=10000)
+        parser.add_argument('--likes', type=int, default=50000)
+        parser.add_argument('--orders', type=int, default=20000)
+        parser.add_argument('--brands', type=int, default=50)
+        parser.add_argument('--sellers', type=int, default=None,
+                            help="Sotuvchilar soni (standart: foydalanuvchilarning 5%%).")
+        parser.add_argument('--zipf', type=float, default=1.1, help="Zipf ko'rsatkichi s (katta -- keskinroq).")
+        parser.add_argument('--days', type=int, default=365, help="Buyurtmalar shuncha kunga tarqatiladi.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed', help="Foydalanuvchi nomlari prefiksi.")
+        parser.add_argument('--password', default='password123', help="Barcha foydalanuvchilar paroli.")
+        parser.add_argument('--skip-derived', action='store_true',
+                            help="Qidiruv indeksi, like_count va savdo yig'indilarini qayta qurmaslik.")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['products'] < 1:
+            raise CommandError("--users va --products kamida 1 bo'lishi kerak.")
+        if User.objects.filter(username__startswith=f"{options['prefix']}-").exists():
+            raise CommandError(f"'{options['prefix']}-' prefiksli foydalanuvchilar allaqachon bor, --prefix ni o'zgartiring.")
+
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.started = time.perf_counter()
+
+        user_ids = self.step('users', self.create_users)
+        brand_ids = self.step('brands', self.create_brands)
+        product_ids, prices = self.step('products', lambda: self.create_products(user_ids, brand_ids))
+        self.step('likes', lambda: self.create_likes(user_ids, product_ids))
+        self.step('orders', lambda: self.create_orders(user_ids, product_ids, prices))
+
+        if not options['skip_derived']:
+            # bulk_create signallarni chaqirmaydi: hosila ma'lumotlar bir martada qayta quriladi.
+            self.step('search index', rebuild_index)
+            self.step('like counts', rebuild_like_counts)
+            self.step('sales rollups', rebuild_rollups)
+        bump_catalog()
+
+        self.stdout.write(self.style.SUCCESS(f"Tayyor: {time.perf_counter() - self.started:.1f} s."))
+
+    def step(self, name, func):
+        started = time.perf_counter()
+        result = func()
+        self.stdout.write(f"{name}: {time.perf_counter() - started:.1f} s")
+        return result
+
+    def rng(self, stream):
+        return random.Random(f"{self.options['seed']}-{stream}")
+
+    def insert(self, model, rows, ids=None, ignore_conflicts=False):
+        """rows generatorini batch_size lik bo'laklarda yozadi; ids berilsa yangi pk lar unga qo'shiladi."""
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.flush(model, batch, ids, ignore_conflicts)
+                batch = []
+        self.flush(model, batch, ids, ignore_conflicts)
+
+    def flush(self, model, batch, ids, ignore_conflicts):
+        if not batch:
+            return
+        with transaction.atomic():
+            created = model.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+        if ids is not None:
+            ids.extend(obj.pk for obj in created)
+
+    def create_users(self):
+        prefix = self.options['prefix']
+        # Parol bir marta xeshlanadi: PBKDF2 har foydalanuvchi uchun ~0.3 s bo'lardi.
+        password = make_password(self.options['password'])
+        ids = array('q')
+        self.insert(User, (
+            User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password=password)
+            for i in range(self.options['users'])
+        ), ids)
+        return ids
+
+    def create_brands(self):
+        names = [f"Brand {i}" for i in range(self.options['brands'])]
+        Brand.objects.bulk_create([Brand(name=name) for name in names], ignore_conflicts=True)
+        return list(Brand.objects.filter(name__in=names).order_by('id').values_list('id', flat=True))
+
+    def create_products(self, user_ids, brand_ids):
+        rng = self.rng('products')
+        sellers = self.options['sellers'] or max(1, len(user_ids) // 20)
+        seller_sampler = ZipfSampler(min(sellers, len(user_ids)), self.options['zipf'], rng)
+        brand_sampler = ZipfSampler(len(brand_ids), self.options['zipf'], rng) if brand_ids else None
+        prices = array('l')
+
+        def rows():
+            for i in range(self.options['products']):
+                cents = int(rng.lognormvariate(10.5, 1.0)) // 100 * 100 + 99
+                prices.append(cents)
+                yield Product(
+                    user_id=user_ids[seller_sampler.index()],
+                    brand_id=brand_ids[brand_sampler.index()] if brand_sampler else None,
+                    name=f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+                    description=' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 20))),
+                    ram=rng.choice(RAMS),
+                    color=rng.choice(COLORS),
+                    price=Decimal(cents) / 100,
+                    stock=rng.randint(0, 500),
+                    is_available=rng.random() > 0.05,
+                )
+
+        ids = array('q')
+        self.insert(Product, rows(), ids)
+        return ids, prices
+
+    def create_likes(self, user_ids, product_ids):
+        rng = self.rng('likes')
+        products = ZipfSampler(len(product_ids), self.options['zipf'], rng)
+        # (product, user) takrorlari ignore_conflicts bilan tashlab yuboriladi.
+        self.insert(Like, (
+            Like(product_id=product_ids[products.index()], user_id=user_ids[rng.randrange(len(user_ids))])
+            for _ in range(self.options['likes'])
+        ), ignore_conflicts=True)
+
+    def create_orders(self, user_ids, product_ids, prices):
+        rng = self.rng('orders')
+        products = ZipfSampler(len(product_ids), self.options['zipf'], rng)
+        statuses, weights = zip(*ORDER_STATUSES)
+        now = timezone.now()
+        span = self.options['days'] * 86400
+
+        def rows():
+            for _ in range(self.options['orders']):
+                index = products.index()
+                quantity = rng.choice((1, 1, 1, 2, 2, 3))
+                yield OrderProduct(
+                    user_id=user_ids[rng.randrange(len(user_ids))],
+                    product_id=product_ids[index],
+                    quantity=quantity,
+                    total_price=Decimal(prices[index] * quantity) / 100,
+                    status=rng.choices(statuses, weights)[0],
+                    created_at=now - timedelta(seconds=rng.randrange(span)),
+                )
+
+        self.insert(OrderProduct, rows())
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='like',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Like', 'verbose_name_plural': 'Likes'},
+        ),
+        migrations.AlterModelOptions(
+            name='orderproduct',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Order', 'verbose_name_plural': 'Orders'},
+        ),
+        migrations.AlterModelOptions(
+            name='product',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Product', 'verbose_name_plural': 'Products'},
+        ),
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='like_user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderproduct',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='order_user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', '-id'], name='product_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='product_user_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+from main import search
+
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS main_product_fts "
+    "USING fts5(name, description, brand, tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+]
+
+POSTGRES_CREATE = [
+    "CREATE TABLE IF NOT EXISTS main_product_search ("
+    "product_id bigint PRIMARY KEY REFERENCES main_product(id) ON DELETE CASCADE, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS main_product_search_document_gin ON main_product_search USING GIN (document)",
+]
+
+DROP = {
+    'sqlite': ["DROP TABLE IF EXISTS main_product_fts"],
+    'postgresql': ["DROP TABLE IF EXISTS main_product_search"],
+}
+
+
+def create_search_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+    # Mavjud mahsulotlar signallar yozadigan hujjat bilan bir xil (normalize()) indekslanadi.
+    search.rebuild_index(using=schema_editor.connection.alias)
+
+
+def drop_search_index(apps, schema_editor):
+    for statement in DROP.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_like_count(apps, schema_editor):
+    Product = apps.get_model('main', 'Product')
+    Like = apps.get_model('main', 'Like')
+    counts = (
+        Like.objects.filter(product=OuterRef('pk'))
+        .order_by()
+        .values('product')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Product.objects.update(like_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-like_count', '-id'], name='product_like_count_id_idx'),
+        ),
+        migrations.RunPython(populate_like_count, migrations.RunPython.noop),
+    ]
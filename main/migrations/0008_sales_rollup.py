@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_orderproduct_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('product', 'Product'), ('brand', 'Brand'), ('seller', 'Seller')], max_length=10)),
+                ('key_id', models.BigIntegerField(default=0)),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Sales Rollup',
+                'verbose_name_plural': 'Sales Rollups',
+                'ordering': ['-day', 'dimension', 'key_id', 'status'],
+                'indexes': [models.Index(fields=['dimension', 'day'], name='sales_rollup_dimension_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key_id', 'day', 'status'), name='sales_rollup_unique_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_rollup_keys(apps, schema_editor):
+    OrderProduct = apps.get_model('main', 'OrderProduct')
+    Product = apps.get_model('main', 'Product')
+    product = Product.objects.filter(pk=OuterRef('product_id'))
+    OrderProduct.objects.update(
+        rollup_brand_id=Subquery(product.values('brand_id')[:1]),
+        rollup_seller_id=Subquery(product.values('user_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_related_products'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderproduct',
+            name='rollup_brand_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='orderproduct',
+            name='rollup_seller_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_rollup_keys, migrations.RunPython.noop),
+    ]
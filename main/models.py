@@ -40,6 +40,7 @@ class Brand(models.Model):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(blank=True, null=True)
     logo = models.ImageField(upload_to='brand_logos/', blank=True, null=True)
+    logo_variants = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -61,13 +62,19 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=0)
     is_available = models.BooleanField(default=True)
+    like_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='product_created_id_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='product_user_created_id_idx'),
+            models.Index(fields=['-like_count', '-id'], name='product_like_count_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -76,6 +83,7 @@ class Product(models.Model):
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='product_images/')
+    variants = models.JSONField(default=dict, blank=True)
 
     class Meta:
         verbose_name = 'Product Image'
@@ -94,7 +102,10 @@ class Like(models.Model):
         verbose_name = 'Like'
         verbose_name_plural = 'Likes'
         unique_together = ('product', 'user')
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='like_user_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} liked {self.product.name}"
@@ -115,11 +126,19 @@ class OrderProduct(models.Model):
     total_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Savdo yig'indilariga yozilgan brend va sotuvchi. Keyin mahsulotning brendi yoki egasi
+    # o'zgarsa ham, tahrirlash va o'chirishda ulush aynan shu qatorlardan ayiriladi.
+    rollup_brand_id = models.BigIntegerField(blank=True, null=True, editable=False)
+    rollup_seller_id = models.BigIntegerField(blank=True, null=True, editable=False)
 
     class Meta:
         verbose_name = 'Order'
         verbose_name_plural = 'Orders'
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='order_user_created_id_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.total_price:
@@ -127,4 +146,138 @@ class OrderProduct(models.Model):
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"Order #{self.id} - {self.user.username}"
\ No newline at end of file
+        return f"Order #{self.id} - {self.user.username}"
+
+
+class SalesRollup(models.Model):
+    """
+    Buyurtmalarning kunlik yig'indisi. Har bir buyurtma to'rtta qatorga kiradi:
+    umumiy (key_id=0), mahsulot, brend va sotuvchi bo'yicha.
+    """
+    TOTAL = 'total'
+    PRODUCT = 'product'
+    BRAND = 'brand'
+    SELLER = 'seller'
+    DIMENSION_CHOICES = [
+        (TOTAL, 'Total'),
+        (PRODUCT, 'Product'),
+        (BRAND, 'Brand'),
+        (SELLER, 'Seller'),
+    ]
+
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    key_id = models.BigIntegerField(default=0)
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=OrderProduct.STATUS_CHOICES)
+    orders = models.IntegerField(default=0)
+    units = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Sales Rollup'
+        verbose_name_plural = 'Sales Rollups'
+        ordering = ['-day', 'dimension', 'key_id', 'status']
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key_id', 'day', 'status'], name='sales_rollup_unique_key'),
+        ]
+        indexes = [
+            models.Index(fields=['dimension', 'day'], name='sales_rollup_dimension_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}:{self.key_id} {self.day} {self.status}"
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        ordering = ['run_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_at', 'id'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.id} {self.task} ({self.status})"
+
+
+class RelatedProduct(models.Model):
+    """
+    Oldindan hisoblangan "buni yoqtirgan/olganlar yana ..." qo'shnilari (main/recommendations.py).
+    Har bir mahsulot uchun rank bo'yicha TOP_K ta qator; /products/<pk>/related/
+    (product, rank) indeksi bo'yicha bitta so'rov bilan o'qiladi.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='neighbor_of')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        verbose_name = 'Related Product'
+        verbose_name_plural = 'Related Products'
+        ordering = ['product', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='related_product_rank_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class RecommendationRun(models.Model):
+    """Qo'shnilar hisoblangan har bir ishga tushirish; oxirgisi keyingi qisman yangilash uchun chegara."""
+    full = models.BooleanField(default=False)
+    last_like_id = models.BigIntegerField(default=0)
+    last_order_id = models.BigIntegerField(default=0)
+    products = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Recommendation Run'
+        verbose_name_plural = 'Recommendation Runs'
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"Run #{self.id} ({self.products} ta mahsulot)"
+
+
+class ImportCheckpoint(models.Model):
+    """
+    import_products uchun oxirgi yozilgan qator. Partiya bilan bitta tranzaksiyada
+    yangilanadi: qayta ishga tushirish qatorlarni ikki marta yozmaydi va tashlab ketmaydi.
+    """
+    source = models.CharField(max_length=500, unique=True)
+    line = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Import Checkpoint'
+        verbose_name_plural = 'Import Checkpoints'
+        ordering = ['-updated_at']
+
+    def __str__(self):
+        return f"{self.source}: {self.line}"
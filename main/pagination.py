@@ -0,0 +1,170 @@
+"""
+Tartibning barcha ustunlari bo'yicha keyset cursor pagination.
+
+Cursor sahifa chegarasidagi qatorning (qiymat, ..., id) ini saqlaydi, keyingi sahifa esa
+Q(f1 < v1) | Q(f1 = v1, f2 < v2) | ... sharti bilan olinadi. OFFSET yo'q: chuqur sahifalar
+birinchisidek arzon, teng qiymatlar (bir xil created_at yoki like_count) takror yoki tushib
+qolgan qatorlarsiz o'tiladi. Tartib doim noyob id bilan tugaydi; ustunlar NULL bo'lmasligi kerak.
+Sinxron (DRF) va async viewlar (main/async_views.py) shu funksiyalardan foydalanadi.
+"""
+import base64
+import binascii
+from datetime import datetime
+from urllib import parse
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+UNIQUE_FIELD = 'id'
+
+
+class CursorError(ValueError):
+    pass
+
+
+def unique_ordering(ordering):
+    """Tartib noyob id bilan tugamasa oxiriga -id qo'shiladi."""
+    ordering = tuple(ordering)
+    if UNIQUE_FIELD not in {field.lstrip('-') for field in ordering}:
+        ordering += ('-' + UNIQUE_FIELD,)
+    return ordering
+
+
+def reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+
+def position_of(item, ordering):
+    """Qatorning (model obyekti yoki values() dict) tartib ustunlaridagi qiymatlari."""
+    names = [field.lstrip('-') for field in ordering]
+    if isinstance(item, dict):
+        return tuple(item[name] for name in names)
+    return tuple(getattr(item, name) for name in names)
+
+
+def encode_position(position, reverse=False):
+    tokens = [('p', value.isoformat() if isinstance(value, datetime) else str(value)) for value in position]
+    if reverse:
+        tokens.append(('r', '1'))
+    return base64.urlsafe_b64encode(parse.urlencode(tokens).encode()).decode()
+
+
+def _to_python(model, name, value):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return value
+    try:
+        value = field.to_python(value)
+    except ValidationError:
+        raise CursorError(f"Noto'g'ri cursor qiymati: {name}")
+    if isinstance(value, datetime) and timezone.is_naive(value):
+        raise CursorError(f"Cursor vaqti vaqt zonasisiz: {name}")
+    return value
+
+
+def decode_position(value, model, ordering):
+    """
+    (position, reverse). Position model maydonlari turiga keltiriladi; buzilgan yoki
+    boshqa tartib uchun berilgan cursor -- CursorError.
+    """
+    try:
+        querystring = base64.urlsafe_b64decode(value.encode()).decode()
+        tokens = parse.parse_qs(querystring, keep_blank_values=True, strict_parsing=True)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise CursorError("Cursor o'qib bo'lmadi.")
+    if set(tokens) - {'p', 'r'} or tokens.get('r', ['1']) != ['1']:
+        raise CursorError("Cursor o'qib bo'lmadi.")
+    raw = tokens.get('p', [])
+    if len(raw) != len(ordering):
+        raise CursorError("Cursor bu tartibga mos emas.")
+    position = tuple(_to_python(model, field.lstrip('-'), item) for field, item in zip(ordering, raw))
+    return position, 'r' in tokens
+
+
+def keyset_filter(ordering, position, reverse=False):
+    """ordering bo'yicha position dan keyingi (reverse=True -- oldingi) qatorlar sharti."""
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, position):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+class StoreCursorPagination(CursorPagination):
+    """
+    (created_at, id) bo'yicha keyset pagination; ?ordering= bo'lsa (qiymat, ..., id).
+    Eski klientlar uchun ?paginate=false to'liq ro'yxatni qaytaradi.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+    unpaginated_query_param = 'paginate'
+    unpaginated_values = ('0', 'false', 'no', 'off')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        value = request.query_params.get(self.unpaginated_query_param, '')
+        if value.lower() in self.unpaginated_values:
+            return None
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.ordering = unique_ordering(self.get_ordering(request, queryset, view))
+        self.cursor = self.decode_cursor(request)
+        position, reverse = self.cursor or (None, False)
+
+        queryset = queryset.order_by(*(reverse_ordering(self.ordering) if reverse else self.ordering))
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(self.ordering, position, reverse))
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            return decode_position(encoded, self.model, self.ordering)
+        except CursorError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def link(self, position, reverse):
+        return replace_query_param(self.base_url, self.cursor_query_param, encode_position(position, reverse))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = position_of(self.page[-1], self.ordering) if self.page else self.cursor[0]
+        return self.link(position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = position_of(self.page[0], self.ordering) if self.page else self.cursor[0]
+        return self.link(position, reverse=True)
+
+
+class IdCursorPagination(StoreCursorPagination):
+    ordering = ('-id',)
@@ -0,0 +1,239 @@
+"""
+"Buni yoqtirgan/olganlar yana ..." tavsiyalari: oldindan hisoblangan item-item qo'shnilar.
+
+Like va bekor qilinmagan buyurtmalar id bo'yicha bo'laklab o'qilib, siyrak
+foydalanuvchi x mahsulot matritsasiga yig'iladi. Ikki mahsulot o'xshashligi -- ularning
+ustunlari orasidagi kosinus. Har bir mahsulot uchun TOP_K ta eng o'xshashi RelatedProduct
+jadvaliga yoziladi va endpoint uni (product, rank) indeksi bo'yicha o'qiydi.
+
+O'xshashliklar BLOCK_SIZE talik bloklarda siyrak matritsa ko'paytmasi (SciPy) bilan hisoblanadi.
+
+Qisman yangilash (full=False) faqat oxirgi ishga tushirishdan keyin yangi like yoki
+buyurtma olgan mahsulotlarning qo'shnilarini qayta yozadi va faqat ularning qo'shnichiligini
+o'qiydi: shu mahsulotlar foydalanuvchilari bilan umumiy foydalanuvchisi bor mahsulotlar
+ustunlari. O'chirilgan like lar va boshqa mahsulotlarga ta'siri to'liq qayta hisoblashda
+(--full) hisobga olinadi.
+"""
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from scipy import sparse
+
+from .cache import bump_catalog
+from .models import Like, OrderProduct, Product, RecommendationRun, RelatedProduct
+
+DEFAULTS = {
+    'TOP_K': 20,
+    'LIKE_WEIGHT': 1.0,
+    'ORDER_WEIGHT': 2.0,
+    'BLOCK_SIZE': 1000,
+}
+CHUNK_SIZE = 10000
+# Bitta tranzaksiyada qo'shnilari almashtiriladigan mahsulotlar.
+STORE_BATCH = 500
+# Bitta IN (...) ga sig'adigan id lar.
+FILTER_BATCH = 500
+
+
+def recommendation_setting(name):
+    return getattr(settings, 'STORE_RECOMMENDATIONS', {}).get(name, DEFAULTS[name])
+
+
+def _stream(queryset, last_id, chunk_size):
+    """(user_id, product_id) juftliklari; id <= last_id, id bo'yicha bo'laklab."""
+    queryset = queryset.filter(id__lte=last_id).order_by('id').values_list('id', 'user_id', 'product_id')
+    after = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=after)[:chunk_size])
+        if not chunk:
+            return
+        for _, user_id, product_id in chunk:
+            yield user_id, product_id
+        after = chunk[-1][0]
+
+
+def _sources(last_like_id, last_order_id):
+    """(queryset, last_id, og'irlik): like lar va bekor qilinmagan buyurtmalar."""
+    return (
+        (Like.objects.all(), last_like_id, recommendation_setting('LIKE_WEIGHT')),
+        (OrderProduct.objects.exclude(status='cancelled'), last_order_id, recommendation_setting('ORDER_WEIGHT')),
+    )
+
+
+def _batches(ids, size=FILTER_BATCH):
+    ids = sorted(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def neighbourhood(targets, last_like_id, last_order_id):
+    """
+    targets va ular bilan kamida bitta umumiy foydalanuvchisi bor mahsulotlar.
+    targets ning kosinusi uchun faqat shu ustunlar kerak.
+    """
+    sources = [queryset.filter(id__lte=last_id) for queryset, last_id, _ in _sources(last_like_id, last_order_id)]
+    users = set()
+    for queryset in sources:
+        for batch in _batches(targets):
+            users.update(
+                queryset.filter(product_id__in=batch).order_by().values_list('user_id', flat=True).distinct()
+            )
+    products = set(targets)
+    for queryset in sources:
+        for batch in _batches(users):
+            products.update(
+                queryset.filter(user_id__in=batch).order_by().values_list('product_id', flat=True).distinct()
+            )
+    return products
+
+
+def load_interactions(last_like_id, last_order_id, chunk_size=CHUNK_SIZE, products=None):
+    """
+    {(user_id, product_id): og'irlik}. Bir xil mahsulotga bir necha buyurtma bitta
+    hisoblanadi; like va buyurtma og'irliklari qo'shiladi. products berilsa faqat
+    shu mahsulotlarning ustunlari o'qiladi.
+    """
+    weights = defaultdict(float)
+    for queryset, last_id, weight in _sources(last_like_id, last_order_id):
+        if products is None:
+            querysets = [queryset]
+        else:
+            querysets = [queryset.filter(product_id__in=batch) for batch in _batches(products)]
+        seen = set()
+        for queryset in querysets:
+            for pair in _stream(queryset, last_id, chunk_size):
+                if pair not in seen:
+                    seen.add(pair)
+                    weights[pair] += weight
+    return weights
+
+
+def _neighbors(weights, targets, top_k, block_size):
+    pairs = np.array(list(weights), dtype=np.int64).reshape(-1, 2)
+    data = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+    user_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    product_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix((data, (rows, columns)), shape=(len(user_ids), len(product_ids)))
+
+    # Ustunlar birlik uzunlikka keltiriladi: ko'paytma to'g'ridan-to'g'ri kosinusni beradi.
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    normalized = (matrix @ sparse.diags(1.0 / norms)).tocsr()
+    by_product = normalized.T.tocsr()
+
+    targets = np.asarray(targets, dtype=np.int64)
+    positions = np.searchsorted(product_ids, targets)
+    known = positions < len(product_ids)
+    known[known] = product_ids[positions[known]] == targets[known]
+    for product_id in targets[~known]:
+        yield int(product_id), []
+
+    positions = positions[known]
+    for start in range(0, len(positions), block_size):
+        block = positions[start:start + block_size]
+        similarities = (by_product[block] @ normalized).tocsr()
+        for row, position in enumerate(block):
+            lo, hi = similarities.indptr[row], similarities.indptr[row + 1]
+            columns, scores = similarities.indices[lo:hi], similarities.data[lo:hi]
+            others = columns != position
+            columns, scores = columns[others], scores[others]
+            # Ball kamayishi, teng bo'lsa id o'sishi bo'yicha.
+            order = np.lexsort((product_ids[columns], -scores))[:top_k]
+            yield int(product_ids[position]), [
+                (int(other_id), float(score)) for other_id, score in zip(product_ids[columns[order]], scores[order])
+            ]
+
+
+def compute_neighbors(weights, targets, top_k):
+    """targets dagi har bir mahsulot uchun (product_id, [(related_id, score), ...]) juftliklari."""
+    targets = sorted(targets)
+    if not weights:
+        return ((product_id, []) for product_id in targets)
+    return _neighbors(weights, targets, top_k, recommendation_setting('BLOCK_SIZE'))
+
+
+def store_neighbors(results, batch_size=STORE_BATCH):
+    """Mahsulotlarning qo'shnilarini partiyalab almashtiradi; o'chirilgan mahsulotlar tashlab ketiladi."""
+    stored = 0
+    batch = []
+
+    def flush():
+        product_ids = {product_id for product_id, _ in batch}
+        product_ids.update(related_id for _, neighbors in batch for related_id, _ in neighbors)
+        alive = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        rows = []
+        for product_id, neighbors in batch:
+            if product_id not in alive:
+                continue
+            neighbors = [(related_id, score) for related_id, score in neighbors if related_id in alive]
+            rows.extend(
+                RelatedProduct(product_id=product_id, related_id=related_id, rank=rank, score=score)
+                for rank, (related_id, score) in enumerate(neighbors, start=1)
+            )
+        with transaction.atomic():
+            RelatedProduct.objects.filter(product_id__in=[product_id for product_id, _ in batch]).delete()
+            RelatedProduct.objects.bulk_create(rows)
+
+    for item in results:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush()
+            stored += len(batch)
+            batch = []
+    if batch:
+        flush()
+        stored += len(batch)
+    return stored
+
+
+def changed_products(last_like_id, last_order_id, since):
+    """since (RecommendationRun) dan keyin yangi like yoki buyurtma olgan mahsulotlar."""
+    changed = set(
+        Like.objects.filter(id__gt=since.last_like_id, id__lte=last_like_id)
+        .order_by().values_list('product_id', flat=True).distinct()
+    )
+    changed.update(
+        OrderProduct.objects.filter(id__gt=since.last_order_id, id__lte=last_order_id)
+        .order_by().values_list('product_id', flat=True).distinct()
+    )
+    return changed
+
+
+def refresh_related_products(full=False, top_k=None, chunk_size=CHUNK_SIZE):
+    """
+    Qo'shnilar jadvalini yangilaydi va RecommendationRun yozadi. Avvalgi ishga tushirish
+    bo'lmasa to'liq hisoblanadi. Qayta yozilgan mahsulotlar sonini qaytaradi.
+    """
+    top_k = top_k or recommendation_setting('TOP_K')
+    # Chegaralar o'qishdan oldin olinadi: hisoblash paytida kelganlar keyingi safar ko'riladi.
+    last_like_id = Like.objects.aggregate(value=Max('id'))['value'] or 0
+    last_order_id = OrderProduct.objects.aggregate(value=Max('id'))['value'] or 0
+    previous = RecommendationRun.objects.order_by('-id').first()
+    full = full or previous is None
+
+    if full:
+        weights = load_interactions(last_like_id, last_order_id, chunk_size)
+        targets = {product_id for _, product_id in weights}
+    else:
+        targets = changed_products(last_like_id, last_order_id, previous)
+        weights = {}
+        if targets:
+            products = neighbourhood(targets, last_like_id, last_order_id)
+            weights = load_interactions(last_like_id, last_order_id, chunk_size, products)
+
+    refreshed = store_neighbors(compute_neighbors(weights, targets, top_k)) if targets else 0
+    stale = []
+    if full:
+        # Endi hech qanday bog'lanishi qolmagan mahsulotlarning eski qo'shnilari.
+        stale = sorted(set(RelatedProduct.objects.order_by().values_list('product_id', flat=True).distinct()) - targets)
+        for start in range(0, len(stale), STORE_BATCH):
+            RelatedProduct.objects.filter(product_id__in=stale[start:start + STORE_BATCH]).delete()
+
+    RecommendationRun.objects.create(
+        full=full, last_like_id=last_like_id, last_order_id=last_order_id, products=refreshed,
+    )
+    if refreshed or stale:
+        bump_catalog()
+    return refreshed
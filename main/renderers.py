@@ -0,0 +1,34 @@
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer bilan bayt-bayt bir xil chiqish, lekin orjson orqali.
+    orjson bilmaydigan turlar (Decimal, datetime, lazy matnlar ...) DRF ning o'z
+    JSONEncoder.default iga beriladi, shuning uchun ularning ko'rinishi o'zgarmaydi.
+    orjson o'rnatilmagan, indent so'ralgan yoki ASCII/keng ajratgichli chiqish
+    sozlangan bo'lsa oddiy JSONRenderer ishlaydi.
+    """
+    default = staticmethod(JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Masalan 64 bitdan katta int: xatoni ham json bilan bir xil ko'rsatamiz.
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer kabi \u2028 va \u2029 doim escape qilinadi.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
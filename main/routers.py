@@ -0,0 +1,94 @@
+import asyncio
+import contextvars
+import functools
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+# None -- replika ishlatilmaydi; aks holda {'pinned': bool} shu so'rov uchun.
+_request_state = contextvars.ContextVar('store_replica_state', default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+@contextmanager
+def replica_reads():
+    """
+    Blok ichidagi o'qishlar replikaga yuboriladi. Birinchi yozuvdan keyin
+    blok oxirigacha hamma narsa asosiy bazada qoladi (read-after-write).
+    """
+    token = _request_state.set({'pinned': False})
+    try:
+        yield
+    finally:
+        _request_state.reset(token)
+
+
+def reading_replica():
+    """Joriy blokdagi o'qishlar replikaga ketyaptimi (replica_reads() ichida, yozuvsiz, replika sozlangan)."""
+    state = _request_state.get()
+    return state is not None and not state['pinned'] and bool(replica_aliases())
+
+
+def use_replica(view):
+    """Oddiy (sync yoki async) Django view uchun dekorator: GET/HEAD o'qishlari replikadan."""
+    if asyncio.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return await view(request, *args, **kwargs)
+            with replica_reads():
+                return await view(request, *args, **kwargs)
+    else:
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return view(request, *args, **kwargs)
+            with replica_reads():
+                return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """AllowAny katalog viewlari uchun: xavfsiz metodlardagi o'qishlar replikaga boradi."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Yozuvlar doim asosiy bazaga. O'qishlar faqat replica_reads() ichida, yozuv
+    bo'lmagan va ochiq tranzaksiya yo'q bo'lsa tasodifiy replikaga yuboriladi.
+    Replikalar bir oz orqada qolishi mumkin, shuning uchun faqat anonim katalog
+    o'qishlari uchun ishlatiladi.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or state['pinned']:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        replicas = replica_aliases()
+        if not replicas:
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['pinned'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replikalar asosiy bazaning nusxasi, obyektlar qayerdan o'qilganidan qat'i nazar bog'lanadi.
+        return True
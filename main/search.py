@@ -0,0 +1,158 @@
+import re
+import unicodedata
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router
+from django.db.models import Q
+
+SQLITE_TABLE = 'main_product_fts'
+POSTGRES_TABLE = 'main_product_search'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# bm25() ustun og'irliklari; ustunlar tartibi: name, description, brand.
+NAME_WEIGHT = 10.0
+BRAND_WEIGHT = 5.0
+DESCRIPTION_WEIGHT = 1.0
+
+
+def is_supported(vendor=None):
+    return (vendor or connection.vendor) in ('sqlite', 'postgresql')
+
+
+def normalize(text):
+    """Kichik harf va diakritikasiz: FTS5 dagi `unicode61 remove_diacritics 2` bilan bir xil (café -> cafe)."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(query):
+    return TOKEN_RE.findall(normalize(query))
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def _postgres_document(name, brand, description):
+    return normalize(name), normalize(brand or ''), normalize(description or '')
+
+
+def index_products(product_ids, using=DEFAULT_DB_ALIAS):
+    """Berilgan mahsulotlar uchun indeks qatorlarini qayta yozadi."""
+    product_ids = list(product_ids)
+    write_connection = connections[using]
+    if not product_ids or not is_supported(write_connection.vendor):
+        return
+    marks = _placeholders(product_ids)
+    with write_connection.cursor() as cursor:
+        if write_connection.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({marks})", product_ids)
+            cursor.execute(
+                f"INSERT INTO {SQLITE_TABLE} (rowid, name, description, brand) "
+                f"SELECT p.id, p.name, COALESCE(p.description, ''), COALESCE(b.name, '') "
+                f"FROM main_product p LEFT JOIN main_brand b ON b.id = p.brand_id "
+                f"WHERE p.id IN ({marks})",
+                product_ids,
+            )
+        else:
+            # 'simple' konfiguratsiyasi diakritikani olib tashlamaydi: matn FTS5 dagidek Python da normallanadi.
+            cursor.execute(
+                f"SELECT p.id, p.name, b.name, p.description "
+                f"FROM main_product p LEFT JOIN main_brand b ON b.id = p.brand_id WHERE p.id IN ({marks})",
+                product_ids,
+            )
+            rows = [(product_id, *_postgres_document(*fields)) for product_id, *fields in cursor.fetchall()]
+            cursor.executemany(
+                f"INSERT INTO {POSTGRES_TABLE} (product_id, document) "
+                f"SELECT %s, "
+                f"setweight(to_tsvector('simple', %s), 'A') || "
+                f"setweight(to_tsvector('simple', %s), 'B') || "
+                f"setweight(to_tsvector('simple', %s), 'C') "
+                f"ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                rows,
+            )
+
+
+def remove_products(product_ids):
+    product_ids = list(product_ids)
+    if not product_ids or not is_supported():
+        return
+    marks = _placeholders(product_ids)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({marks})", product_ids)
+        else:
+            cursor.execute(f"DELETE FROM {POSTGRES_TABLE} WHERE product_id IN ({marks})", product_ids)
+
+
+def _match_expression(tokens):
+    # Faqat oxirgi so'z prefiks sifatida qidiriladi (typeahead).
+    quoted = ['"%s"' % token.replace('"', '""') for token in tokens]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_product_ids(query, limit=20):
+    """
+    Relevantlik bo'yicha tartiblangan mahsulot id lari ro'yxatini qaytaradi.
+
+    Baholash va tartiblash bazaning o'zida: SQLite da FTS5 bm25() (nom, brend, tavsif
+    og'irliklari bilan), PostgreSQL da ts_rank. Bazadan faqat `limit` ta id o'qiladi.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+
+    from .models import Product
+    if not is_supported():
+        queryset = Product.objects.all()
+        for token in tokens:
+            queryset = queryset.filter(
+                Q(name__icontains=token) | Q(description__icontains=token) | Q(brand__name__icontains=token)
+            )
+        return list(queryset.values_list('id', flat=True)[:limit])
+
+    # Xom SQL routerdan o'tmaydi, shuning uchun o'qish bazasini o'zimiz tanlaymiz (replika bo'lishi mumkin).
+    read_connection = connections[router.db_for_read(Product)]
+    with read_connection.cursor() as cursor:
+        if read_connection.vendor == 'sqlite':
+            # bm25() kichikroq -- mosroq.
+            cursor.execute(
+                f"SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s "
+                f"ORDER BY bm25({SQLITE_TABLE}, %s, %s, %s), rowid DESC LIMIT %s",
+                [_match_expression(tokens), NAME_WEIGHT, DESCRIPTION_WEIGHT, BRAND_WEIGHT, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+        match = ' & '.join(tokens[:-1] + [f'{tokens[-1]}:*'])
+        cursor.execute(
+            f"SELECT product_id FROM {POSTGRES_TABLE}, to_tsquery('simple', %s) query "
+            f"WHERE document @@ query "
+            f"ORDER BY ts_rank(document, query) DESC, product_id DESC LIMIT %s",
+            [match, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def rebuild_index(batch_size=5000, using=DEFAULT_DB_ALIAS):
+    """
+    Butun indeksni id bo'yicha bo'laklab qayta quradi. Id lar xom SQL bilan o'qiladi:
+    migratsiya (0003) ham indeksni shu funksiya, ya'ni index_products() normallashtirishi bilan to'ldiradi.
+    """
+    write_connection = connections[using]
+    if not is_supported(write_connection.vendor):
+        return 0
+    with write_connection.cursor() as cursor:
+        table = SQLITE_TABLE if write_connection.vendor == 'sqlite' else POSTGRES_TABLE
+        cursor.execute(f"DELETE FROM {table}")
+    total = 0
+    last_id = 0
+    while True:
+        with write_connection.cursor() as cursor:
+            cursor.execute("SELECT id FROM main_product WHERE id > %s ORDER BY id LIMIT %s", [last_id, batch_size])
+            batch = [row[0] for row in cursor.fetchall()]
+        if not batch:
+            return total
+        index_products(batch, using=using)
+        total += len(batch)
+        last_id = batch[-1]
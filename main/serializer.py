@@ -1,12 +1,21 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import serializers
 from .models import *
+from .cache import bump_product
+from .images import variant_urls
+from .instrumentation import TimedSerializerMixin
+from .likes import apply_likes, like_buffer
+from .stock import reserve_stock, reserve_stock_bulk, release_stock
+from .analytics import record_orders, stamp_order
 from decimal import Decimal
 
 User = get_user_model()
 
 
-class UserCreateSerializer(serializers.ModelSerializer):
+class UserCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
@@ -22,7 +31,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return user
 
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=6)
 
     class Meta:
@@ -43,7 +52,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         return value
 
 
-class UserShortSerializer(serializers.ModelSerializer):
+class UserShortSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
@@ -53,7 +62,7 @@ class UserShortSerializer(serializers.ModelSerializer):
         ]
 
 
-class UserProfileUpdateSerializer(serializers.ModelSerializer):
+class UserProfileUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', required=False)
     email = serializers.EmailField(source='user.email', required=False)
     first_name = serializers.CharField(source='user.first_name', required=False)
@@ -95,7 +104,11 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
-class BrandSerializer(serializers.ModelSerializer):
+class BrandSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    logo_variants = serializers.SerializerMethodField()
+    # values() tezkor yo'li uchun: metod maydoni o'qiydigan model ustunlari (main/fastpath.py).
+    values_sources = {'logo_variants': ('logo_variants',)}
+
     class Meta:
         model = Brand
         fields = [
@@ -103,12 +116,17 @@ class BrandSerializer(serializers.ModelSerializer):
             'name',
             'description',
             'logo',
+            'logo_variants',
         ]
 
+    def get_logo_variants(self, obj):
+        return variant_urls(obj.logo_variants, self.context.get('request'))
+
 
-class ProductSafeSerializer(serializers.ModelSerializer):
+class ProductSafeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserShortSerializer(read_only=True)
     brand = BrandSerializer(read_only=True)
+    values_sources = {'is_liked': ('id',)}
 
     class Meta:
         model = Product
@@ -123,12 +141,24 @@ class ProductSafeSerializer(serializers.ModelSerializer):
             'price',
             'stock',
             'is_available',
+            'like_count',
             'created_at',
             'updated_at'
         ]
+        read_only_fields = ['like_count']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # is_liked faqat view LikedIds bergan bo'lsa (autentifikatsiyadan o'tgan foydalanuvchi).
+        if self.context.get('liked_ids') is not None:
+            fields['is_liked'] = serializers.SerializerMethodField()
+        return fields
 
+    def get_is_liked(self, obj):
+        return obj.id in self.context['liked_ids']
 
-class ProductSerializer(serializers.ModelSerializer):
+
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     brand = serializers.PrimaryKeyRelatedField(queryset=Brand.objects.all())
 
     class Meta:
@@ -161,7 +191,7 @@ class ProductSerializer(serializers.ModelSerializer):
         return value
 
 
-class ProductShortSerializer(serializers.ModelSerializer):
+class ProductShortSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = [
@@ -170,9 +200,10 @@ class ProductShortSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProductImageSafeSerializer(serializers.ModelSerializer):
+class ProductImageSafeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product = ProductShortSerializer(read_only=True)
     image = serializers.ImageField()
+    variants = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductImage
@@ -180,10 +211,14 @@ class ProductImageSafeSerializer(serializers.ModelSerializer):
             'id',
             'product',
             'image',
+            'variants',
         ]
 
+    def get_variants(self, obj):
+        return variant_urls(obj.variants, self.context.get('request'))
+
 
-class ProductImageSerializer(serializers.ModelSerializer):
+class ProductImageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
     image = serializers.ImageField()
 
@@ -202,7 +237,7 @@ class ProductImageSerializer(serializers.ModelSerializer):
         return value
 
 
-class LikeSafeSerializer(serializers.ModelSerializer):
+class LikeSafeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product = ProductSafeSerializer(read_only=True)
 
     class Meta:
@@ -215,24 +250,58 @@ class LikeSafeSerializer(serializers.ModelSerializer):
 
 class LikeToggleSerializer(serializers.Serializer):
     product_id = serializers.IntegerField()
-
-    def validate_product_id(self, value):
-        if not Product.objects.filter(id=value).exists():
-            raise serializers.ValidationError("Bunday mahsulot mavjud emas.")
-        return value
+    # Berilsa almashtirish o'rniga aniq holat o'rnatiladi (takror yuborilsa ham natija bir xil).
+    liked = serializers.BooleanField(required=False, allow_null=True, default=None)
+
+    def validate(self, attrs):
+        buffer = like_buffer()
+        # Buferlangan bosish bazaga bormaydi: o'chirilgan mahsulot apply_likes() da tashlab yuboriladi.
+        if attrs.get('liked') is not None and buffer is not None and buffer.accepting():
+            return attrs
+        if not Product.objects.filter(id=attrs['product_id']).exists():
+            raise serializers.ValidationError({'product_id': ["Bunday mahsulot mavjud emas."]})
+        return attrs
+
+    def toggle_result(self, product_id, liked):
+        if not liked:
+            return {"product_id": product_id, "liked": False, "message": "Like olib tashlandi"}
+        return {"product_id": product_id, "liked": True, "message": "Mahsulot yoqtirildi"}
 
     def toggle_like(self):
         user = self.context['request'].user
-        product = Product.objects.get(id=self.validated_data['product_id'])
-
-        like, created = Like.objects.get_or_create(user=user, product=product)
-        if not created:
-            like.delete()
-            return {"product_id": product.id, "liked": False, "message": "Like olib tashlandi"}
-        return {"product_id": product.id, "liked": True, "message": "Mahsulot yoqtirildi"}
-
-
-class OrderProductSafeSerializer(serializers.ModelSerializer):
+        product_id = self.validated_data['product_id']
+        liked = self.validated_data.get('liked')
+        buffer = like_buffer()
+        if liked is not None:
+            if buffer is not None:
+                # Write-behind: holat umumiy keshda o'zgaradi, Like jadvaliga partiya bilan yoziladi.
+                return self.toggle_result(product_id, buffer.set(user.pk, product_id, liked))
+            apply_likes({(user.pk, product_id): liked})
+            return self.toggle_result(product_id, liked)
+        if buffer is not None:
+            # Almashtirish joriy holatga bog'liq, shuning uchun buferlanmaydi: avval
+            # kutilayotgan holatlar yoziladi, keyin bazada almashtiriladi.
+            buffer.flush(user.pk)
+
+        product = Product.objects.get(id=product_id)
+
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(user=user, product=product)
+            if created:
+                Product.objects.filter(id=product.id).update(
+                    like_count=F('like_count') + 1, updated_at=timezone.now()
+                )
+            else:
+                like.delete()
+                Product.objects.filter(id=product.id, like_count__gt=0).update(
+                    like_count=F('like_count') - 1, updated_at=timezone.now()
+                )
+            transaction.on_commit(lambda: bump_product(product.id))
+
+        return self.toggle_result(product.id, created)
+
+
+class OrderProductSafeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product = ProductShortSerializer(read_only=True)
 
     class Meta:
@@ -247,7 +316,7 @@ class OrderProductSafeSerializer(serializers.ModelSerializer):
         ]
 
 
-class OrderProductCreateSerializer(serializers.ModelSerializer):
+class OrderProductCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
 
     class Meta:
@@ -258,15 +327,88 @@ class OrderProductCreateSerializer(serializers.ModelSerializer):
             'quantity',
         ]
 
+    def validate_quantity(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Miqdor 1 dan katta bo'lishi kerak.")
+        return value
+
     def create(self, validated_data):
         user = self.context['request'].user
         total_price = validated_data['quantity'] * validated_data['product'].price
         validated_data['total_price'] = total_price
         validated_data['user'] = user
-        return super().create(validated_data)
-
+        with transaction.atomic():
+            if not reserve_stock(validated_data['product'].id, validated_data['quantity']):
+                raise serializers.ValidationError({"quantity": "Omborda yetarli mahsulot yo'q."})
+            return super().create(validated_data)
+
+
+class OrderBulkItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class OrderBulkCreateSerializer(serializers.Serializer):
+    """
+    Savatchadagi barcha mahsulotlar uchun buyurtmalarni bitta tranzaksiyada yaratadi.
+    Mahsulotlar bitta in_bulk, ombor bitta UPDATE, buyurtmalar bitta bulk_create bilan yoziladi.
+    """
+    max_items = 100
+
+    items = OrderBulkItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        if len(items) > self.max_items:
+            raise serializers.ValidationError(f"Bir martada ko'pi bilan {self.max_items} ta mahsulot.")
+
+        products = Product.objects.in_bulk({item['product'] for item in items})
+        needed = {}
+        for item in items:
+            needed[item['product']] = needed.get(item['product'], 0) + item['quantity']
+
+        errors = []
+        for item in items:
+            product = products.get(item['product'])
+            if product is None:
+                errors.append({"product": ["Bunday mahsulot mavjud emas."]})
+            elif product.stock < needed[product.id]:
+                errors.append({"quantity": ["Omborda yetarli mahsulot yo'q."]})
+            else:
+                errors.append({})
+                item['product'] = product
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
 
-class OrderProductUpdateSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        user = self.context['request'].user
+        items = validated_data['items']
+
+        needed = {}
+        for item in items:
+            needed[item['product'].id] = needed.get(item['product'].id, 0) + item['quantity']
+
+        orders = [
+            OrderProduct(
+                user=user,
+                product=item['product'],
+                quantity=item['quantity'],
+                total_price=item['product'].price * item['quantity'],
+            )
+            for item in items
+        ]
+        for order in orders:
+            stamp_order(order)
+        with transaction.atomic():
+            if not reserve_stock_bulk(needed):
+                raise serializers.ValidationError({"items": "Omborda yetarli mahsulot yo'q."})
+            created = OrderProduct.objects.bulk_create(orders)
+            # bulk_create signallarni chaqirmaydi, savdo yig'indilarini shu yerda yangilaymiz.
+            record_orders(created)
+            return created
+
+
+class OrderProductUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product = serializers.PrimaryKeyRelatedField(
         queryset=Product.objects.all(),
         required=False
@@ -308,12 +450,31 @@ class OrderProductUpdateSerializer(serializers.ModelSerializer):
 
         total_price = product.price * Decimal(quantity)
 
-        instance.product = product
-        instance.quantity = quantity
-
-        if 'status' in validated_data:
-            instance.status = validated_data['status']
-
-        instance.total_price = total_price
-        instance.save()
+        with transaction.atomic():
+            current = OrderProduct.objects.select_for_update().get(pk=instance.pk)
+            if current.product_id == instance.product_id:
+                current.product = instance.product
+            new_status = validated_data.get('status', current.status)
+            self.move_reservation(current, product, quantity, new_status)
+
+            instance.product = product
+            instance.quantity = quantity
+            instance.status = new_status
+            instance.total_price = total_price
+            # Yig'indilar pre_save/post_save signallarida eski qatordan yangisiga ko'chiriladi.
+            instance.save()
         return instance
+
+    def move_reservation(self, current, product, quantity, new_status):
+        """
+        Bekor qilingan buyurtma ombordan joy egallamaydi. Eski band qilingan miqdor
+        qaytariladi va yangisi shartli UPDATE bilan band qilinadi.
+        """
+        old = None if current.status == 'cancelled' else (current.product_id, current.quantity)
+        new = None if new_status == 'cancelled' else (product.id, quantity)
+        if old == new:
+            return
+        if old:
+            release_stock(*old)
+        if new and not reserve_stock(*new):
+            raise serializers.ValidationError({"quantity": "Omborda yetarli mahsulot yo'q."})
@@ -1,8 +1,132 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
-from .models import User, UserProfile
+from django.conf import settings
+from .models import User, UserProfile, Brand, Product, ProductImage, OrderProduct
+from .analytics import move_order, record_orders, stamp_order
+from .authentication import user_cache
+from .cache import bump_product, bump_related
+from .images import needs_variants, schedule_variants
+from .jobs import enqueue
+from . import search, tasks
 
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        UserProfile.objects.create(user=instance)
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    # Bitta INSERT: profil ro'yxatdan o'tish bilan birga paydo bo'ladi, navbatga hech narsa qo'yilmaydi.
+    if created and not raw:
+        UserProfile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_responses(sender, instance, created, **kwargs):
+    if not created:
+        bump_related()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_state(sender, instance, **kwargs):
+    user_cache().invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_responses(sender, instance, **kwargs):
+    bump_product(instance.pk)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_product_image_responses(sender, instance, **kwargs):
+    bump_product(instance.product_id)
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def invalidate_brand_responses(sender, instance, **kwargs):
+    bump_related()
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    search.index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver(pre_delete, sender=Brand)
+def remember_brand_products(sender, instance, **kwargs):
+    instance._search_product_ids = list(instance.products.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def reindex_brand_products(sender, instance, **kwargs):
+    product_ids = getattr(instance, '_search_product_ids', None)
+    if product_ids is None:
+        product_ids = instance.products.values_list('id', flat=True)
+    search.index_products(product_ids)
+
+
+def variants_queued():
+    return getattr(settings, 'STORE_IMAGE_VARIANTS', {}).get('QUEUE', True)
+
+
+@receiver(post_save, sender=ProductImage)
+def build_product_image_variants(sender, instance, **kwargs):
+    if not needs_variants(instance.image, instance.variants):
+        return
+    if variants_queued():
+        enqueue(tasks.build_product_image_variants, instance.pk)
+    else:
+        product_id = instance.product_id
+        schedule_variants(instance, 'image', 'variants', on_saved=lambda: bump_product(product_id))
+
+
+@receiver(post_save, sender=Brand)
+def build_brand_logo_variants(sender, instance, **kwargs):
+    if not needs_variants(instance.logo, instance.logo_variants):
+        return
+    if variants_queued():
+        enqueue(tasks.build_brand_logo_variants, instance.pk)
+    else:
+        schedule_variants(instance, 'logo', 'logo_variants', on_saved=bump_related)
+
+
+@receiver(pre_save, sender=OrderProduct)
+def remember_order_rollup(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Avvalgi holat bazadan o'qiladi: admin yoki boshqa joydagi save() ham yig'indini to'g'ri ko'chiradi.
+    if raw:
+        return
+    previous = None
+    if instance.pk is not None:
+        previous = OrderProduct.objects.filter(pk=instance.pk).only(
+            'created_at', 'status', 'product_id', 'rollup_brand_id', 'rollup_seller_id', 'quantity', 'total_price',
+        ).first()
+    instance._rollup_previous = previous
+    if previous is not None and update_fields is not None and 'rollup_seller_id' not in update_fields:
+        # Bu saqlashda brend/sotuvchi bazaga yozilmaydi: yig'indi ham eski qatorlarda qoladi.
+        instance.rollup_brand_id = previous.rollup_brand_id
+        instance.rollup_seller_id = previous.rollup_seller_id
+    else:
+        stamp_order(instance)
+
+
+@receiver(post_save, sender=OrderProduct)
+def add_order_to_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is None:
+        record_orders([instance])
+    else:
+        move_order(previous, instance)
+    instance._rollup_previous = None
+
+
+@receiver(post_delete, sender=OrderProduct)
+def remove_order_from_rollups(sender, instance, **kwargs):
+    # rollup_brand_id/rollup_seller_id yozilgan paytdagi qiymatlar: mahsulot keyin o'zgargan bo'lsa ham.
+    record_orders([instance], sign=-1)
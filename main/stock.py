@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.utils import timezone
+
+from .cache import bump_product
+from .models import Product
+
+
+def reserve_stock(product_id, quantity):
+    """
+    Shartli UPDATE ... SET stock = stock - q WHERE stock >= q.
+    Qator bazada atomar kamaytiriladi, shuning uchun parallel buyurtmalar ortiqcha sotmaydi.
+    """
+    reserved = Product.objects.filter(id=product_id, stock__gte=quantity).update(
+        stock=F('stock') - quantity, updated_at=timezone.now()
+    )
+    if reserved:
+        transaction.on_commit(lambda: bump_product(product_id))
+    return bool(reserved)
+
+
+def release_stock(product_id, quantity):
+    Product.objects.filter(id=product_id).update(stock=F('stock') + quantity, updated_at=timezone.now())
+    transaction.on_commit(lambda: bump_product(product_id))
+
+
+def reserve_stock_bulk(quantities):
+    """
+    {product_id: miqdor} ni bitta UPDATE ... CASE so'rovida band qiladi.
+    Biror mahsulotda yetarli qoldiq bo'lmasa False qaytadi, chaqiruvchi tranzaksiyani bekor qilishi kerak.
+    """
+    if not quantities:
+        return True
+    amount = Case(
+        *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=PositiveIntegerField(),
+    )
+    reserved = Product.objects.filter(id__in=list(quantities), stock__gte=amount).update(
+        stock=F('stock') - amount, updated_at=timezone.now()
+    )
+    if reserved != len(quantities):
+        return False
+    transaction.on_commit(lambda: [bump_product(product_id) for product_id in quantities])
+    return True
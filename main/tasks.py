@@ -0,0 +1,22 @@
+"""Navbat orqali fon rejimida bajariladigan vazifalar (main.jobs.enqueue)."""
+from .cache import bump_product, bump_related
+from .images import render_variants, save_variants, variant_job, needs_variants
+from .models import Brand, ProductImage
+
+
+def build_product_image_variants(image_id):
+    image = ProductImage.objects.filter(id=image_id).first()
+    if image is None or not needs_variants(image.image, image.variants):
+        return
+    name = image.image.name
+    if save_variants(ProductImage, image.id, 'image', 'variants', name, render_variants(*variant_job(name))):
+        bump_product(image.product_id)
+
+
+def build_brand_logo_variants(brand_id):
+    brand = Brand.objects.filter(id=brand_id).first()
+    if brand is None or not needs_variants(brand.logo, brand.logo_variants):
+        return
+    name = brand.logo.name
+    if save_variants(Brand, brand.id, 'logo', 'logo_variants', name, render_variants(*variant_job(name))):
+        bump_related()
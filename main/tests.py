@@ -1,3 +1,1724 @@
-from django.test import TestCase
+import base64
+import importlib
+import io
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from .authentication import user_cache
+from .cache import CATALOG_VERSION, DjangoCacheBackend, LocMemLRUCache, response_cache
+from .instrumentation import registry
+from .jobs import claim_jobs, enqueue, requeue_stale_jobs, run_pending
+from .likes import LikeBuffer, like_buffer
+from . import checks, recommendations, search
+from .models import (
+    User, UserProfile, Brand, Product, ProductImage, Like, OrderProduct, Job, SalesRollup, RelatedProduct,
+    RecommendationRun, ImportCheckpoint,
+)
+from .routers import replica_reads
+from .search import search_product_ids
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Har bir o'qish endpointi qatorlar soniga bog'liq bo'lmagan
+    qat'iy SQL so'rovlar byudjetida ishlashi kerak (N+1 yo'q).
+    """
+    sizes = (10, 100, 1000)
+
+    # url: (sahifalangan, ?paginate=false). ETag uchun agregat so'rov ham hisobga olingan
+    # (katalog ro'yxati ETag ni versiya hisoblagichlaridan oladi), mahsulot ro'yxatlarida
+    # esa is_liked uchun bitta like so'rovi.
+    budgets = {
+        '/products/': (3, 2),
+        '/products/my/': (3, 3),
+        '/likes/': (1, 1),
+        '/orders/': (2, 2),
+        '/product-images/': (1, 1),
+    }
+
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret123')
+        self.client.force_authenticate(self.user)
+
+    def seed(self, size):
+        sellers = User.objects.bulk_create(
+            User(username=f'seller{i}', email=f'seller{i}@example.com') for i in range(size)
+        )
+        brands = Brand.objects.bulk_create(Brand(name=f'brand{i}') for i in range(size))
+        products = Product.objects.bulk_create(
+            Product(
+                user=self.user if i % 2 else sellers[i],
+                brand=brands[i],
+                name=f'product{i}',
+                price=Decimal('10.00'),
+                stock=5,
+            )
+            for i in range(size)
+        )
+        ProductImage.objects.bulk_create(
+            ProductImage(product=product, image='product_images/x.jpg') for product in products
+        )
+        Like.objects.bulk_create(Like(user=self.user, product=product) for product in products)
+        OrderProduct.objects.bulk_create(
+            OrderProduct(user=self.user, product=product, quantity=1, total_price=product.price)
+            for product in products
+        )
+
+    def test_list_endpoints_stay_within_budget(self):
+        for size in self.sizes:
+            with self.subTest(size=size):
+                self.seed(size)
+                for url, budgets in self.budgets.items():
+                    for query, budget in zip(('', '?paginate=false'), budgets):
+                        with self.assertNumQueries(budget):
+                            response = self.client.get(url + query)
+                        self.assertEqual(response.status_code, 200, url)
+                Product.objects.all().delete()
+                User.objects.exclude(pk=self.user.pk).delete()
+                Brand.objects.all().delete()
+
+    def test_detail_endpoints_stay_within_budget(self):
+        self.seed(10)
+        product = Product.objects.first()
+        order = OrderProduct.objects.first()
+        image = ProductImage.objects.first()
+        for url, budget in (
+            (f'/products/{product.pk}/detail/', 3),
+            (f'/orders/{order.pk}/detail/', 2),
+            (f'/product-images/{image.pk}/', 1),
+        ):
+            with self.assertNumQueries(budget):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='seller', email='seller@example.com', password='secret123')
+        self.brand = Brand.objects.create(name='Acme')
+        self.product = Product.objects.create(user=self.user, brand=self.brand, name='Phone', price=Decimal('99.00'))
+
+    def test_repeat_request_is_served_from_cache(self):
+        url = f'/products/{self.product.pk}/detail/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.json()['name'], 'Phone')
+
+    def test_writes_invalidate_cached_responses(self):
+        detail_url = f'/products/{self.product.pk}/detail/'
+        self.client.get('/products/')
+        self.client.get(detail_url)
+
+        self.product.name = 'Tablet'
+        self.product.save()
+        self.assertEqual(self.client.get('/products/').json()['results'][0]['name'], 'Tablet')
+        self.assertEqual(self.client.get(detail_url).json()['name'], 'Tablet')
+
+        self.brand.name = 'Globex'
+        self.brand.save()
+        self.assertEqual(self.client.get(detail_url).json()['brand']['name'], 'Globex')
+
+    def test_workers_share_version_counters(self):
+        first, second = LocMemLRUCache(), LocMemLRUCache()
+        before = second.get_version(CATALOG_VERSION)
+        first.bump_version(CATALOG_VERSION)
+        self.assertEqual(second.get_version(CATALOG_VERSION), before + 1)
+
+    def test_clear_keeps_other_shared_cache_keys(self):
+        caches['default'].set('other-key', 'kept')
+        backend = DjangoCacheBackend()
+        backend.set('entry', 'body')
+        response_cache().clear()
+        backend.clear()
+        self.assertEqual(caches['default'].get('other-key'), 'kept')
+        self.assertIsNone(backend.get('entry'))
+
+    def test_entries_expire_and_lost_counters_move_forward(self):
+        cache = LocMemLRUCache(timeout=300)
+        cache.set('fresh', 'body')
+        cache.set('stale', 'body', timeout=0)
+        self.assertEqual(cache.get('fresh'), 'body')
+        self.assertIsNone(cache.get('stale'))
+
+        cache.bump_version(CATALOG_VERSION)
+        before = cache.get_version(CATALOG_VERSION)
+        caches['default'].delete(f'store-response:version:{CATALOG_VERSION}')
+        self.assertGreater(cache.get_version(CATALOG_VERSION), before)
+
+    def test_local_memory_version_cache_fails_system_check(self):
+        self.assertEqual(checks.shared_response_cache(None), [])
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=local):
+            self.assertEqual([error.id for error in checks.shared_response_cache(None)], ['main.E001'])
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.client.get('/products/')
+        response = self.client.get('/products/', HTTP_AUTHORIZATION='Bearer invalid')
+        self.assertNotIn('X-Cache', response)
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='seller', email='seller@example.com', password='secret123')
+        self.brand = Brand.objects.create(name='Samsung')
+        self.galaxy = Product.objects.create(
+            user=self.user, brand=self.brand, name='Galaxy S24', description='Flagship phone', price=Decimal('900.00')
+        )
+        self.case = Product.objects.create(
+            user=self.user, brand=None, name='Phone case', description='Fits Galaxy S24', price=Decimal('10.00')
+        )
+
+    def search(self, query):
+        response = self.client.get('/products/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()]
+
+    def test_ranks_name_matches_first(self):
+        self.assertEqual(self.search('galaxy'), [self.galaxy.pk, self.case.pk])
+        self.assertEqual(self.search('samsung'), [self.galaxy.pk])
+        self.assertEqual(self.search('gal'), [self.galaxy.pk, self.case.pk])
+
+    def test_best_match_is_found_among_many_newer_matches(self):
+        accessories = Product.objects.bulk_create([
+            Product(user=self.user, name=f'Accessory {index}', description='Works with Galaxy', price=Decimal('5.00'))
+            for index in range(250)
+        ])
+        search.index_products([product.pk for product in accessories])
+        self.assertEqual(self.search('galaxy')[0], self.galaxy.pk)
+
+    def test_diacritics_are_ignored_on_both_sides(self):
+        cafe = Product.objects.create(user=self.user, name='Café lamp', price=Decimal('20.00'))
+        self.assertEqual(self.search('cafe'), [cafe.pk])
+        self.assertEqual(self.search('CAFÉ'), [cafe.pk])
+        self.assertEqual(search.tokenize('Crème Brûlée'), ['creme', 'brulee'])
+
+    def test_migration_fills_index_through_rebuild_index(self):
+        migration = importlib.import_module('main.migrations.0003_product_search_index')
+        cafe = Product.objects.create(user=self.user, name='Café lamp', price=Decimal('20.00'))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.SQLITE_TABLE}")
+        self.assertEqual(self.search('cafe'), [])
+
+        editor = mock.Mock(connection=connection)
+        editor.execute.side_effect = lambda sql: connection.cursor().execute(sql)
+        with mock.patch('main.search.rebuild_index', wraps=search.rebuild_index) as rebuild:
+            migration.create_search_index(None, editor)
+        rebuild.assert_called_once_with(using=connection.alias)
+        self.assertEqual(self.search('cafe'), [cafe.pk])
+        self.assertEqual(self.search('galaxy'), [self.galaxy.pk, self.case.pk])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.galaxy.name = 'Pixel 9'
+        self.galaxy.save()
+        self.assertEqual(self.search('pixel'), [self.galaxy.pk])
+
+        self.brand.name = 'Google'
+        self.brand.save()
+        self.assertEqual(self.search('google'), [self.galaxy.pk])
+
+        self.galaxy.delete()
+        self.assertEqual(self.search('pixel'), [])
+
+    def test_query_is_required(self):
+        self.assertEqual(self.client.get('/products/search/').status_code, 400)
+
+
+class AsyncCatalogTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='seller', email='seller@example.com', password='secret123')
+        self.brand = Brand.objects.create(name='Samsung')
+        self.products = [
+            Product.objects.create(
+                user=self.user, brand=self.brand if i % 2 else None, name=f'Galaxy {i}',
+                ram='8GB', price=Decimal('100.00') + i,
+            )
+            for i in range(5)
+        ]
+
+    async def test_list_pages_match_sync_view(self):
+        sync = await sync_to_async(self.client.get)('/products/', {'page_size': 100, 'brand': self.brand.pk})
+        response = await self.async_client.get('/async/products/', {'page_size': 100, 'brand': self.brand.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], sync.json()['results'])
+        self.assertEqual(response.json()['facets'], sync.json()['facets'])
+
+        seen, url = [], '/async/products/?page_size=2'
+        while url:
+            data = (await self.async_client.get(url)).json()
+            seen += [item['id'] for item in data['results']]
+            url = data['next']
+        self.assertEqual(seen, [product.pk for product in reversed(self.products)])
+
+        # Cursor sinxron ro'yxat bilan umumiy.
+        sync_next = (await sync_to_async(self.client.get)('/products/', {'page_size': 2})).json()['next']
+        cursor = parse_qs(urlparse(sync_next).query)['cursor'][0]
+        data = (await self.async_client.get('/async/products/', {'page_size': 2, 'cursor': cursor})).json()
+        self.assertEqual([item['id'] for item in data['results']], [product.pk for product in self.products[2:0:-1]])
+
+        self.assertEqual((await self.async_client.get('/async/products/', {'cursor': 'bad'})).status_code, 404)
+        self.assertEqual((await self.async_client.get('/async/products/', {'price_min': 'x'})).status_code, 400)
+
+    async def test_detail_and_search_match_sync_views(self):
+        pk = self.products[1].pk
+        sync = await sync_to_async(self.client.get)(f'/products/{pk}/detail/')
+        response = await self.async_client.get(f'/async/products/{pk}/detail/')
+        self.assertEqual(response.json(), sync.json())
+        self.assertEqual((await self.async_client.get('/async/products/0/detail/')).status_code, 404)
+
+        sync = await sync_to_async(self.client.get)('/products/search/', {'q': 'galaxy'})
+        response = await self.async_client.get('/async/products/search/', {'q': 'galaxy'})
+        self.assertEqual(response.json(), sync.json())
+        self.assertEqual((await self.async_client.get('/async/products/search/')).status_code, 400)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='seller', email='seller@example.com', password='secret123')
+        self.brand = Brand.objects.create(name='Samsung')
+        self.products = [
+            Product.objects.create(
+                user=self.user, brand=self.brand, name=f'Galaxy {i}', description='uzun tavsif ' * 50,
+                ram='8GB', price=Decimal('100.00') + i, stock=10,
+            )
+            for i in range(3)
+        ]
+
+    def test_fields_narrow_response_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/products/', {'fields': 'id,name,price', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0], {
+            'id': self.products[2].pk, 'name': 'Galaxy 2', 'price': '102.00',
+        })
+        page = next(query['sql'] for query in queries.captured_queries if 'LIMIT' in query['sql'])
+        self.assertNotIn('description', page)
+        self.assertNotIn('JOIN', page)
+
+        next_page = self.client.get(response.json()['next'])
+        self.assertEqual([item['id'] for item in next_page.json()['results']], [self.products[0].pk])
+
+    def test_relations_collapse_to_id_unless_expanded(self):
+        pk = self.products[0].pk
+        data = self.client.get(f'/products/{pk}/detail/', {'fields': 'id,user,brand'}).json()
+        self.assertEqual(data, {'id': pk, 'user': self.user.pk, 'brand': self.brand.pk})
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(f'/products/{pk}/detail/', {'fields': 'id,brand.name', 'expand': 'user'}).json()
+        self.assertEqual(data, {'id': pk, 'brand': {'name': 'Samsung'}})
+        sql = queries.captured_queries[-1]['sql']
+        self.assertIn('main_brand', sql)
+        self.assertNotIn('main_user', sql)
+
+        full = self.client.get(f'/products/{pk}/detail/').json()
+        self.assertEqual(full['user']['username'], 'seller')
+        self.assertEqual(full['brand']['name'], 'Samsung')
+
+    def test_likes_and_orders(self):
+        self.client.force_authenticate(self.user)
+        Like.objects.create(user=self.user, product=self.products[0])
+        order = OrderProduct.objects.create(
+            user=self.user, product=self.products[1], quantity=2, total_price=Decimal('202.00'),
+        )
+
+        likes = self.client.get('/likes/', {'expand': 'product.brand', 'fields': 'product.name,product.brand'})
+        self.assertEqual(likes.json()['results'], [{
+            'product': {'name': 'Galaxy 0', 'brand': {
+                'id': self.brand.pk, 'name': 'Samsung', 'description': None, 'logo': None, 'logo_variants': {},
+            }},
+        }])
+
+        orders = self.client.get('/orders/', {'fields': 'id,status,product'})
+        self.assertEqual(orders.json()['results'], [{'id': order.pk, 'status': 'pending', 'product': self.products[1].pk}])
+        detail = self.client.get(f'/orders/{order.pk}/detail/', {'fields': 'total_price'})
+        self.assertEqual(detail.json(), {'total_price': '202.00'})
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/products/', {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.json()['fields'][0])
+        self.assertEqual(self.client.get('/products/', {'expand': 'name'}).status_code, 400)
+        self.assertEqual(self.client.get('/async/products/', {'fields': 'brand.secret'}).status_code, 400)
+
+    async def test_async_views_use_same_selection(self):
+        pk = self.products[0].pk
+        params = {'fields': 'id,name,brand.name'}
+        sync = await sync_to_async(self.client.get)(f'/products/{pk}/detail/', params)
+        response = await self.async_client.get(f'/async/products/{pk}/detail/', params)
+        self.assertEqual(response.json(), sync.json())
+
+        sync = await sync_to_async(self.client.get)('/products/', params)
+        response = await self.async_client.get('/async/products/', params)
+        self.assertEqual(response.json()['results'], sync.json()['results'])
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='sotuvchi', email='seller@example.com', password='secret123')
+        self.products = [
+            Product.objects.create(user=self.user, name=f'product{i}', price=Decimal('10.00'), stock=1)
+            for i in range(7)
+        ]
+
+    def walk(self, page_size):
+        ids, pages = [], []
+        url = f'/products/?page_size={page_size}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            ids.extend(item['id'] for item in pages[-1]['results'])
+            url = pages[-1]['next']
+            self.assertLess(len(pages), 50, 'cursor aylanib qoldi')
+        return ids, pages
+
+    def test_next_crosses_page_boundaries(self):
+        ids, pages = self.walk(3)
+        expected = list(Product.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual([len(page['results']) for page in pages], [3, 3, 1])
+        self.assertIsNone(pages[0]['previous'])
+        self.assertIsNotNone(pages[1]['previous'])
+
+    def test_tied_created_at_has_no_duplicates_or_gaps(self):
+        Product.objects.update(created_at=timezone.now())
+        response_cache().clear()
+        for page_size in (1, 2, 3):
+            with self.subTest(page_size=page_size):
+                ids, _ = self.walk(page_size)
+                self.assertEqual(ids, sorted((product.pk for product in self.products), reverse=True))
+
+    def test_previous_walks_back(self):
+        ids, pages = self.walk(3)
+        url, back = pages[-1]['previous'], []
+        while url:
+            data = self.client.get(url).json()
+            back = [item['id'] for item in data['results']] + back
+            url = data['previous']
+        self.assertEqual(back, ids[:-1])
+
+    def test_more_ties_than_offset_cutoff(self):
+        # Eski DRF cursor teng qiymatlarni OFFSET bilan o'tardi (offset_cutoff=1000) va aylanib qolardi.
+        Product.objects.bulk_create(
+            Product(user=self.user, name=f'bulk{i}', price=Decimal('10.00'), stock=1) for i in range(1250)
+        )
+        Product.objects.update(created_at=timezone.now())
+        response_cache().clear()
+        ids, pages = self.walk(100)
+        self.assertEqual(len(pages), 13)
+        self.assertEqual(ids, sorted(Product.objects.values_list('id', flat=True), reverse=True))
+
+    def test_tampered_cursor_is_rejected(self):
+        next_url = self.client.get('/products/?page_size=3').json()['next']
+        cursor = parse_qs(urlparse(next_url).query)['cursor'][0]
+        created_at, product_id = parse_qs(base64.urlsafe_b64decode(cursor).decode())['p']
+
+        def encode(*tokens):
+            return base64.urlsafe_b64encode(urlencode(tokens).encode()).decode()
+
+        for raw in (
+            'not-base64!!',
+            encode(('o', '-1')),
+            encode(('r', 'x')),
+            encode(('p', 'garbage'), ('p', product_id)),
+            encode(('p', created_at + 'x'), ('p', product_id)),
+            encode(('p', created_at), ('p', 'abc')),
+            encode(('p', created_at)),
+            encode(('p', created_at[:19]), ('p', product_id)),
+        ):
+            with self.subTest(cursor=raw):
+                response = self.client.get('/products/', {'page_size': 3, 'cursor': raw})
+                self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get('/products/', {'page_size': 3, 'cursor': cursor}).status_code, 200)
+
+
+class FastListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='sotuvchi', email='seller@example.com', password='secret123')
+        self.brand = Brand.objects.create(name='Samsung', description='Koreya')
+        Brand.objects.filter(pk=self.brand.pk).update(
+            logo='brand_logos/samsung.png',
+            logo_variants={'source': 'brand_logos/samsung.png', 'small': {'webp': 'brand_logos/variants/s.webp'}},
+        )
+        self.products = [
+            Product.objects.create(
+                user=self.user, brand=self.brand if i % 2 else None, name=f'Galaxy “{i}” \u2028 ёш',
+                description='tavsif', ram='8GB', color='black', price=Decimal('99.90') + i, stock=i,
+                is_available=bool(i % 3),
+            )
+            for i in range(5)
+        ]
+        for product in self.products[:3]:
+            Like.objects.create(user=self.user, product=product)
+            OrderProduct.objects.create(user=self.user, product=product, quantity=2, total_price=product.price * 2)
+
+    def get(self, url, params=None):
+        response_cache().clear()
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def assert_same_as_serializer(self, url, params=None):
+        fast = self.get(url, params)
+        with mock.patch('main.fastpath.build_plan', return_value=None):
+            slow = self.get(url, params)
+        self.assertEqual(fast, slow)
+        return fast
+
+    def test_lists_match_serializer_bytes(self):
+        self.client.force_authenticate(self.user)
+        for url, params in [
+            ('/products/', {'page_size': 2}),
+            ('/products/', {'ordering': '-price', 'page_size': 3}),
+            ('/products/', {'paginate': 'false'}),
+            ('/products/', {'fields': 'id,brand.logo,brand.logo_variants', 'expand': 'user'}),
+            ('/products/my/', None),
+            ('/likes/', None),
+            ('/likes/', {'fields': 'id,product.name,product.brand'}),
+            ('/orders/', None),
+            ('/orders/', {'fields': 'product,total_price'}),
+        ]:
+            with self.subTest(url=url, params=params):
+                self.assert_same_as_serializer(url, params)
+
+        data = json.loads(self.get('/products/', {'page_size': 2}))
+        self.assertIn('facets', data)
+        next_page = json.loads(self.get(data['next']))
+        self.assertEqual(
+            [item['id'] for item in next_page['results']], [self.products[2].pk, self.products[1].pk],
+        )
+
+    def test_list_does_not_build_model_instances(self):
+        self.client.force_authenticate(self.user)
+        with mock.patch.object(Product, 'from_db', side_effect=AssertionError('model yaratildi')):
+            self.get('/products/', {'page_size': 5})
+            self.get('/likes/')
+
+    def test_renderer_matches_json_renderer(self):
+        from rest_framework.renderers import JSONRenderer
+        from django.utils.translation import gettext_lazy
+
+        from .renderers import FastJSONRenderer
+
+        data = {
+            'price': Decimal('10.50'), 'at': timezone.now(), 'day': timezone.now().date(),
+            'text': 'a\u2028b\u2029 “c” \x01', 'lazy': gettext_lazy('Yes'), 1: [None, True, 1.5],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render({'big': 2 ** 70}), JSONRenderer().render({'big': 2 ** 70}))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4'),
+        )
+
+
+class LikedFlagTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret123')
+        self.products = [
+            Product.objects.create(user=self.user, name=f'Phone {i}', price=Decimal('10.00'), stock=5)
+            for i in range(4)
+        ]
+        Like.objects.create(user=self.user, product=self.products[1])
+
+    def login(self):
+        # Haqiqiy token: Authorization sarlavhasi bo'lmasa anonim javoblar keshi ishlatiladi.
+        user_cache().clear()
+        token = self.client.post('/token/', {'username': 'buyer', 'password': 'secret123'}).json()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def liked_map(self, results):
+        return {item['id']: item['is_liked'] for item in results}
+
+    def test_anonymous_responses_have_no_flag(self):
+        self.assertNotIn('is_liked', self.client.get('/products/').json()['results'][0])
+        self.assertNotIn('is_liked', self.client.get(f'/products/{self.products[0].pk}/detail/').json())
+
+    def test_list_flags_page_with_one_query(self):
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            results = self.client.get('/products/', {'page_size': 3}).json()['results']
+        self.assertEqual(self.liked_map(results), {
+            self.products[3].pk: False, self.products[2].pk: False, self.products[1].pk: True,
+        })
+        like_queries = [query['sql'] for query in queries.captured_queries if 'main_like' in query['sql']]
+        self.assertEqual(len(like_queries), 1)
+        self.assertIn(' IN (', like_queries[0])
+
+        unpaginated = self.client.get('/products/', {'paginate': 'false'}).json()
+        self.assertEqual(sum(item['is_liked'] for item in unpaginated), 1)
+
+        narrow = self.client.get('/products/', {'fields': 'id,is_liked', 'page_size': 1}).json()['results']
+        self.assertEqual(narrow, [{'id': self.products[3].pk, 'is_liked': False}])
+
+    def test_toggle_is_visible_in_detail_and_search(self):
+        self.login()
+        url = f'/products/{self.products[0].pk}/detail/'
+        first = self.client.get(url)
+        self.assertFalse(first.json()['is_liked'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/likes/toggle/', {'product_id': self.products[0].pk})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_liked'])
+        found = self.liked_map(self.client.get('/products/search/', {'q': 'phone'}).json())
+        self.assertEqual(found[self.products[0].pk], True)
+        self.assertEqual(found[self.products[2].pk], False)
+
+    def test_etag_depends_on_user(self):
+        url = f'/products/{self.products[1].pk}/detail/'
+        anonymous = self.client.get(url)['ETag']
+        self.login()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_liked'])
+
+    def test_status_endpoint(self):
+        self.assertEqual(self.client.get('/likes/status/', {'ids': '1'}).status_code, 401)
+        self.client.force_authenticate(self.user)
+        ids = f'{self.products[0].pk},{self.products[1].pk},{self.products[1].pk},999999'
+        with self.assertNumQueries(1):
+            response = self.client.get('/likes/status/', {'ids': ids})
+        self.assertEqual(response.json(), {
+            str(self.products[0].pk): False, str(self.products[1].pk): True, '999999': False,
+        })
+        self.assertEqual(self.client.get('/likes/status/', {'ids': '1,x'}).status_code, 400)
+        self.assertEqual(self.client.get('/likes/status/').status_code, 400)
+        self.assertEqual(self.client.get('/likes/status/', {'ids': ','.join(map(str, range(1, 102)))}).status_code, 400)
+
+
+@override_settings(STORE_LIKE_BUFFER={
+    'ENABLED': True, 'FLUSH_INTERVAL': None, 'BATCH_SIZE': 2, 'MAX_PENDING': 3, 'MAX_FAILURES': 1,
+})
+class LikeBufferTests(TestCase):
+    def setUp(self):
+        # Kutilayotgan holatlar umumiy keshda: oldingi ishga tushirishdan qolganlari o'qilmasin.
+        caches['default'].clear()
+        response_cache().clear()
+        user_cache().clear()
+        like_buffer().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret123')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='secret123')
+        self.products = [
+            Product.objects.create(user=self.other, name=f'Phone {i}', price=Decimal('10.00'), stock=5)
+            for i in range(5)
+        ]
+        token = self.client.post('/token/', {'username': 'buyer', 'password': 'secret123'}).json()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def tearDown(self):
+        like_buffer().clear()
+
+    def like(self, product, liked=True):
+        return self.client.post('/likes/toggle/', {'product_id': product.pk, 'liked': liked}).json()['liked']
+
+    def test_set_is_buffered_and_read_back(self):
+        url = f'/products/{self.products[0].pk}/detail/'
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(self.like(self.products[0]))
+        writes = [query['sql'] for query in queries.captured_queries if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertEqual(writes, [])
+        self.assertFalse(Like.objects.exists())
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_liked'])
+        self.assertEqual(self.client.get('/likes/status/', {'ids': self.products[0].pk}).json(), {str(self.products[0].pk): True})
+
+        self.assertFalse(self.like(self.products[0], False))
+        self.assertEqual(like_buffer().flush(), 1)
+        self.assertFalse(Like.objects.exists())
+
+    def test_buffered_tap_skips_product_lookup(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/likes/toggle/', {'product_id': 999999, 'liked': True})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([query['sql'] for query in queries.captured_queries if 'main_product' in query['sql']], [])
+        self.assertEqual(like_buffer().flush(), 1)
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(self.client.post('/likes/toggle/', {'product_id': 999999}).status_code, 400)
+
+    def test_other_worker_reads_and_flushes_pending(self):
+        self.assertTrue(self.like(self.products[0]))
+        # Keyingi so'rovlar boshqa worker jarayoniga tushadi: uning buferi bo'sh.
+        with mock.patch('main.likes._like_buffer', LikeBuffer()):
+            detail = self.client.get(f'/products/{self.products[0].pk}/detail/').json()
+            self.assertTrue(detail['is_liked'])
+            self.assertEqual(
+                self.client.get('/likes/status/', {'ids': self.products[0].pk}).json(), {str(self.products[0].pk): True}
+            )
+            results = self.client.get('/likes/').json()['results']
+        self.assertEqual([item['product']['id'] for item in results], [self.products[0].pk])
+        self.assertEqual(like_buffer().state(self.user.pk), {})
+        self.assertEqual(like_buffer().flush(), 0)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).like_count, 1)
+
+    def test_local_memory_cache_fails_system_check(self):
+        self.assertEqual(checks.shared_like_buffer(None), [])
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=local):
+            self.assertEqual([error.id for error in checks.shared_like_buffer(None)], ['main.E002'])
+
+    def test_repeated_sets_from_two_workers_count_once(self):
+        first, second = LikeBuffer(), LikeBuffer()
+        for buffer in (first, second):
+            buffer.set(self.user.pk, self.products[0].pk, True)
+            buffer.set(self.user.pk, self.products[0].pk, True)
+        first.flush()
+        second.flush()
+        self.assertEqual(Like.objects.filter(product=self.products[0]).count(), 1)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).like_count, 1)
+
+    def test_toggle_without_state_is_written_synchronously(self):
+        self.like(self.products[0])
+        response = self.client.post('/likes/toggle/', {'product_id': self.products[0].pk})
+        self.assertFalse(response.json()['liked'])
+        self.assertEqual(like_buffer().state(self.user.pk), {})
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).like_count, 0)
+
+    def test_flush_writes_batches_and_counts(self):
+        Like.objects.create(user=self.user, product=self.products[2])
+        Product.objects.filter(pk=self.products[2].pk).update(like_count=1)
+        self.assertTrue(self.like(self.products[0]))
+        self.assertTrue(self.like(self.products[1]))
+        self.assertFalse(self.like(self.products[2], False))
+        like_buffer().flush(self.other.pk)
+        self.assertFalse(Like.objects.filter(user=self.user, product=self.products[0]).exists())
+
+        self.assertEqual(like_buffer().flush(), 3)
+        like_buffer().set(self.other.pk, self.products[0].pk, True)
+        self.assertEqual(like_buffer().flush(), 1)
+        self.assertEqual(
+            set(Like.objects.values_list('user_id', 'product_id')),
+            {(self.user.pk, self.products[0].pk), (self.user.pk, self.products[1].pk), (self.other.pk, self.products[0].pk)},
+        )
+        counts = dict(Product.objects.values_list('id', 'like_count'))
+        self.assertEqual([counts[product.pk] for product in self.products[:3]], [2, 1, 0])
+        self.assertEqual(like_buffer().state(self.user.pk), {})
+
+    def test_like_list_reads_own_writes(self):
+        self.like(self.products[3])
+        results = self.client.get('/likes/').json()['results']
+        self.assertEqual([item['product']['id'] for item in results], [self.products[3].pk])
+        self.assertEqual(like_buffer().state(self.user.pk), {})
+
+    def test_full_buffer_falls_back_to_sync(self):
+        for product in self.products[:4]:
+            self.assertTrue(self.like(product))
+        # MAX_PENDING = 3: to'rtinchi holat kutilayotganlari bilan birga darhol yoziladi.
+        self.assertEqual(Like.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(like_buffer().state(self.user.pk), {})
+
+    def test_failed_flush_keeps_changes_and_falls_back(self):
+        self.like(self.products[0])
+        with mock.patch('main.likes.apply_likes', side_effect=RuntimeError('db yiqildi')):
+            with self.assertRaises(RuntimeError):
+                like_buffer().flush()
+        self.assertEqual(like_buffer().state(self.user.pk), {self.products[0].pk: True})
+        self.assertFalse(like_buffer().accepting())
+
+        self.assertTrue(self.like(self.products[1]))
+        self.assertEqual(Like.objects.filter(user=self.user).count(), 2)
+        self.assertTrue(like_buffer().accepting())
+
+    def test_close_writes_pending_and_stops_buffering(self):
+        buffer = LikeBuffer()
+        buffer.set(self.user.pk, self.products[0].pk, True)
+        buffer.close()
+        self.assertTrue(Like.objects.filter(user=self.user, product=self.products[0]).exists())
+
+        buffer.set(self.user.pk, self.products[1].pk, True)
+        self.assertEqual(buffer.state(self.user.pk), {})
+        self.assertEqual(Like.objects.filter(user=self.user).count(), 2)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TransactionTestCase):
+    """Asosiy test bazasi va vaqtinchalik SQLite fayl replika sifatida."""
+    databases = {'default'}
+
+    @classmethod
+    def setUpClass(cls):
+        # Replika test runner bilmaydigan qo'shimcha ulanish sifatida qo'shiladi.
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.settings['replica'] = {
+            **connections['default'].settings_dict,
+            'NAME': os.path.join(cls.replica_dir, 'replica.sqlite3'),
+        }
+        call_command('migrate', database='replica', verbosity=0)
+        cls.databases = {'default', 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        shutil.rmtree(cls.replica_dir, ignore_errors=True)
+
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='seller', email='seller@example.com', password='secret123')
+        Product.objects.create(user=self.user, name='primary', price=Decimal('1.00'))
+        # bulk_create: signallar asosiy bazaga yozmasligi uchun.
+        replica_user = User.objects.using('replica').bulk_create([User(username='seller', email='seller@example.com')])[0]
+        Product.objects.using('replica').bulk_create([Product(user=replica_user, name='replica', price=Decimal('1.00'))])
+
+    def names(self, response):
+        data = response.json()
+        return [item['name'] for item in (data['results'] if isinstance(data, dict) else data)]
+
+    def test_anonymous_catalog_reads_use_replica(self):
+        self.assertEqual(self.names(self.client.get('/products/')), ['replica'])
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.names(self.client.get('/products/my/')), ['primary'])
+
+    def test_authentication_reads_primary(self):
+        # Replikada hali yo'q foydalanuvchi: token replika o'qishlari ichida ham qabul qilinadi.
+        user_cache().clear()
+        User.objects.create_user(username='newcomer', email='newcomer@example.com', password='secret123')
+        token = self.client.post('/token/', {'username': 'newcomer', 'password': 'secret123'}).json()['access']
+        response = self.client.get('/products/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(response), ['replica'])
+
+    def test_replica_responses_are_cached_briefly(self):
+        brief = {**settings.STORE_RESPONSE_CACHE, 'REPLICA_TIMEOUT': 0}
+        with override_settings(STORE_RESPONSE_CACHE=brief):
+            # Replikadan o'qilgan javob REPLICA_TIMEOUT dan keyin qayta o'qiladi.
+            self.assertEqual(self.client.get('/products/')['X-Cache'], 'MISS')
+            self.assertEqual(self.client.get('/products/')['X-Cache'], 'MISS')
+            # Asosiy bazadan o'qilgani odatdagi timeout bilan.
+            with override_settings(DATABASE_REPLICAS=[]):
+                self.assertEqual(self.client.get('/products/', {'q': 1})['X-Cache'], 'MISS')
+                self.assertEqual(self.client.get('/products/', {'q': 1})['X-Cache'], 'HIT')
+
+    def test_writes_and_transactions_pin_reads_to_primary(self):
+        with replica_reads():
+            self.assertEqual(list(Product.objects.values_list('name', flat=True)), ['replica'])
+            Brand.objects.create(name='Apple')
+            self.assertEqual(list(Product.objects.values_list('name', flat=True)), ['primary'])
+        self.assertFalse(Brand.objects.using('replica').exists())
+
+        with replica_reads(), transaction.atomic():
+            self.assertEqual(list(Product.objects.values_list('name', flat=True)), ['primary'])
+
+        with override_settings(DATABASE_REPLICAS=[]), replica_reads():
+            self.assertEqual(list(Product.objects.values_list('name', flat=True)), ['primary'])
+
+
+class ProductFacetTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        user = User.objects.create_user(username='seller', email='seller@example.com', password='secret123')
+        apple = Brand.objects.create(name='Apple')
+        samsung = Brand.objects.create(name='Samsung')
+        self.apple = apple
+        Product.objects.create(user=user, brand=apple, name='A', ram='8GB', color='black', price=Decimal('1200'))
+        Product.objects.create(user=user, brand=apple, name='B', ram='8GB', color='white', price=Decimal('950'))
+        Product.objects.create(user=user, brand=samsung, name='C', ram='12GB', color='black', price=Decimal('450'))
+        Product.objects.create(user=user, brand=samsung, name='D', ram='4GB', color='black', price=Decimal('90'),
+                               is_available=False)
+
+    def test_filters_and_facets_follow_current_filter(self):
+        with self.assertNumQueries(2):  # sahifa, facetlar
+            response = self.client.get('/products/', {'color': 'black', 'is_available': 'true'})
+        data = response.json()
+        self.assertEqual(sorted(item['name'] for item in data['results']), ['A', 'C'])
+        facets = data['facets']
+        self.assertEqual({item['name']: item['count'] for item in facets['brand']}, {'Apple': 1, 'Samsung': 1})
+        self.assertEqual({item['value']: item['count'] for item in facets['ram']}, {'8GB': 1, '12GB': 1})
+        self.assertEqual({item['min']: item['count'] for item in facets['price'] if item['count']},
+                         {'300': 1, '1000': 1})
+
+    def test_brand_and_price_range(self):
+        response = self.client.get('/products/', {'brand': self.apple.pk, 'price_max': '1000'})
+        self.assertEqual([item['name'] for item in response.json()['results']], ['B'])
+
+
+class LikeCountTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret123')
+        self.client.force_authenticate(self.user)
+        self.popular = Product.objects.create(user=self.user, name='Popular', price=Decimal('10.00'))
+        self.quiet = Product.objects.create(user=self.user, name='Quiet', price=Decimal('10.00'))
+
+    def toggle(self, product):
+        return self.client.post('/likes/toggle/', {'product_id': product.pk}).json()['liked']
+
+    def test_toggle_updates_counter(self):
+        self.assertTrue(self.toggle(self.popular))
+        self.popular.refresh_from_db()
+        self.assertEqual(self.popular.like_count, 1)
+
+        self.assertFalse(self.toggle(self.popular))
+        self.popular.refresh_from_db()
+        self.assertEqual(self.popular.like_count, 0)
+
+    def test_explicit_state_is_idempotent(self):
+        for _ in range(2):
+            response = self.client.post('/likes/toggle/', {'product_id': self.popular.pk, 'liked': True})
+            self.assertTrue(response.json()['liked'])
+        self.popular.refresh_from_db()
+        self.assertEqual(self.popular.like_count, 1)
+
+        self.client.post('/likes/toggle/', {'product_id': self.popular.pk, 'liked': False})
+        self.popular.refresh_from_db()
+        self.assertEqual(self.popular.like_count, 0)
+
+    def test_popularity_ordering(self):
+        self.toggle(self.popular)
+        response = self.client.get('/products/', {'ordering': '-like_count'})
+        results = response.json()['results']
+        self.assertEqual([item['name'] for item in results], ['Popular', 'Quiet'])
+        self.assertEqual(results[0]['like_count'], 1)
+
+    def test_popularity_pages_have_no_duplicates_or_gaps(self):
+        # offset_cutoff (1000) dan ko'p teng qiymat: eski cursor shu yerda aylanib qolardi.
+        Product.objects.bulk_create([
+            Product(user=self.user, name=f'Tie {index}', price=Decimal('10.00'), like_count=index % 2)
+            for index in range(1250)
+        ])
+        # created_at ham teng: tartibni faqat id hal qiladi.
+        Product.objects.update(created_at=timezone.now())
+
+        for ordering in ('-like_count', 'price'):
+            expected = list(Product.objects.order_by(ordering, '-id').values_list('id', flat=True))
+            for fields in (None, 'id', 'id,name'):
+                with self.subTest(ordering=ordering, fields=fields):
+                    seen, pages = [], 0
+                    url, params = '/products/', {'ordering': ordering, 'page_size': 100}
+                    if fields:
+                        params['fields'] = fields
+                    while url:
+                        response = self.client.get(url, params)
+                        self.assertEqual(response.status_code, 200)
+                        body = response.json()
+                        seen.extend(item['id'] for item in body['results'])
+                        url, params, pages = body['next'], None, pages + 1
+                        self.assertLess(pages, 50, 'cursor aylanib qoldi')
+                    self.assertEqual(seen, expected)
+                    if fields:
+                        self.assertEqual(set(body['results'][0]), set(fields.split(',')))
+
+    def test_rebuild_command_repairs_drift(self):
+        Like.objects.create(user=self.user, product=self.quiet)
+        Product.objects.filter(pk=self.popular.pk).update(like_count=7)
+        call_command('rebuild_like_counts', stdout=StringIO())
+        self.assertEqual(
+            dict(Product.objects.values_list('name', 'like_count')),
+            {'Popular': 0, 'Quiet': 1},
+        )
+
+
+class StockReservationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret123')
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(user=self.user, name='Phone', price=Decimal('10.00'), stock=3)
+
+    def order(self, quantity):
+        return self.client.post('/orders/create/', {'product': self.product.pk, 'quantity': quantity})
+
+    def stock(self):
+        self.product.refresh_from_db()
+        return self.product.stock
+
+    def test_order_reserves_stock_and_never_oversells(self):
+        self.assertEqual(self.order(2).status_code, 201)
+        self.assertEqual(self.stock(), 1)
+        self.assertEqual(self.order(2).status_code, 400)
+        self.assertEqual(self.stock(), 1)
+        self.assertEqual(OrderProduct.objects.count(), 1)
+
+    def test_cancel_restocks_and_reopen_reserves_again(self):
+        order_id = self.order(3).json()['id']
+        url = f'/orders/{order_id}/update/'
+
+        self.client.patch(url, {'status': 'cancelled'})
+        self.assertEqual(self.stock(), 3)
+
+        self.client.patch(url, {'status': 'cancelled'})
+        self.assertEqual(self.stock(), 3)
+
+        self.assertEqual(self.client.patch(url, {'status': 'pending'}).status_code, 200)
+        self.assertEqual(self.stock(), 0)
+
+    def test_delete_releases_reservation_unless_cancelled(self):
+        order_id = self.order(2).json()['id']
+        self.assertEqual(self.stock(), 1)
+        self.assertEqual(self.client.delete(f'/orders/{order_id}/delete/').status_code, 204)
+        self.assertEqual(self.stock(), 3)
+
+        order_id = self.order(3).json()['id']
+        self.client.patch(f'/orders/{order_id}/update/', {'status': 'cancelled'})
+        self.assertEqual(self.stock(), 3)
+        self.assertEqual(self.client.delete(f'/orders/{order_id}/delete/').status_code, 204)
+        self.assertEqual(self.stock(), 3)
+        self.assertFalse(OrderProduct.objects.exists())
+
+    def test_quantity_change_moves_reservation(self):
+        order_id = self.order(1).json()['id']
+        url = f'/orders/{order_id}/update/'
+        self.assertEqual(self.client.patch(url, {'quantity': 3}).status_code, 200)
+        self.assertEqual(self.stock(), 0)
+        self.assertEqual(self.client.patch(url, {'quantity': 4}).status_code, 400)
+        self.assertEqual(self.stock(), 0)
+
+
+class BulkCheckoutTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret123')
+        self.client.force_authenticate(self.user)
+        self.products = Product.objects.bulk_create(
+            Product(user=self.user, name=f'product{i}', price=Decimal('5.00'), stock=10) for i in range(20)
+        )
+
+    def checkout(self, items):
+        return self.client.post('/orders/bulk/', {'items': items}, format='json')
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        for size in (1, 20):
+            items = [{'product': product.pk, 'quantity': 2} for product in self.products[:size]]
+            # in_bulk, savepoint, UPDATE, INSERT, savdo yig'indisi UPSERT, release
+            with self.assertNumQueries(6):
+                response = self.checkout(items)
+            self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(len(data['orders']), 20)
+        self.assertEqual(data['total_price'], '200.00')
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 6)
+
+    def test_reports_per_line_errors_and_writes_nothing(self):
+        response = self.checkout([
+            {'product': self.products[0].pk, 'quantity': 6},
+            {'product': 0, 'quantity': 1},
+            {'product': self.products[0].pk, 'quantity': 6},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['items']
+        self.assertEqual(list(errors[1]), ['product'])
+        self.assertEqual(list(errors[2]), ['quantity'])
+        self.assertFalse(OrderProduct.objects.exists())
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 10)
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.seller = User.objects.create_user(username='seller', email='seller@example.com', password='secret123')
+        self.buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret123')
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret123', is_staff=True,
+        )
+        self.brand = Brand.objects.create(name='Apple')
+        self.phone = Product.objects.create(
+            user=self.seller, brand=self.brand, name='iPhone', price=Decimal('10.00'), stock=50,
+        )
+        self.case = Product.objects.create(user=self.seller, name='Case', price=Decimal('2.50'), stock=50)
+
+    def rollup(self, dimension, key_id, status='pending'):
+        row = SalesRollup.objects.filter(dimension=dimension, key_id=key_id, status=status).first()
+        return (row.orders, row.units, row.revenue) if row else (0, 0, 0)
+
+    def test_rollups_follow_create_bulk_update_and_delete(self):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post('/orders/create/', {'product': self.phone.pk, 'quantity': 2}, format='json')
+        order_id = response.json()['id']
+        self.client.post('/orders/bulk/', {'items': [
+            {'product': self.phone.pk, 'quantity': 1},
+            {'product': self.case.pk, 'quantity': 4},
+        ]}, format='json')
+
+        self.assertEqual(self.rollup('total', 0), (3, 7, Decimal('40.00')))
+        self.assertEqual(self.rollup('product', self.phone.pk), (2, 3, Decimal('30.00')))
+        self.assertEqual(self.rollup('brand', self.brand.pk), (2, 3, Decimal('30.00')))
+        self.assertEqual(self.rollup('seller', self.seller.pk), (3, 7, Decimal('40.00')))
+
+        self.client.patch(f'/orders/{order_id}/update/', {'status': 'delivered'}, format='json')
+        self.assertEqual(self.rollup('product', self.phone.pk), (1, 1, Decimal('10.00')))
+        self.assertEqual(self.rollup('product', self.phone.pk, 'delivered'), (1, 2, Decimal('20.00')))
+
+        self.client.delete(f'/orders/{order_id}/delete/')
+        self.assertEqual(self.rollup('total', 0, 'delivered'), (0, 0, Decimal('0.00')))
+
+        expected = sorted(SalesRollup.objects.values_list('dimension', 'key_id', 'day', 'status', 'orders', 'units'))
+        call_command('rebuild_sales_rollups', chunk_size=1, stdout=StringIO())
+        rebuilt = SalesRollup.objects.exclude(orders=0)
+        self.assertEqual(
+            sorted(rebuilt.values_list('dimension', 'key_id', 'day', 'status', 'orders', 'units')),
+            [row for row in expected if row[4]],
+        )
+
+    def test_model_save_and_delete_use_recorded_brand_and_seller(self):
+        order = OrderProduct.objects.create(user=self.buyer, product=self.phone, quantity=2)
+        self.assertEqual(self.rollup('brand', self.brand.pk), (1, 2, Decimal('20.00')))
+
+        # Admin kabi to'g'ridan-to'g'ri save(): status o'zgarishi yig'indiga tushadi.
+        order.status = 'shipped'
+        order.save()
+        self.assertEqual(self.rollup('brand', self.brand.pk), (0, 0, Decimal('0.00')))
+        self.assertEqual(self.rollup('brand', self.brand.pk, 'shipped'), (1, 2, Decimal('20.00')))
+
+        other_brand = Brand.objects.create(name='Samsung')
+        other_seller = User.objects.create_user(username='seller2', email='seller2@example.com', password='secret123')
+        self.phone.brand = other_brand
+        self.phone.user = other_seller
+        self.phone.save()
+
+        OrderProduct.objects.get(pk=order.pk).delete()
+        self.assertEqual(self.rollup('brand', self.brand.pk, 'shipped'), (0, 0, Decimal('0.00')))
+        self.assertEqual(self.rollup('seller', self.seller.pk, 'shipped'), (0, 0, Decimal('0.00')))
+        self.assertFalse(SalesRollup.objects.filter(dimension='brand', key_id=other_brand.pk).exists())
+        self.assertFalse(SalesRollup.objects.filter(dimension='seller', key_id=other_seller.pk).exists())
+
+    def test_endpoint_reads_only_rollups(self):
+        self.client.force_authenticate(self.buyer)
+        self.client.post('/orders/bulk/', {'items': [
+            {'product': self.phone.pk, 'quantity': 1},
+            {'product': self.case.pk, 'quantity': 2},
+        ]}, format='json')
+
+        self.client.force_authenticate(self.admin)
+        with self.assertNumQueries(2):  # yig'indilar, nomlar
+            response = self.client.get('/analytics/sales/', {'group_by': 'product'})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([row['name'] for row in results], ['iPhone', 'Case'])
+        self.assertEqual(results[0]['revenue'], '10.00')
+
+        today = timezone.localdate().isoformat()
+        response = self.client.get('/analytics/sales/', {'date_from': today, 'status': 'pending'})
+        self.assertEqual(response.json()['results'], [
+            {'day': today, 'status': 'pending', 'orders': 2, 'units': 3, 'revenue': '15.00'},
+        ])
+        self.assertEqual(self.client.get('/analytics/sales/', {'date_from': 'kecha'}).status_code, 400)
+        self.assertEqual(self.client.get('/analytics/sales/', {'date_from': '2024-02-30'}).status_code, 400)
+        self.assertEqual(self.client.get('/analytics/sales/', {'date_to': '2024-13-01'}).status_code, 400)
+
+        self.client.force_authenticate(self.seller)
+        self.assertEqual(self.client.get('/analytics/sales/', {'group_by': 'brand'}).status_code, 403)
+        response = self.client.get('/analytics/sales/', {'group_by': 'seller'})
+        self.assertEqual(response.json()['results'][0]['name'], 'seller')
+
+
+class StatelessAuthTests(TestCase):
+    def setUp(self):
+        user_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret123')
+        token = self.client.post('/token/', {'username': 'buyer', 'password': 'secret123'}).json()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_user_is_not_loaded_on_every_request(self):
+        with self.assertNumQueries(3):  # foydalanuvchi holati + ETag agregati + sahifa
+            self.assertEqual(self.client.get('/orders/').status_code, 200)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get('/orders/').status_code, 200)
+
+    def test_deactivation_is_enforced_within_ttl(self):
+        self.client.get('/orders/')
+        User.objects.filter(pk=self.user.pk).update(is_active=False)  # signalsiz: kesh eskirguncha ruxsat bor
+        self.assertEqual(self.client.get('/orders/').status_code, 200)
+
+        later = time.monotonic() + settings.STORE_AUTH['USER_CACHE_TTL'] + 1
+        with mock.patch('main.authentication.time.monotonic', return_value=later):
+            self.assertEqual(self.client.get('/orders/').status_code, 401)
+
+    def test_save_invalidates_immediately_and_profile_keeps_user_fields(self):
+        response = self.client.patch('/profile/', {'bio': 'salom'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, 'buyer@example.com')
+        self.assertTrue(self.user.check_password('secret123'))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/orders/').status_code, 401)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        response_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='seller', email='seller@example.com', password='secret123')
+        Product.objects.create(user=self.user, name='Phone', price=Decimal('10.00'))
+
+    def test_server_timing_reports_queries_and_phases(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/products/')
+        timing = response['Server-Timing']
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, total;dur=[\d.]+$')
+
+    @override_settings(STORE_METRICS={'SLOW_REQUEST_MS': 0, 'SLOW_QUERY_MS': 0, 'WINDOW': 10})
+    def test_logs_slow_requests_and_queries_as_json(self):
+        with self.assertLogs('main.instrumentation', 'INFO') as logs:
+            self.client.get('/products/')
+        entries = {line.split(' ', 1)[0]: json.loads(line.split(' ', 1)[1]) for line in
+                   (record.getMessage() for record in logs.records)}
+        self.assertEqual(entries['slow_request']['view'], 'product-list')
+        self.assertEqual(entries['slow_request']['status'], 200)
+        self.assertIn('SELECT', entries['slow_query']['sql'])
+
+    async def test_async_views_are_not_adapted_to_threads(self):
+        with self.assertLogs('django.request', 'DEBUG') as logs:
+            logging.getLogger('django.request').debug('start')
+            ASGIHandler()
+        self.assertFalse([line for line in logs.output if 'RequestMetricsMiddleware' in line])
+
+        response = await self.async_client.get('/async/products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="[1-9]\d* queries", serialize;dur=[\d.]+')
+
+    def test_serializers_are_not_patched_globally(self):
+        from rest_framework import serializers
+
+        self.assertEqual(serializers.BaseSerializer.__dict__['data'].fget.__module__, 'rest_framework.serializers')
+
+    def test_metrics_endpoint_is_staff_only_prometheus_text(self):
+        for _ in range(3):
+            self.client.get('/products/')
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('store_request_duration_seconds{view="product-list",quantile="0.95"}', body)
+        self.assertIn('store_request_duration_seconds_count{view="product-list"} 3', body)
+
+
+class ImportProductsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='seller', email='seller@example.com', password='secret123')
+        Brand.objects.create(name='Apple')
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w') as fh:
+            fh.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        call_command('import_products', path, user='seller', stdout=StringIO(), stderr=StringIO(), **options)
+
+    def test_csv_import_validates_and_resolves_brands(self):
+        path = self.write('products.csv', (
+            'name,brand,price,stock,color\n'
+            'iPhone,Apple,999.00,5,black\n'
+            'Pixel,Google,799.00,3,white\n'
+            'Broken,Apple,-1,1,red\n'
+        ))
+        self.run_import(path, batch_size=1)
+        self.assertEqual(
+            dict(Product.objects.values_list('name', 'brand__name')),
+            {'iPhone': 'Apple', 'Pixel': 'Google'},
+        )
+        self.assertEqual(search_product_ids('pixel'), [Product.objects.get(name='Pixel').pk])
+
+    def test_ndjson_import_resumes_from_checkpoint(self):
+        rows = [json.dumps({'name': f'p{i}', 'price': '1.00', 'stock': 1}) for i in range(5)]
+        path = self.write('products.ndjson', '\n'.join(rows) + '\n')
+        ImportCheckpoint.objects.create(source=os.path.abspath(path), line=3)
+        self.run_import(path, batch_size=2)
+        self.assertEqual(sorted(Product.objects.values_list('name', flat=True)), ['p3', 'p4'])
+
+        self.run_import(path)
+        self.assertEqual(Product.objects.count(), 2)
+
+    def test_checkpoint_moves_with_the_batch(self):
+        rows = [json.dumps({'name': f'p{i}', 'price': '1.00', 'stock': 1}) for i in range(5)]
+        path = self.write('products.ndjson', '\n'.join(rows) + '\n')
+        index = 'main.management.commands.import_products.index_products'
+        with mock.patch(index, side_effect=[None, RuntimeError('disk to\'ldi')]):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, batch_size=2)
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get().line, 2)
+
+        self.run_import(path, batch_size=2)
+        self.assertEqual(sorted(Product.objects.values_list('name', flat=True)), [f'p{i}' for i in range(5)])
+
+    def test_bounded_fields_and_non_object_rows_are_row_errors(self):
+        path = self.write('products.ndjson', '\n'.join([
+            json.dumps({'name': 'ok', 'price': '1.00', 'ram': 8, 'color': 'red', 'brand': 'Apple'}),
+            json.dumps({'name': 'long ram', 'price': '1.00', 'ram': 'x' * 11}),
+            json.dumps({'name': 'long color', 'price': '1.00', 'color': 'x' * 31}),
+            json.dumps({'name': 'long brand', 'price': '1.00', 'brand': 'x' * 256}),
+            json.dumps(['name', 'price']),
+            json.dumps('just a string'),
+            '42',
+        ]) + '\n')
+        stderr = StringIO()
+        call_command('import_products', path, user='seller', stdout=StringIO(), stderr=stderr)
+        self.assertEqual(list(Product.objects.values_list('name', 'ram')), [('ok', '8')])
+        self.assertEqual(stderr.getvalue().count("o'tkazib yuborildi"), 6)
+        self.assertFalse(Brand.objects.filter(name__startswith='xxx').exists())
+
+        with self.assertRaisesMessage(CommandError, '2-qator: ram 10 belgidan uzun.'):
+            call_command('import_products', path, user='seller', no_resume=True, strict=True,
+                         stdout=StringIO(), stderr=StringIO())
+
+
+    def test_price_and_stock_use_model_limits(self):
+        path = self.write('products.csv', (
+            'name,price,stock\n'
+            'ok,12345678.99,2147483647\n'
+            'big,123456789012.5,1\n'
+            'frac,1.999,1\n'
+            'inf,Infinity,1\n'
+            'nan,NaN,1\n'
+            'text,abc,1\n'
+            'zero,0,1\n'
+            'huge stock,1.00,9223372036854775808\n'
+            'negative stock,1.00,-1\n'
+            'fractional stock,1.00,1.5\n'
+        ))
+        stderr = StringIO()
+        call_command('import_products', path, user='seller', stdout=StringIO(), stderr=stderr)
+        self.assertEqual(list(Product.objects.values_list('name', 'price', 'stock')), [
+            ('ok', Decimal('12345678.99'), 2147483647),
+        ])
+        self.assertEqual(stderr.getvalue().count("o'tkazib yuborildi"), 9)
+        self.assertEqual(self.client.get('/products/').status_code, 200)
+
+        with self.assertRaisesMessage(CommandError, '3-qator: price:'):
+            call_command('import_products', path, user='seller', no_resume=True, strict=True,
+                         stdout=StringIO(), stderr=StringIO())
+
+class SeedStoreTests(TestCase):
+    def seed(self, prefix):
+        call_command(
+            'seed_store', users=30, products=100, likes=400, orders=200, brands=5,
+            prefix=prefix, seed=7, stdout=StringIO(),
+        )
+        return list(
+            Product.objects.filter(user__username__startswith=f'{prefix}-')
+            .order_by('id').values_list('name', 'price', 'brand__name', 'like_count')
+        )
+
+    def test_generates_skewed_deterministic_data_without_signals(self):
+        first = self.seed('a')
+        self.assertEqual(len(first), 100)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(OrderProduct.objects.count(), 200)
+        self.assertFalse(UserProfile.objects.exists())
+        self.assertTrue(User.objects.get(username='a-3').check_password('password123'))
+        self.assertEqual(len(set(User.objects.values_list('password', flat=True))), 1)
+
+        like_counts = sorted((row[3] for row in first), reverse=True)
+        self.assertGreater(like_counts[0], 10 * like_counts[len(like_counts) // 2])
+        self.assertEqual(SalesRollup.objects.filter(dimension='total').aggregate(total=Sum('orders'))['total'], 200)
+        self.assertTrue(search_product_ids(first[0][0], limit=1))
+
+        self.assertEqual(self.seed('b'), first)
+        with self.assertRaises(CommandError):
+            self.seed('a')
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.seller = User.objects.create_user(username='seller', email='seller@example.com', password='secret123')
+        self.buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret123')
+        brand = Brand.objects.create(name='Acme')
+        product = Product.objects.create(user=self.seller, brand=brand, name='Phone', price=Decimal('10.00'), stock=9)
+        other = Product.objects.create(user=self.buyer, name='Other', price=Decimal('1.00'), stock=9)
+        OrderProduct.objects.create(user=self.buyer, product=product, quantity=2, status='delivered')
+        OrderProduct.objects.create(user=self.seller, product=other, quantity=1)
+
+    def export(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_seller_order_export_joins_names_and_filters_status(self):
+        self.client.force_authenticate(self.seller)
+        lines = self.export('/orders/export/', status='delivered').splitlines()
+        self.assertEqual(lines[0].split(',')[-4:], ['product_name', 'brand_name', 'buyer', 'seller'])
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].endswith('Phone,Acme,buyer,seller'))
+
+    def test_product_ndjson_export_is_scoped_to_owner(self):
+        self.client.force_authenticate(self.seller)
+        rows = [json.loads(line) for line in self.export('/products/export/', export_format='ndjson').splitlines()]
+        self.assertEqual([row['name'] for row in rows], ['Phone'])
+        self.assertEqual(rows[0]['brand_name'], 'Acme')
+
+    @override_settings(TIME_ZONE='Asia/Tashkent')
+    def test_date_filters_use_local_day_bounds_on_the_column(self):
+        self.client.force_authenticate(self.seller)
+        first, second = OrderProduct.objects.order_by('id')
+        zone = timezone.get_current_timezone()
+        OrderProduct.objects.filter(pk=first.pk).update(created_at=datetime(2024, 5, 10, 23, 30, tzinfo=zone))
+        OrderProduct.objects.filter(pk=second.pk).update(created_at=datetime(2024, 5, 11, 0, 10, tzinfo=zone))
+        with CaptureQueriesContext(connection) as queries:
+            lines = self.export('/orders/export/', date_from='2024-05-10', date_to='2024-05-10').splitlines()
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], [str(first.pk)])
+        self.assertFalse([query for query in queries.captured_queries if 'cast_date' in query['sql'].lower()])
+        lines = self.export('/orders/export/', date_from='2024-05-11').splitlines()
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], [str(second.pk)])
+
+    def test_invalid_filters_are_rejected(self):
+        self.client.force_authenticate(self.seller)
+        self.assertEqual(self.client.get('/orders/export/', {'date_from': 'yesterday'}).status_code, 400)
+        for impossible in ('2024-02-30', '2024-13-01'):
+            response = self.client.get('/orders/export/', {'date_to': impossible})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('YYYY-MM-DD', response.json()['detail'])
+        self.assertEqual(self.client.get('/orders/export/', {'export_format': 'xml'}).status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), STORE_IMAGE_VARIANTS={'WORKERS': 0, 'QUEUE': False})
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.addCleanup(shutil.rmtree, settings.MEDIA_ROOT, ignore_errors=True)
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='seller', email='seller@example.com', password='secret123')
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(user=self.user, name='Phone', price=Decimal('10.00'))
+
+    def upload(self, filename='photo.jpg', size=(1200, 800), fmt='JPEG'):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, fmt)
+        upload = SimpleUploadedFile(filename, buffer.getvalue(), content_type=f'image/{fmt.lower()}')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/product-images/', {'product': self.product.pk, 'image': upload})
+        self.assertEqual(response.status_code, 201)
+        return ProductImage.objects.get(pk=response.json()['id'])
+
+    def thumb_size(self, image):
+        with default_storage.open(image.variants['thumb']['webp']) as fh, Image.open(fh) as thumb:
+            return thumb.size
+
+    def test_upload_generates_resized_variants(self):
+        image = self.upload()
+        self.assertEqual(image.variants['source'], image.image.name)
+        self.assertEqual(self.thumb_size(image), (200, 133))
+
+        response = self.client.get(f'/product-images/{image.pk}/')
+        urls = response.json()['variants']
+        self.assertTrue(urls['medium']['jpeg'].startswith('http://testserver/media/'))
+
+    def test_same_stem_sources_do_not_share_variants(self):
+        landscape = self.upload('photo.jpg', (1200, 800), 'JPEG')
+        portrait = self.upload('photo.png', (800, 1200), 'PNG')
+        self.assertNotEqual(landscape.variants['thumb']['webp'], portrait.variants['thumb']['webp'])
+        self.assertEqual(self.thumb_size(landscape), (200, 133))
+        self.assertEqual(self.thumb_size(portrait), (133, 200))
+
+    def test_variants_are_queued_by_default(self):
+        with self.settings(STORE_IMAGE_VARIANTS={'WORKERS': 0}):
+            image = self.upload()
+        self.assertEqual(image.variants, {})
+        self.assertEqual(list(Job.objects.values_list('task', flat=True)), ['main.tasks.build_product_image_variants'])
+        self.assertEqual(run_pending(), 1)
+        image.refresh_from_db()
+        self.assertEqual(self.thumb_size(image), (200, 133))
+
+    def test_backfill_command_fills_missing_variants(self):
+        image = self.upload()
+        ProductImage.objects.filter(pk=image.pk).update(variants={})
+        call_command('backfill_image_variants', workers=1, stdout=StringIO())
+        image.refresh_from_db()
+        self.assertIn('thumb', image.variants)
+
+
+def flaky_task(marker):
+    raise RuntimeError(marker)
+
+
+class JobQueueTests(TestCase):
+    def test_registration_creates_profile_inline(self):
+        response = APIClient().post('/register/', {
+            'username': 'new', 'email': 'new@example.com', 'password': 'secret123',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(UserProfile.objects.filter(user__username='new').exists())
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(run_pending(), 0)
+
+    def test_a_claimed_job_is_not_claimed_twice(self):
+        enqueue('main.tasks.build_brand_logo_variants', 0)
+        self.assertEqual(len(claim_jobs('worker-a', limit=5)), 1)
+        self.assertEqual(claim_jobs('worker-b', limit=5), [])
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        job = enqueue(flaky_task, 'boom', max_attempts=2)
+        with self.assertLogs('main.jobs', level='WARNING'):
+            self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('boom', job.last_error)
+
+        self.assertEqual(run_pending(), 0)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('main.jobs', level='ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = enqueue('main.tasks.build_brand_logo_variants', 0)
+        claim_jobs('dead-worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.QUEUED)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='secret123')
+        self.product = Product.objects.create(user=self.user, name='Phone', price=Decimal('10.00'), stock=5)
+
+    def assertRevalidates(self, url, change, queries=1):
+        first = self.client.get(url)
+        etag = first['ETag']
+        self.assertEqual(first.has_header('Last-Modified'), bool(queries))
+
+        # Authorization sarlavhasi javob keshini chetlab o'tadi: faqat tekshiruv so'rovi qoladi.
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, HTTP_AUTHORIZATION='', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_product_detail(self):
+        def change():
+            self.product.name = 'Tablet'
+            self.product.save()
+        self.assertRevalidates(f'/products/{self.product.pk}/detail/', change)
+
+    def test_product_list_sees_new_rows(self):
+        # Katalog ro'yxati versiya hisoblagichlari bilan tekshiriladi: bazaga so'rov yo'q.
+        self.assertRevalidates('/products/', lambda: Product.objects.create(
+            user=self.user, name='New', price=Decimal('1.00')
+        ), queries=0)
+
+    def test_product_list_sees_bumps_from_other_processes(self):
+        # manage.py buyrug'i yoki boshqa worker: versiya hisoblagichlari umumiy keshda.
+        script = 'import django; django.setup(); from main.cache import bump_catalog; bump_catalog()'
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='core.settings')
+
+        def change():
+            subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env, check=True)
+        self.assertRevalidates('/products/', change, queries=0)
+
+    def test_detail_etag_depends_on_query_string(self):
+        url = f'/products/{self.product.pk}/detail/'
+        etag = self.client.get(url)['ETag']
+        sparse = self.client.get(url, {'fields': 'id,name'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(sparse.status_code, 200)
+        self.assertEqual(set(sparse.json()), {'id', 'name'})
+        self.assertNotEqual(sparse['ETag'], etag)
+        self.assertEqual(
+            self.client.get(url, {'fields': 'id,name'}, HTTP_IF_NONE_MATCH=sparse['ETag']).status_code, 304,
+        )
+
+    def test_order_list_follows_order_and_product_changes(self):
+        self.client.force_authenticate(self.user)
+        order = OrderProduct.objects.create(user=self.user, product=self.product, quantity=1)
+        orders = OrderProduct.objects.filter(pk=order.pk)
+        products = Product.objects.filter(pk=self.product.pk)
+        self.assertRevalidates('/orders/', lambda: orders.update(status='shipped', updated_at=timezone.now()))
+        self.assertRevalidates(f'/orders/{order.pk}/detail/', lambda: products.update(updated_at=timezone.now()))
+
+    def test_cached_responses_are_revalidated_too(self):
+        url = f'/products/{self.product.pk}/detail/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class RelatedProductsTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='secret123')
+            for i in range(4)
+        ]
+        self.products = [
+            Product.objects.create(user=self.users[0], name=f'Phone {i}', price=Decimal('10.00'), stock=5)
+            for i in range(5)
+        ]
+        p = self.products
+        for user, product in [(0, 0), (0, 1), (1, 0), (1, 1), (1, 2), (3, 3)]:
+            Like.objects.create(user=self.users[user], product=p[product])
+        for product in (0, 2):
+            OrderProduct.objects.create(user=self.users[2], product=p[product], quantity=1)
+        OrderProduct.objects.create(user=self.users[2], product=p[4], quantity=1, status='cancelled')
+
+    def related_ids(self, product):
+        return [item['id'] for item in self.client.get(f'/products/{product.pk}/related/').json()]
+
+    def test_full_rebuild_ranks_by_cosine(self):
+        out = StringIO()
+        call_command('rebuild_related_products', stdout=out)
+        self.assertIn('4 ta mahsulot', out.getvalue())
+        p = self.products
+
+        # Like = 1, buyurtma = 2: p0 (1, 1, 2), p1 (1, 1, 0), p2 (0, 1, 2).
+        rows = list(RelatedProduct.objects.filter(product=p[0]).values_list('related_id', 'rank', 'score'))
+        self.assertEqual([(related, rank) for related, rank, _ in rows], [(p[2].pk, 1), (p[1].pk, 2)])
+        self.assertAlmostEqual(rows[0][2], 5 / 30 ** 0.5)
+        self.assertAlmostEqual(rows[1][2], 2 / 12 ** 0.5)
+
+        self.assertEqual(self.related_ids(p[0]), [p[2].pk, p[1].pk])
+        self.assertEqual(self.related_ids(p[3]), [])
+        # Bekor qilingan buyurtma hisobga olinmaydi.
+        self.assertEqual(self.related_ids(p[4]), [])
+
+    def test_endpoint_is_single_query(self):
+        recommendations.refresh_related_products()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/products/{self.products[0].pk}/related/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertEqual(queries.captured_queries[0]['sql'].count('JOIN "main_relatedproduct"'), 1)
+
+        self.client.force_authenticate(self.users[0])
+        data = self.client.get(f'/products/{self.products[2].pk}/related/').json()
+        self.assertEqual({item['id']: item['is_liked'] for item in data}, {
+            self.products[0].pk: True, self.products[1].pk: True,
+        })
+
+    def test_incremental_refresh_touches_only_new_interactions(self):
+        recommendations.refresh_related_products()
+        p = self.products
+        untouched = set(RelatedProduct.objects.filter(product=p[1]).values_list('id', flat=True))
+        self.assertEqual(self.related_ids(p[0]), [p[2].pk, p[1].pk])
+
+        Like.objects.create(user=self.users[3], product=p[0])
+        self.assertEqual(recommendations.refresh_related_products(), 1)
+        self.assertEqual(self.related_ids(p[0]), [p[2].pk, p[1].pk, p[3].pk])
+        self.assertEqual(set(RelatedProduct.objects.filter(product=p[1]).values_list('id', flat=True)), untouched)
+
+        self.assertEqual(recommendations.refresh_related_products(), 0)
+        self.assertEqual(
+            list(RecommendationRun.objects.values_list('full', 'products')), [(False, 0), (False, 1), (True, 4)],
+        )
+
+    def test_full_rebuild_drops_products_without_interactions(self):
+        recommendations.refresh_related_products()
+        Like.objects.filter(product=self.products[3]).delete()
+        Like.objects.filter(user=self.users[1]).delete()
+        recommendations.refresh_related_products(full=True)
+        self.assertEqual(self.related_ids(self.products[2]), [self.products[0].pk])
+        self.assertFalse(RelatedProduct.objects.filter(product=self.products[3]).exists())
+
+    def test_incremental_refresh_loads_only_the_neighbourhood(self):
+        p = self.products
+        outsider = Product.objects.create(user=self.users[0], name='Other', price=Decimal('10.00'), stock=5)
+        Like.objects.create(user=self.users[3], product=outsider)
+        recommendations.refresh_related_products()
+        Like.objects.create(user=self.users[2], product=p[1])
+
+        with mock.patch.object(recommendations, 'load_interactions', wraps=recommendations.load_interactions) as load:
+            self.assertEqual(recommendations.refresh_related_products(), 1)
+        # p1 foydalanuvchilari (0, 1, 2) ko'rgan mahsulotlar; p3 va outsider faqat user3 da.
+        self.assertEqual(load.call_args.args[3], {p[0].pk, p[1].pk, p[2].pk})
+        incremental = list(RelatedProduct.objects.filter(product=p[1]).values_list('related_id', 'rank', 'score'))
+
+        recommendations.refresh_related_products(full=True)
+        full = list(RelatedProduct.objects.filter(product=p[1]).values_list('related_id', 'rank', 'score'))
+        self.assertEqual([row[:2] for row in incremental], [row[:2] for row in full])
+        for (*_, score), (*_, expected) in zip(incremental, full):
+            self.assertAlmostEqual(score, expected)
+
+    def test_compute_neighbors(self):
+        weights = {(1, 10): 1.0, (1, 11): 1.0, (2, 10): 2.0, (2, 12): 1.0}
+        result = dict(recommendations.compute_neighbors(weights, [10, 13], top_k=1))
+        self.assertEqual(result[13], [])
+        self.assertEqual([related for related, _ in result[10]], [12])
+        self.assertEqual(list(recommendations.compute_neighbors({}, [2, 1], top_k=1)), [(1, []), (2, [])])
+
+    def test_blocks_match_dense_cosine(self):
+        import random
+
+        import numpy as np
+
+        rng = random.Random(7)
+        weights = {(rng.randrange(50), rng.randrange(40)): rng.choice([1.0, 2.0, 3.0]) for _ in range(600)}
+        matrix = np.zeros((50, 40))
+        for (user_id, product_id), weight in weights.items():
+            matrix[user_id, product_id] = weight
+        norms = np.linalg.norm(matrix, axis=0)
+        # top_k barcha mahsulotlardan katta: teng ballar ichida kesish bo'lmaydi.
+        actual = dict(recommendations._neighbors(weights, list(range(45)), 100, block_size=7))
+        for product_id in range(45):
+            expected = []
+            if product_id < 40 and norms[product_id]:
+                cosine = matrix.T @ matrix[:, product_id] / np.where(norms, norms, 1) / norms[product_id]
+                expected = [(other, cosine[other]) for other in range(40) if other != product_id and cosine[other] > 0]
+            self.assertEqual(
+                sorted((round(score, 9), related) for related, score in actual[product_id]),
+                sorted((round(score, 9), related) for related, score in expected),
+            )
 
-# Create your tests here.
@@ -1,8 +1,27 @@
 from rest_framework import generics, permissions, status, viewsets, views
 from .serializer import *
+from .pagination import IdCursorPagination
+from .cache import CATALOG_VERSION, VersionedCacheMixin
+from .conditional import ConditionalGetMixin
+from .fastpath import FastListMixin
+from .fieldsets import SparseFieldsMixin
+from .likes import LikedFlagMixin, LikedIds, flush_user_likes
+from .routers import ReplicaReadMixin
+from .instrumentation import render_prometheus
+from .search import search_product_ids
+from .filters import ProductFilter, StableOrderingFilter, product_facets
+from .exports import (
+    ExportError, ORDER_COLUMNS, PRODUCT_COLUMNS, order_export_queryset, product_export_queryset, stream_rows,
+)
+from .analytics import AnalyticsError, GROUP_BY_CHOICES, sales_summary
+from .stock import release_stock
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from decimal import Decimal
 
 
 class RegisterAPIView(generics.CreateAPIView):
@@ -25,18 +44,69 @@ class ProfileAPIView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        user = self.request.user
-        profile, created = UserProfile.objects.get_or_create(user=user)
+        # request.user token asosidagi yengil obyekt; tahrirlanadigan to'liq User profil bilan birga o'qiladi.
+        profile, created = UserProfile.objects.select_related('user').get_or_create(user_id=self.request.user.pk)
         return profile
 
 
-class ProductListAPIView(generics.ListAPIView):
+class ProductListAPIView(ReplicaReadMixin, VersionedCacheMixin, ConditionalGetMixin, LikedFlagMixin, FastListMixin,
+                         generics.ListAPIView):
     serializer_class = ProductSafeSerializer
     permission_classes = [permissions.AllowAny]
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related('user', 'brand')
+    filter_backends = [DjangoFilterBackend, StableOrderingFilter]
+    filterset_class = ProductFilter
+    ordering_fields = ['like_count', 'created_at', 'price']
+    ordering = ('-created_at', '-id')
+    ordering_tiebreaker = ('-created_at', '-id')
+    conditional_versions = (CATALOG_VERSION,)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['facets'] = product_facets(self.filter_queryset(self.get_queryset()))
+        return response
 
 
-class MyProductListAPIView(generics.ListAPIView):
+class ProductSearchAPIView(ReplicaReadMixin, LikedFlagMixin, SparseFieldsMixin, generics.ListAPIView):
+    """
+    Mahsulotlarni nomi, tavsifi va brend nomi bo'yicha to'liq matnli qidirish.
+    Natijalar relevantlik bo'yicha tartiblanadi.
+    """
+    serializer_class = ProductSafeSerializer
+    permission_classes = [permissions.AllowAny]
+    queryset = Product.objects.select_related('user', 'brand')
+    pagination_class = None
+    default_limit = 20
+    max_limit = 100
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+    ])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"q": "Qidiruv so'zi kiritilishi kerak."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = search_product_ids(query, limit=self.get_limit())
+        products = self.filter_queryset(self.get_queryset()).in_bulk(ids)
+        ranked = [products[pk] for pk in ids if pk in products]
+        self.prime_liked(ranked)
+        serializer = self.get_serializer(ranked, many=True)
+        return Response(serializer.data)
+
+
+class MyProductListAPIView(ConditionalGetMixin, LikedFlagMixin, FastListMixin, generics.ListAPIView):
     serializer_class = ProductSafeSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -45,7 +115,7 @@ class MyProductListAPIView(generics.ListAPIView):
         if not user.is_authenticated:
             return Product.objects.none()
 
-        return Product.objects.filter(user=user)
+        return Product.objects.filter(user=user).select_related('user', 'brand')
 
 
 class ProductCreateAPIView(generics.CreateAPIView):
@@ -54,10 +124,35 @@ class ProductCreateAPIView(generics.CreateAPIView):
     queryset = Product.objects.all()
 
 
-class ProductRetrieveAPIView(generics.RetrieveAPIView):
+class ProductRetrieveAPIView(ReplicaReadMixin, VersionedCacheMixin, ConditionalGetMixin, LikedFlagMixin,
+                             SparseFieldsMixin, generics.RetrieveAPIView):
+    cache_lookup_url_kwarg = 'pk'
     serializer_class = ProductSafeSerializer
     permission_classes = [permissions.AllowAny]
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related('user', 'brand')
+
+
+class RelatedProductListAPIView(ReplicaReadMixin, VersionedCacheMixin, LikedFlagMixin, FastListMixin,
+                                 generics.ListAPIView):
+    """
+    "Buni yoqtirgan/olganlar yana ..." -- manage.py rebuild_related_products oldindan hisoblagan
+    qo'shnilar. RelatedProduct ning (product, rank) indeksi bo'yicha bitta so'rov.
+    """
+    serializer_class = ProductSafeSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = None
+
+    def get_queryset(self):
+        return (
+            Product.objects.filter(neighbor_of__product_id=self.kwargs['pk'])
+            .select_related('user', 'brand')
+            .order_by('neighbor_of__rank')
+        )
+
+    def paginate_queryset(self, queryset):
+        # Ro'yxat TOP_K dan oshmaydi: is_liked butun ro'yxat uchun bitta IN so'rovi bilan.
+        self.prime_liked(queryset)
+        return None
 
 
 class ProductUpdateAPIView(generics.UpdateAPIView):
@@ -84,13 +179,14 @@ class ProductDeleteAPIView(generics.DestroyAPIView):
         return Product.objects.filter(user=user)
 
 
-class ProductImageViewSet(viewsets.ModelViewSet):
+class ProductImageViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     Savdo platformasi uchun ProductImage ViewSet
     - Har kim ro'yxat va detallarni ko'ra oladi
     - Faqat mahsulot egasi create, update, delete qila oladi
     """
     queryset = ProductImage.objects.all()
+    pagination_class = IdCursorPagination
 
     def get_serializer_class(self):
         if self.action in ['list', 'retrieve']:
@@ -111,21 +207,26 @@ class ProductImageViewSet(viewsets.ModelViewSet):
         """
         user = self.request.user
         if self.action in ['list', 'retrieve']:
-            return ProductImage.objects.all()
+            return ProductImage.objects.select_related('product')
         if user.is_authenticated:
             return ProductImage.objects.filter(product__user=user)
         return ProductImage.objects.none()
 
 
-class LikeListAPIView(generics.ListAPIView):
+class LikeListAPIView(FastListMixin, generics.ListAPIView):
     serializer_class = LikeSafeSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
         if not user.is_authenticated:
-            return Like.onjects.none()
-        return Like.objects.filter(user=user)
+            return Like.objects.none()
+        return Like.objects.filter(user=user).select_related('product__user', 'product__brand')
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            flush_user_likes(request.user.pk)
+        return super().get(request, *args, **kwargs)
 
 
 class LikeToggleAPIView(views.APIView):
@@ -135,7 +236,9 @@ class LikeToggleAPIView(views.APIView):
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
-                'product_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Mahsulot ID si')
+                'product_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Mahsulot ID si'),
+                'liked': openapi.Schema(type=openapi.TYPE_BOOLEAN,
+                                        description="Berilsa almashtirish o'rniga shu holat o'rnatiladi"),
             },
             required=['product_id']
         ),
@@ -149,15 +252,41 @@ class LikeToggleAPIView(views.APIView):
         return Response(result, status=status.HTTP_200_OK)
 
 
-class OrderProductListAPIView(generics.ListAPIView):
+class LikeStatusAPIView(views.APIView):
+    """
+    Mahsulot kartochkalari uchun: ?ids=1,2,3 -> {"1": true, "2": false, "3": false}.
+    Bitta `product_id IN (...)` so'rovi bilan hisoblanadi.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_ids = 100
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('ids', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                          description="Vergul bilan ajratilgan mahsulot id lari"),
+    ])
+    def get(self, request, *args, **kwargs):
+        try:
+            ids = list(dict.fromkeys(int(value) for value in request.query_params.get('ids', '').split(',') if value))
+        except ValueError:
+            return Response({"ids": "Id lar butun son bo'lishi kerak."}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({"ids": "Kamida bitta id kiritilishi kerak."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.max_ids:
+            return Response({"ids": f"Bir martada ko'pi bilan {self.max_ids} ta id."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(LikedIds(request.user.pk).status(ids))
+
+
+class OrderProductListAPIView(ConditionalGetMixin, FastListMixin, generics.ListAPIView):
     serializer_class = OrderProductSafeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_fields = ('updated_at', 'product__updated_at')
 
     def get_queryset(self):
         user = self.request.user
         if not user.is_authenticated:
             return OrderProduct.objects.none()
-        return OrderProduct.objects.filter(user=user).order_by('-created_at')
+        return OrderProduct.objects.filter(user=user).select_related('product').order_by('-created_at', '-id')
 
 
 class OrderProductCreateAPIView(generics.CreateAPIView):
@@ -168,15 +297,31 @@ class OrderProductCreateAPIView(generics.CreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class OrderProductRetrieveAPIView(generics.RetrieveAPIView):
+class OrderProductBulkCreateAPIView(generics.GenericAPIView):
+    serializer_class = OrderBulkCreateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(responses={201: OrderProductSafeSerializer(many=True)})
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        orders = serializer.save()
+        return Response({
+            "orders": OrderProductSafeSerializer(orders, many=True).data,
+            "total_price": str(sum((order.total_price for order in orders), Decimal('0.00'))),
+        }, status=status.HTTP_201_CREATED)
+
+
+class OrderProductRetrieveAPIView(ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveAPIView):
     serializer_class = OrderProductSafeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_fields = ('updated_at', 'product__updated_at')
 
     def get_queryset(self):
         user = self.request.user
         if not user.is_authenticated:
             return OrderProduct.objects.none()
-        return OrderProduct.objects.filter(user=user)
+        return OrderProduct.objects.filter(user=user).select_related('product')
 
 
 class OrderProductUpdateAPIView(generics.UpdateAPIView):
@@ -187,7 +332,7 @@ class OrderProductUpdateAPIView(generics.UpdateAPIView):
         user = self.request.user
         if not user.is_authenticated:
             return OrderProduct.objects.none()
-        return OrderProduct.objects.filter(user=user)
+        return OrderProduct.objects.filter(user=user).select_related('product')
 
 
 class OrderProductDeleteAPIView(generics.DestroyAPIView):
@@ -199,3 +344,124 @@ class OrderProductDeleteAPIView(generics.DestroyAPIView):
         if not user.is_authenticated:
             return OrderProduct.objects.none()
         return OrderProduct.objects.filter(user=user)
+
+    def perform_destroy(self, instance):
+        # Band qilingan miqdor omborga qaytadi; bekor qilingan buyurtma allaqachon qaytargan.
+        with transaction.atomic():
+            current = OrderProduct.objects.select_for_update().get(pk=instance.pk)
+            if current.status != 'cancelled':
+                release_stock(current.product_id, current.quantity)
+            current.delete()
+
+
+class BaseExportAPIView(views.APIView):
+    """
+    Eksport qatorlarini StreamingHttpResponse orqali bo'laklab uzatadi.
+    Xotira sarfi qatorlar soniga bog'liq emas.
+    - staff: barcha yozuvlar
+    - boshqalar: faqat o'ziga tegishli yozuvlar
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    export_name = None
+    columns = None
+
+    def get_rows(self, request, owner):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export_format', 'csv')
+        owner = None if request.user.is_staff else request.user
+        try:
+            rows = self.get_rows(request, owner)
+            stream = stream_rows(rows, self.columns, export_format)
+        except ExportError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.export_name}.{export_format}"'
+        return response
+
+
+class OrderExportAPIView(BaseExportAPIView):
+    export_name = 'orders'
+    columns = ORDER_COLUMNS
+
+    def get_rows(self, request, owner):
+        params = request.query_params
+        return order_export_queryset(
+            user=owner,
+            date_from=params.get('date_from'),
+            date_to=params.get('date_to'),
+            status=params.get('status'),
+        )
+
+
+class ProductExportAPIView(BaseExportAPIView):
+    export_name = 'products'
+    columns = PRODUCT_COLUMNS
+
+    def get_rows(self, request, owner):
+        params = request.query_params
+        return product_export_queryset(
+            user=owner,
+            date_from=params.get('date_from'),
+            date_to=params.get('date_to'),
+        )
+
+
+class SalesAnalyticsAPIView(views.APIView):
+    """
+    Savdo ko'rsatkichlari: buyurtmalar soni, dona va tushum status bo'yicha.
+    Faqat oldindan yig'ilgan SalesRollup jadvalidan o'qiladi.
+    - staff: group_by=day|product|brand|seller
+    - boshqalar: faqat o'z sotuvlari (group_by=day yoki seller)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    seller_group_by = ('day', 'seller')
+    default_limit = 50
+    max_limit = 500
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('group_by', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(GROUP_BY_CHOICES)),
+        openapi.Parameter('date_from', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+        openapi.Parameter('date_to', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+        openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+    ])
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        group_by = params.get('group_by', 'day')
+        seller = None if request.user.is_staff else request.user
+        if seller is not None and group_by not in self.seller_group_by:
+            return Response(
+                {"detail": "Bu guruhlash faqat administratorlar uchun."}, status=status.HTTP_403_FORBIDDEN,
+            )
+        try:
+            limit = int(params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        try:
+            results = sales_summary(
+                group_by=group_by,
+                date_from=params.get('date_from'),
+                date_to=params.get('date_to'),
+                status=params.get('status'),
+                seller=seller,
+                limit=max(1, min(limit, self.max_limit)),
+            )
+        except AnalyticsError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"group_by": group_by, "results": results})
+
+
+class MetricsAPIView(views.APIView):
+    """
+    URL nomi bo'yicha so'rov davomiyligi (p50/p95/p99), SQL soni va DB vaqti, Prometheus formatida.
+    Statistika jarayon ichida yig'iladi: har bir worker faqat o'zinikini qaytaradi.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    @swagger_auto_schema(auto_schema=None)
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')